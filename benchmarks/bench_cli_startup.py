@@ -0,0 +1,86 @@
+"""Startup benchmark: cold `fs` command latency against a large saved state.
+
+Each command runs in a fresh interpreter with HOME pointed at a temporary
+directory holding a generated state, so nothing is shared between runs. With
+--max-ms the script exits non-zero when `fs pwd` is slower than the budget,
+which makes it usable as an import-time regression check. The package is
+byte-compiled first, as an installed one would be: with PYTHONDONTWRITEBYTECODE
+set, edited modules would otherwise be recompiled by every run.
+
+Run from the repository root:
+    python -m benchmarks.bench_cli_startup --nodes 100000 --max-ms 50
+"""
+import argparse
+import compileall
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from src.utils.models import FileSystemNode, LocalState
+from src.utils.state_manager import save_local_state, state_path
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+
+COMMANDS = {
+    "python -c pass": [sys.executable, "-c", "pass"],
+    "import cli": [sys.executable, "-c", "import src.cli.filesys"],
+    "fs pwd": [sys.executable, "-m", "src.cli.filesys", "pwd"],
+    "fs ls": [sys.executable, "-m", "src.cli.filesys", "ls"],
+}
+
+
+def build_state(count: int) -> LocalState:
+    """A state with count files spread over directories of 1000, cwd one level down"""
+    local = LocalState(user="admin")
+    directory = None
+    for i in range(count):
+        if i % 1000 == 0:
+            directory = FileSystemNode(f"dir{i // 1000}", owner="admin", is_directory=True)
+            local.root.add_child(directory)
+        directory.add_child(FileSystemNode(f"file{i}.txt", owner="admin", content="x" * 32))
+    local.cwd = local.root.children.get("dir0", local.root)
+    return local
+
+
+def time_command(argv, env, runs: int) -> float:
+    """Median wall time in milliseconds"""
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(argv, env=env, stdout=subprocess.DEVNULL, check=True)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CLI cold-start benchmark")
+    parser.add_argument("--nodes", type=int, default=100000, help="Number of files in the saved state")
+    parser.add_argument("--runs", type=int, default=10, help="Runs per command (median is reported)")
+    parser.add_argument("--max-ms", type=float, help="Fail if `fs pwd` takes longer than this")
+    args = parser.parse_args()
+
+    compileall.compile_dir(SRC, quiet=1)
+    with tempfile.TemporaryDirectory() as home:
+        env = dict(os.environ, HOME=home)
+        env.pop("INMEMORY_FS_SOCKET", None)
+        os.environ["HOME"] = home
+        save_local_state(build_state(args.nodes), state_path())
+        size = os.path.getsize(state_path())
+        print(f"state: {args.nodes} files, {size / 2**20:.1f} MB")
+
+        results = {name: time_command(argv, env, args.runs) for name, argv in COMMANDS.items()}
+
+    print(f"{'command':<16}{'median ms':>12}")
+    for name, ms in results.items():
+        print(f"{name:<16}{ms:>12.1f}")
+
+    if args.max_ms is not None and results["fs pwd"] > args.max_ms:
+        print(f"FAIL: fs pwd took {results['fs pwd']:.1f} ms (budget {args.max_ms:.1f} ms)")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Multi-threaded read throughput benchmark.
+
+Threads repeatedly read files from one shared directory while an optional writer
+keeps rewriting a sibling file. Run from the repository root:
+    python -m benchmarks.bench_concurrent_reads --threads 1 2 4 8 --seconds 2
+"""
+import argparse
+import threading
+import time
+
+from src.utils.models import LocalState
+from src.permissions.permissions_manager import PermissionManager
+from src.fs_operations.file_operations import FileOperations
+
+
+def build(files: int):
+    local = LocalState()
+    perm_manager = PermissionManager(local.root, local)
+    ops = FileOperations(local, perm_manager)
+    ops.write_many((f"file{i}.txt", "x" * 1024) for i in range(files))
+    ops.touch("hot.txt")
+    return ops
+
+
+def run(ops: FileOperations, threads: int, seconds: float, files: int, with_writer: bool) -> float:
+    stop = threading.Event()
+    counts = [0] * threads
+
+    def reader(slot):
+        i = slot
+        while not stop.is_set():
+            ops.read(f"file{i % files}.txt")
+            counts[slot] += 1
+            i += 1
+
+    def writer():
+        n = 0
+        while not stop.is_set():
+            ops.write("hot.txt", str(n))
+            n += 1
+
+    workers = [threading.Thread(target=reader, args=(slot,)) for slot in range(threads)]
+    if with_writer:
+        workers.append(threading.Thread(target=writer))
+    for worker in workers:
+        worker.start()
+    time.sleep(seconds)
+    stop.set()
+    for worker in workers:
+        worker.join()
+    return sum(counts) / seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent read throughput benchmark")
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--seconds", type=float, default=2.0)
+    parser.add_argument("--files", type=int, default=1000)
+    parser.add_argument("--writer", action="store_true", help="Run a concurrent writer in the same directory")
+    args = parser.parse_args()
+
+    ops = build(args.files)
+    print(f"{'threads':>8}{'reads/sec':>14}")
+    for threads in args.threads:
+        rate = run(ops, threads, args.seconds, args.files, args.writer)
+        print(f"{threads:>8}{rate:>14,.0f}")
+
+
+if __name__ == "__main__":
+    main()
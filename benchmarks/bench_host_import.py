@@ -0,0 +1,49 @@
+"""Host import throughput: `fs import` of a generated on-disk tree.
+
+Writes --files files of --size bytes into directories of 100 under a temporary
+directory, then imports the tree with HostImporter for each worker count and
+reports files/sec and MB/sec. Compare with the scripted alternative of one
+`fs write` per file to see what the bulk path saves.
+
+Run from the repository root:
+    python -m benchmarks.bench_host_import --files 20000 --size 4096 --workers 1 4 16
+"""
+import argparse
+import os
+import tempfile
+
+from src.fs_operations.host_import import HostImporter
+from src.permissions.permissions_manager import PermissionManager
+from src.utils.models import LocalState
+
+
+def build_host_tree(root: str, files: int, size: int):
+    body = b"x" * size
+    for i in range(files):
+        directory = os.path.join(root, f"dir{i // 100}")
+        if i % 100 == 0:
+            os.makedirs(directory)
+        with open(os.path.join(directory, f"file{i}.txt"), "wb") as f:
+            f.write(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="fs import throughput benchmark")
+    parser.add_argument("--files", type=int, default=20000, help="Number of files to generate")
+    parser.add_argument("--size", type=int, default=4096, help="Bytes per file")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 16], help="Reader thread counts to try")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as host:
+        build_host_tree(host, args.files, args.size)
+        print(f"host tree: {args.files} files, {args.files * args.size / 2**20:.1f} MB")
+        print(f"{'workers':>8}{'seconds':>10}{'files/sec':>12}{'MB/sec':>10}")
+        for workers in args.workers:
+            local = LocalState(user="admin")
+            pm = PermissionManager(local.root, local)
+            stats = HostImporter(local, pm, workers).import_tree(host, "/imported")
+            print(f"{workers:>8}{stats.seconds:>10.2f}{stats.files_per_sec:>12.0f}{stats.mb_per_sec:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
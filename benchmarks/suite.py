@@ -0,0 +1,283 @@
+"""Benchmark suite for the core operations at increasing tree sizes.
+
+Every case runs against a tree of --sizes files (directories of 1000 files under
+the root) and reports the best time per operation over --repeat rounds. Like
+timeit's autorange, a round repeats the case until it takes at least --min-time
+seconds, so fast cases are not dominated by timer resolution. Results are
+printed as a table and written as JSON with --json. When a baseline exists
+(default benchmarks/baseline.json) each result is compared to it, and the run
+exits non-zero if any case is more than --threshold slower. Baselines are only
+meaningful on the machine that recorded them: if the baseline's platform or
+Python version differs from this run's, regressions are reported as a warning
+and do not fail the run. Refresh it with --update-baseline.
+
+Run from the repository root:
+    python -m benchmarks.suite                          # 10^3 .. 10^5 nodes
+    python -m benchmarks.suite --sizes 1000000 --cases find get_node
+    python -m benchmarks.suite --json results.json --threshold 0.5
+"""
+import argparse
+import gc
+import itertools
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+
+from src.utils.models import FileSystemNode, LocalState
+from src.utils.state_manager import load_local_state, save_local_state
+from src.permissions.permissions_manager import PermissionManager
+from src.fs_operations.node_operations import NodeOperations
+from src.fs_operations.file_operations import FileOperations
+from src.fs_operations.directory_operations import DirectoryOperations
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+DIRECTORY_SIZE = 1000
+
+
+class Tree:
+    """A LocalState of `size` files with the operation objects bound to it"""
+
+    def __init__(self, size: int):
+        self.size = size
+        self.local = LocalState(user="admin")
+        self.pm = PermissionManager(self.local.root, self.local)
+        self.pm.set_user("bob", "bob")
+        self.paths = []
+        directory = None
+        for i in range(size):
+            if i % DIRECTORY_SIZE == 0:
+                directory = FileSystemNode(f"dir{i // DIRECTORY_SIZE}", owner="admin", is_directory=True)
+                self.local.root.add_child(directory)
+            directory.add_child(FileSystemNode(f"file{i}.txt", owner="admin", content="x" * 64))
+            self.paths.append(f"/{directory.name}/file{i}.txt")
+        # Everyone below the root is readable by bob through one inherited entry
+        self.pm.node_perms.set_permissions(self.local.root, "bob", read=True, write=False, inherit=True)
+        self.home = self.local.root.children["dir0"]
+        self.scratch = FileSystemNode("scratch", owner="admin", is_directory=True)
+        self.local.root.add_child(self.scratch)
+        self.local.cwd = self.home
+        self.node_ops = NodeOperations(self.local, self.pm)
+        self.file_ops = FileOperations(self.local, self.pm)
+        self.dir_ops = DirectoryOperations(self.local, self.pm)
+        self.names = list(self.home.children)
+        self.unique = itertools.count()
+
+
+# Each case takes a Tree and returns (operations per round, function running one round).
+# Cases run with the cwd in dir0 (1000 files); touch and mkdir create their nodes in
+# /scratch, which is emptied after every case, so the others always see the same tree.
+def case_touch(tree):
+    tree.local.cwd = tree.scratch
+    def run():
+        for _ in range(1000):
+            tree.file_ops.touch(f"new{next(tree.unique)}.txt")
+    return 1000, run
+
+def case_mkdir(tree):
+    tree.local.cwd = tree.scratch
+    def run():
+        for _ in range(1000):
+            tree.dir_ops.mkdir(f"newdir{next(tree.unique)}")
+    return 1000, run
+
+def case_read(tree):
+    names = random.Random(1).choices(tree.names, k=1000)
+    def run():
+        for name in names:
+            tree.file_ops.read(name)
+    return 1000, run
+
+def case_write(tree):
+    names = random.Random(2).choices(tree.names, k=1000)
+    def run():
+        for name in names:
+            tree.file_ops.write(name, "y" * 64)
+    return 1000, run
+
+def case_ls(tree):
+    def run():
+        for _ in range(20):
+            tree.dir_ops.ls()
+    return 20, run
+
+def case_find(tree):
+    def run():
+        tree.node_ops._find_recursive(tree.local.root, "file1*.txt")
+    return 1, run
+
+def case_get_node(tree):
+    paths = random.Random(3).choices(tree.paths, k=1000)
+    def run():
+        for path in paths:
+            tree.node_ops.get_node(path)
+    return 1000, run
+
+def case_move_directory(tree):
+    directories = [f"/dir{i}" for i in range(min(100, tree.size // DIRECTORY_SIZE))]
+    def run():
+        for path in directories:
+            tree.dir_ops.move_directory(path, path + "_moved")
+        for path in directories:
+            tree.dir_ops.move_directory(path + "_moved", path)
+    return 2 * len(directories), run
+
+def case_check_permission(tree):
+    nodes = [tree.node_ops.get_node(path) for path in random.Random(4).choices(tree.paths, k=1000)]
+    def run():
+        tree.local.user = "bob"
+        try:
+            for node in nodes:
+                tree.pm.check_permission(node, "read")
+        finally:
+            tree.local.user = "admin"
+    return 1000, run
+
+def case_save_state(tree):
+    path = os.path.join(tree.tmpdir, "state.pkl")
+    return 1, lambda: save_local_state(tree.local, path)
+
+def case_load_state(tree):
+    path = os.path.join(tree.tmpdir, "state.pkl")
+    save_local_state(tree.local, path)
+    return 1, lambda: load_local_state(path)
+
+CASES = {
+    "touch": case_touch,
+    "mkdir": case_mkdir,
+    "read": case_read,
+    "write": case_write,
+    "ls": case_ls,
+    "find": case_find,
+    "get_node": case_get_node,
+    "move_directory": case_move_directory,
+    "check_permission": case_check_permission,
+    "save_state": case_save_state,
+    "load_state": case_load_state,
+}
+
+
+def _time(run, number: int) -> float:
+    """Seconds taken by number calls of run"""
+    # Like timeit, keep collector pauses out of the measurement
+    gc.collect()
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        for _ in range(number):
+            run()
+        return time.perf_counter() - start
+    finally:
+        gc.enable()
+
+
+def _calibrate(run, min_time: float):
+    """(calls per round, seconds of the last trial): 1, 2, 5, 10, 20, 50, ... calls until a
+    round takes at least min_time, as timeit's autorange does"""
+    for scale in itertools.count():
+        for step in (1, 2, 5):
+            number = step * 10 ** scale
+            elapsed = _time(run, number)
+            if elapsed >= min_time:
+                return number, elapsed
+
+
+def run_suite(sizes, cases, repeat: int, min_time: float = 0.05) -> dict:
+    """{"<case>/<size>": {"us_per_op": best time, "ops": operations per round}}"""
+    results = {}
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for size in sizes:
+            tree = Tree(size)
+            tree.tmpdir = tmpdir
+            for name in cases:
+                tree.local.cwd = tree.home
+                ops, run = CASES[name](tree)
+                number, best = _calibrate(run, min_time)
+                for _ in range(repeat - 1):
+                    best = min(best, _time(run, number))
+                ops *= number
+                results[f"{name}/{size}"] = {"us_per_op": best / ops * 1e6, "ops": ops}
+                tree.scratch.children.clear()
+    return results
+
+
+def compare(results: dict, baseline: dict) -> dict:
+    """Ratio of each result to its baseline; keys missing from either side are skipped"""
+    ratios = {}
+    for key, result in results.items():
+        base = baseline.get(key)
+        if base and base["us_per_op"] > 0:
+            ratios[key] = result["us_per_op"] / base["us_per_op"]
+    return ratios
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Core operation benchmark suite")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000],
+                        help="Tree sizes in files (10^6 works, but takes a few minutes)")
+    parser.add_argument("--cases", nargs="+", choices=list(CASES), default=list(CASES))
+    parser.add_argument("--repeat", type=int, default=5, help="Rounds per case (the best is kept)")
+    parser.add_argument("--min-time", type=float, default=0.05,
+                        help="Seconds a round takes at least; fast cases repeat until they reach it")
+    parser.add_argument("--json", help="Write the results to this file ('-' for stdout)")
+    parser.add_argument("--baseline", default=BASELINE, help="Baseline JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="Fail when a case is this fraction slower than the baseline")
+    parser.add_argument("--update-baseline", action="store_true", help="Store these results as the baseline")
+    args = parser.parse_args()
+
+    results = run_suite(args.sizes, args.cases, args.repeat, args.min_time)
+    meta = {"python": platform.python_version(), "platform": platform.platform(),
+            "repeat": args.repeat, "min_time": args.min_time, "threshold": args.threshold}
+    baseline = {}
+    baseline_meta = {}
+    if os.path.exists(args.baseline) and not args.update_baseline:
+        with open(args.baseline) as f:
+            stored = json.load(f)
+        baseline, baseline_meta = stored["results"], stored.get("meta", {})
+    ratios = compare(results, baseline)
+    # Timings from another machine or interpreter are not comparable: warn, don't fail
+    foreign = [f"{field} {baseline_meta.get(field)}" for field in ("platform", "python")
+               if baseline and baseline_meta.get(field) != meta[field]]
+
+    regressions = []
+    out = sys.stderr if args.json == "-" else sys.stdout
+    print(f"{'case':<28}{'us/op':>12}{'baseline':>12}{'change':>9}", file=out)
+    for key, result in results.items():
+        line = f"{key:<28}{result['us_per_op']:>12.2f}"
+        if key in ratios:
+            line += f"{baseline[key]['us_per_op']:>12.2f}{(ratios[key] - 1) * 100:>+8.0f}%"
+            if ratios[key] > 1 + args.threshold:
+                line += "  REGRESSION"
+                regressions.append(key)
+        print(line, file=out)
+
+    report = {
+        "meta": meta,
+        "results": results,
+        "regressions": regressions,
+    }
+    if args.json == "-":
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    elif args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump({"meta": report["meta"], "results": results}, f, indent=2)
+        print(f"baseline written to {args.baseline}", file=out)
+
+    if regressions and foreign:
+        print(f"WARNING: {len(regressions)} case(s) more than {args.threshold:.0%} slower than a baseline "
+              f"recorded with {', '.join(foreign)}; not failing, refresh it with --update-baseline", file=out)
+    elif regressions:
+        print(f"FAIL: {len(regressions)} case(s) more than {args.threshold:.0%} slower than the baseline", file=out)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -14,6 +14,7 @@ setup(
         'console_scripts': [
             'fs=cli.filesys:main',
             'perms=cli.permissions:main',
+            'fs-server=cli.server:main',
         ],
     },
 ) 
\ No newline at end of file
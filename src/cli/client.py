@@ -0,0 +1,87 @@
+"""Thin client for fs-server: forwards one CLI invocation over a Unix socket.
+
+The protocol is one JSON object per line in each direction:
+    request:  {"tool": "fs" | "perms" | "server", "argv": [...], "stdin": "..."}
+    response: {"output": "...", "status": 0}
+Only os and sys are imported up front, so checking for a server costs nothing
+when none is running.
+"""
+import os
+import sys
+
+SOCKET_ENV = "INMEMORY_FS_SOCKET"
+DEFAULT_SOCKET = "~/.inmemory_fs.sock"
+TIMEOUT = 600.0  # seconds forward() waits for a response (bulk imports can be slow)
+
+def socket_path() -> str:
+    """Socket path from $INMEMORY_FS_SOCKET, else ~/.inmemory_fs.sock"""
+    return os.path.expanduser(os.environ.get(SOCKET_ENV) or DEFAULT_SOCKET)
+
+def server_running(path: str = None) -> bool:
+    """Whether an fs-server accepts connections on the socket"""
+    import socket
+    path = path or socket_path()
+    if not os.path.exists(path):
+        return False
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+        try:
+            probe.connect(path)
+        except (ConnectionRefusedError, FileNotFoundError):
+            return False
+    return True
+
+def request(tool: str, argv, stdin: str = None, path: str = None, timeout: float = None) -> dict:
+    """Send one request and wait for its response. Raises OSError if no server is listening."""
+    import json
+    import socket
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(path or socket_path())
+        message = {"tool": tool, "argv": list(argv)}
+        if stdin is not None:
+            message["stdin"] = stdin
+        sock.sendall(json.dumps(message).encode() + b"\n")
+        with sock.makefile("rb") as reader:
+            line = reader.readline()
+    if not line:
+        raise ConnectionError("fs-server closed the connection")
+    return json.loads(line)
+
+def with_absolute_path(argv, value: str):
+    """argv with its last occurrence of a relative file argument (value, or --opt=value)
+    made absolute, since the server resolves paths from its own working directory"""
+    for position in range(len(argv) - 1, -1, -1):
+        option, equals, rest = argv[position].partition("=")
+        if argv[position] == value or (equals and option.startswith("-") and rest == value):
+            prefix = f"{option}=" if argv[position] != value else ""
+            return argv[:position] + [prefix + os.path.abspath(value)] + argv[position + 1:]
+    return argv
+
+def forward(tool: str, argv, read_stdin: bool = False) -> bool:
+    """Run a command on a running fs-server and print its output. Returns False when no
+    server is reachable, so the caller runs the command standalone. Commands that
+    read stdin (fs batch, perms import -) pass read_stdin, since the server
+    cannot see this process's stdin."""
+    path = socket_path()
+    if not os.path.exists(path):
+        return False
+    import socket
+    stdin = sys.stdin.read() if read_stdin else None
+    try:
+        response = request(tool, argv, stdin, path, timeout=TIMEOUT)
+    except (ConnectionRefusedError, FileNotFoundError):
+        if stdin is not None:
+            import io
+            sys.stdin = io.StringIO(stdin)
+        return False
+    except (ConnectionError, socket.timeout) as e:
+        # The server got the request, so running it here as well could apply it twice
+        reason = f"no response within {TIMEOUT:.0f}s" if isinstance(e, socket.timeout) else str(e)
+        print(f"Error: fs-server failed to answer: {reason}")
+        sys.exit(1)
+    sys.stdout.write(response.get("output", ""))
+    sys.stdout.flush()
+    status = response.get("status", 0)
+    if status:
+        sys.exit(status)
+    return True
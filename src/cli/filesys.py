@@ -1,55 +1,96 @@
 #!/usr/bin/env python3
-from src.utils.models import FileSystemNode, Permission, LocalState
-from src.fs_operations.file_operations import FileOperations
-from src.fs_operations.node_operations import NodeOperations
-from src.fs_operations.directory_operations import DirectoryOperations
-from src.permissions.permissions_manager import PermissionManager
-from src.utils.parser_helpers import create_filesys_parser
-import os
-import pickle
+# Only lightweight modules are imported here: operations, permissions and the models
+# are imported on first use so commands like `fs pwd` start without them
+from src.utils.state_manager import LazyState, save_local_state
+from src.cli.client import forward, server_running, socket_path, with_absolute_path
+from src.cli.output import Output, node_record
+from src.utils.path_utils import node_path
+from src.utils.profiling import profiled
+from functools import cached_property
+import sys
+import time
+
+TYPE_CHECKING = False  # typing.TYPE_CHECKING, without importing typing at startup
+if TYPE_CHECKING:
+    from typing import Callable
+
+# Names this module used to import eagerly, still importable from here
+_LAZY_EXPORTS = {
+    "FileSystemNode": "src.utils.models",
+    "Permission": "src.utils.models",
+    "LocalState": "src.utils.models",
+    "intern_permission": "src.utils.models",
+    "FileOperations": "src.fs_operations.file_operations",
+    "NodeOperations": "src.fs_operations.node_operations",
+    "DirectoryOperations": "src.fs_operations.directory_operations",
+    "run_transaction": "src.fs_operations.transactions",
+    "PermissionManager": "src.permissions.permissions_manager",
+    "create_filesys_parser": "src.utils.parser_helpers",
+    "create_permissions_parser": "src.utils.parser_helpers",
+}
+
+def __getattr__(name):
+    if name in _LAZY_EXPORTS:
+        import importlib
+        return getattr(importlib.import_module(_LAZY_EXPORTS[name]), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 class FileSystemCLI:
-    def __init__(self):
-        # Load or initialize state
-        try:
-            with open(os.path.expanduser('~/.inmemory_fs_state.pkl'), 'rb') as f:
-                self.local = pickle.load(f)
-                # Ensure root node exists
-                if not self.local.root:
-                    root = FileSystemNode("/", owner="admin", is_directory=True)
-                    root.permissions["admin"] = Permission(owner="admin", read=True, write=True)
-                    self.local.root = root
-                    self.local.cwd = root
-                # Ensure cwd exists and has a valid path to root
-                current = self.local.cwd
-                while current and current != self.local.root:
-                    if not current.parent:
-                        # If we can't find a path to root, reset to root
-                        self.local.cwd = self.local.root
-                        break
-                    current = current.parent
-        except:
-            # Initialize root node with proper permissions
-            root = FileSystemNode("/", owner="admin", is_directory=True)
-            root.permissions["admin"] = Permission(owner="admin", read=True, write=True)
-            
-            # Initialize local state with admin privileges and root directory
-            self.local = LocalState(user="admin", cwd=root)
-        
-        # Initialize operations
-        self.perm_manager = PermissionManager(self.local.root, self.local)
-        self.node_ops = NodeOperations(self.local, self.perm_manager)
-        self.dir_ops = DirectoryOperations(self.local, self.perm_manager)
-        self.file_ops = FileOperations(self.local, self.perm_manager)
+    """With local/perm_manager the CLI works on resident state (see cli/server.py);
+    save_state replaces the pickle write after each modification. Otherwise the
+    saved state is loaded the first time a command needs it."""
+    def __init__(self, local: 'LocalState' = None, perm_manager: 'PermissionManager' = None,
+                 save_state: 'Callable[[], None]' = None):
+        self._state = LazyState()
+        self._local = local
+        self.save_state = save_state
+        self.out = Output()
+        if perm_manager is not None:
+            self.perm_manager = perm_manager
+
+    @property
+    def local(self) -> 'LocalState':
+        if self._local is None:
+            self._local = self._state.load()
+        return self._local
+
+    @cached_property
+    def perm_manager(self) -> 'PermissionManager':
+        from src.permissions.permissions_manager import PermissionManager
+        return PermissionManager(self.local.root, self.local)
+
+    @cached_property
+    def node_ops(self) -> 'NodeOperations':
+        from src.fs_operations.node_operations import NodeOperations
+        return NodeOperations(self.local, self.perm_manager)
+
+    @cached_property
+    def dir_ops(self) -> 'DirectoryOperations':
+        from src.fs_operations.directory_operations import DirectoryOperations
+        return DirectoryOperations(self.local, self.perm_manager)
+
+    @cached_property
+    def file_ops(self) -> 'FileOperations':
+        from src.fs_operations.file_operations import FileOperations
+        return FileOperations(self.local, self.perm_manager)
 
     def _save_state(self):
-        with open(os.path.expanduser('~/.inmemory_fs_state.pkl'), 'wb') as f:
-            pickle.dump(self.local, f)
+        if self.save_state is not None:
+            self.save_state()
+            return
+        self._write_state()
+
+    def _write_state(self):
+        save_local_state(self.local)
 
     """Ensure node has proper permissions for the current user"""
     def _ensure_node_permissions(self, node):
+        from src.utils.models import intern_permission
         if self.local.user not in node.permissions:
-            node.permissions[self.local.user] = Permission(owner=self.local.user, read=True, write=True)
+            node.permissions = {**node.permissions,
+                                self.local.user: intern_permission(owner=self.local.user, read=True, write=True)}
+            node.perm_version += 1
+            self.local.acl_index.add(self.local.user, node)
 
     """Change directory"""
     def cd(self, path):
@@ -57,40 +98,48 @@ class FileSystemCLI:
             self.dir_ops.cd(path)
             self._save_state()  # Save state after changing directory
         except Exception as e:
-            print(f"Error: {str(e)}")
+            self.out.error(e)
 
     """Print working directory"""
     def pwd(self):
         try:
-            path = self.dir_ops.pwd()
-            if path:
-                print(path)
+            # The state sidecar knows the cwd, so pwd usually never unpickles the tree
+            meta = None if self._local is not None else self._state.meta()
+            path = (meta["cwd"] if meta else self.dir_ops.pwd()) or "/"
+            if self.out.jsonl:
+                self.out.record({"path": path})
             else:
-                print("/")
+                print(path)
         except Exception as e:
-            print(f"Error: {str(e)}")
+            self.out.error(e)
 
     """Create a new directory"""
     def mkdir(self, name):
         try:
             self._ensure_node_permissions(self.local.cwd)
             node = self.dir_ops.mkdir(name)
-            print(f"Created directory: {name}")
+            self.out.message(f"Created directory: {name}")
             self._save_state()  # Save state after modification
         except Exception as e:
-            print(f"Error: {str(e)}")
+            self.out.error(e)
 
     """List directory contents"""
     def ls(self):
         try:
             self._ensure_node_permissions(self.local.cwd)
+            if self.out.jsonl:
+                prefix = self.dir_ops.pwd().rstrip("/")
+                entries = ((f"{prefix}/{name}", node) for name, node in self.dir_ops.iter_ls())
+                self.out.records(node_record(path, node, acl)
+                                 for path, node, acl in self.perm_manager.iter_permissions(entries))
+                return
             contents = self.dir_ops.ls()
             if contents:
                 print("\n".join(contents))
             elif contents is not None:  # Only print if contents is an empty list, not None
                 print("Directory is empty")
         except Exception as e:
-            print(f"Error: {str(e)}")
+            self.out.error(e)
 
     """Remove a directory"""
     def rmdir(self, name):
@@ -100,10 +149,10 @@ class FileSystemCLI:
             if target:
                 self._ensure_node_permissions(target)
             self.dir_ops.rmdir(name)
-            print(f"Removed directory: {name}")
+            self.out.message(f"Removed directory: {name}")
             self._save_state()  # Save state after modification
         except Exception as e:
-            print(f"Error: {str(e)}")
+            self.out.error(e)
 
     """Create a new file"""
     def touch(self, name):
@@ -113,10 +162,10 @@ class FileSystemCLI:
             new_file = self.file_ops.get_node(name)
             if new_file:
                 self._ensure_node_permissions(new_file)
-            print(f"Created file: {name}")
+            self.out.message(f"Created file: {name}")
             self._save_state()  # Save state after modification
         except Exception as e:
-            print(f"Error: {str(e)}")
+            self.out.error(e)
 
     """Write to a file"""
     def write(self, name, content):
@@ -126,10 +175,10 @@ class FileSystemCLI:
             if target:
                 self._ensure_node_permissions(target)
             self.file_ops.write(name, content)
-            print(f"Wrote to file: {name}")
+            self.out.message(f"Wrote to file: {name}")
             self._save_state()  # Save state after modification
         except Exception as e:
-            print(f"Error: {str(e)}")
+            self.out.error(e)
 
     """Read from a file"""
     def read(self, name):
@@ -139,31 +188,42 @@ class FileSystemCLI:
             if target:
                 self._ensure_node_permissions(target)
             content = self.file_ops.read(name)
+            if self.out.jsonl:
+                node = self.file_ops._check_node_exists(name)
+                record = node_record(node_path(node), node, self.perm_manager.node_perms.list_permissions(node))
+                record["content"] = content
+                self.out.record(record)
+                return
             print(f"Content of {name}:")
             print(content)
         except Exception as e:
-            print(f"Error: {str(e)}")
+            self.out.error(e)
 
     """Move a file or directory"""
     def move(self, args):
         if len(args) != 2:
-            print("Usage: fs move <source> <destination>")
+            self.out.message("Usage: fs move <source> <destination>")
             return
         
         source, destination = args
         try:
             is_dir_move, dest_name = self.node_ops.move(source, destination)
             if is_dir_move:
-                print(f"Moved {source} to {dest_name}/")
+                self.out.message(f"Moved {source} to {dest_name}/")
             else:
-                print(f"Moved {source} to {dest_name}")
+                self.out.message(f"Moved {source} to {dest_name}")
         except Exception as e:
-            print(f"Error: {str(e)}")
+            self.out.error(e)
 
     """Find files/directories by pattern (supports glob patterns like *.txt)"""
     def find(self, pattern):
         try:
             self._ensure_node_permissions(self.local.cwd)
+            if self.out.jsonl:
+                matches = self.file_ops.iter_find(pattern, self.local.cwd)
+                self.out.records(node_record(path, node, acl)
+                                 for path, node, acl in self.perm_manager.iter_permissions(matches))
+                return
             results = self.file_ops._find_recursive(self.local.cwd, pattern)
             if results:
                 print(f"Found matches for pattern '{pattern}' at:")
@@ -172,12 +232,305 @@ class FileSystemCLI:
             else:
                 print(f"No items found matching pattern: {pattern}")
         except Exception as e:
-            print(f"Error: {str(e)}")
+            self.out.error(e)
+
+    """Apply operations read one per line, with a single state save. With atomic=True the
+    lines run as one transaction and may also use 'mkdir <path>' and
+    'set-perms <path> <user> <read> <write>'."""
+    def batch(self, lines, atomic=False):
+        import shlex
+        try:
+            operations = []
+            for lineno, line in enumerate(lines, 1):
+                parts = shlex.split(line, comments=True)
+                if not parts:
+                    continue
+                if parts[0] == "touch" and len(parts) == 2:
+                    operations.append(("touch", parts[1]))
+                elif parts[0] == "write" and len(parts) == 3:
+                    operations.append(("write", parts[1], parts[2]))
+                elif atomic and parts[0] == "mkdir" and len(parts) == 2:
+                    operations.append(("mkdir", parts[1]))
+                elif atomic and parts[0] == "set-perms" and len(parts) == 5:
+                    operations.append(("set-perms", parts[1], parts[2],
+                                       parts[3].lower() == "true", parts[4].lower() == "true"))
+                else:
+                    raise ValueError(f"line {lineno}: unsupported batch operation '{line.strip()}'")
+
+            if atomic:
+                from src.fs_operations.transactions import run_transaction
+
+                def run(transaction):
+                    for op in operations:
+                        if op[0] == "mkdir":
+                            transaction.mkdir(op[1], parents=True)
+                        elif op[0] == "set-perms":
+                            transaction.set_permissions(*op[1:])
+                        else:
+                            getattr(transaction, op[0])(*op[1:])
+                run_transaction(self.local, self.perm_manager, run, on_commit=self._save_state)
+                applied = len(operations)
+            else:
+                applied = self.file_ops.apply_batch(operations)
+                self._save_state()
+            self.out.message(f"Applied {applied} operations")
+        except Exception as e:
+            self.out.error(e)
+
+    """Copy a host directory tree into the filesystem as fs_path, saving once, and report throughput"""
+    def import_tree(self, host_dir, fs_path, workers=None):
+        from src.fs_operations.host_import import HostImporter
+        try:
+            stats = HostImporter(self.local, self.perm_manager, workers).import_tree(host_dir, fs_path)
+            self._save_state()
+            self.out.message(f"Imported {stats.files} files, {stats.directories} directories "
+                             f"({stats.bytes / 2**20:.1f} MB) in {stats.seconds:.2f}s: "
+                             f"{stats.files_per_sec:.0f} files/sec, {stats.mb_per_sec:.1f} MB/sec")
+        except Exception as e:
+            self.out.error(e)
+
+    """Stream a subtree as a tar archive to a file, or to stdout for '-'"""
+    def export_tar(self, path, filename="-", compress=False):
+        from src.fs_operations.tar_archive import TarArchiver
+        try:
+            archiver = TarArchiver(self.local, self.perm_manager)
+            if filename == "-":
+                stream = self._binary_stream(sys.stdout, "export-tar")
+                archiver.export_tar(path, stream, compress)
+                stream.flush()
+                return
+            with open(filename, "wb") as f:
+                count = archiver.export_tar(path, f, compress)
+            self.out.message(f"Exported {count} entries to {filename}")
+        except Exception as e:
+            self.out.error(e)
+
+    """Unpack a tar archive from a file, or from stdin for '-', into a directory, saving once"""
+    def import_tar(self, path=".", filename="-", stdin=None):
+        from src.fs_operations.tar_archive import TarArchiver
+        try:
+            archiver = TarArchiver(self.local, self.perm_manager)
+            if filename == "-":
+                stats = archiver.import_tar(self._binary_stream(stdin or sys.stdin, "import-tar"), path)
+            else:
+                with open(filename, "rb") as f:
+                    stats = archiver.import_tar(f, path)
+            self._save_state()
+            self.out.message(f"Imported {stats.files} files, {stats.directories} directories "
+                             f"({stats.bytes / 2**20:.1f} MB) in {stats.seconds:.2f}s")
+        except Exception as e:
+            self.out.error(e)
+
+    """The byte stream under a text stdin/stdout. Streams captured by fs-server or a test
+    have none, so archives then have to go through --file."""
+    def _binary_stream(self, stream, command):
+        buffer = getattr(stream, "buffer", None)
+        if buffer is None:
+            raise Exception(f"{command} cannot use stdin/stdout here, use --file")
+        return buffer
+
+    """Show the operation statistics recorded by this process (fs-server --stats, or
+    INMEMORY_FS_STATS=1 for a shell), optionally clearing them afterwards"""
+    def stats(self, reset=False):
+        from src.utils import metrics
+        try:
+            summary = metrics.snapshot()
+            if self.out.jsonl:
+                self.out.records({"operation": name, **stats} for name, stats in summary.items())
+            elif summary:
+                print(f"{'operation':<36}{'count':>8}{'errors':>8}{'mean':>10}{'p50':>10}"
+                      f"{'p90':>10}{'p99':>10}{'max':>10}  (us)")
+                for name, stats in summary.items():
+                    print(f"{name:<36}{stats['count']:>8}{stats['errors']:>8}{stats['mean_us']:>10.1f}"
+                          f"{stats['p50_us']:>10.1f}{stats['p90_us']:>10.1f}{stats['p99_us']:>10.1f}"
+                          f"{stats['max_us']:>10.1f}")
+            elif not metrics.enabled:
+                print(f"Statistics are disabled (start fs-server --stats or set {metrics.STATS_ENV}=1)")
+            else:
+                print("No operations recorded")
+            if reset:
+                metrics.reset()
+        except Exception as e:
+            self.out.error(e)
+
+    """Show the top directories by lock wait time, with their per-site breakdown
+    (fs-server --lock-stats, or INMEMORY_FS_LOCK_STATS=1 for a shell)"""
+    def locks(self, top=10, reset=False):
+        from src.utils import locks
+        try:
+            report = locks.lock_report(top)
+            if self.out.jsonl:
+                self.out.records(report)
+            elif report:
+                print(f"{'directory / site':<40}{'taken':>9}{'waited':>8}{'wait ms':>10}"
+                      f"{'max wait':>10}{'hold ms':>10}{'max hold':>10}")
+                for entry in report:
+                    rows = [(entry["path"], entry)] + [(f"  {site}", stats) for site, stats in entry["sites"].items()]
+                    for label, stats in rows:
+                        print(f"{label:<40}{stats['acquisitions']:>9}{stats['contended']:>8}"
+                              f"{stats['wait_ms']:>10.2f}{stats['max_wait_ms']:>10.2f}"
+                              f"{stats['hold_ms']:>10.2f}{stats['max_hold_ms']:>10.2f}")
+            elif not locks.lock_stats_enabled():
+                print(f"Lock statistics are disabled (start fs-server --lock-stats or set {locks.LOCK_STATS_ENV}=1)")
+            else:
+                print("No lock activity recorded")
+            if reset:
+                locks.reset_lock_stats()
+        except Exception as e:
+            self.out.error(e)
+
+    """Show the memory held by the subtree at path: bytes per category, the largest
+    subdirectories and owners, and with operations the traced memory growth per
+    operation (fs-server --trace-memory, or INMEMORY_FS_STATS=alloc for a shell)"""
+    def mem(self, path=".", sample=1.0, top=10, operations=False):
+        from src.utils import memory, metrics
+        try:
+            node = self.node_ops._resolve_path(path)
+            if node is None:
+                raise Exception(f"'{path}' not found")
+            self.perm_manager.check_permission(node, "read")
+            usage = memory.memory_usage(node, sample, top, readable=self.perm_manager.filter_readable)
+            allocations = {name: stats["alloc_bytes"] for name, stats in metrics.snapshot().items()
+                           if "alloc_bytes" in stats} if operations else {}
+            if self.out.jsonl:
+                self.out.record({**usage, "operations": allocations} if operations else usage)
+                return
+            estimate = f", {usage['sampled']:.0%} sampled" if sample < 1 else ""
+            print(f"{usage['path']}: {usage['files']} files, {usage['directories']} directories{estimate}")
+            for category in (*memory.CATEGORIES, "total"):
+                print(f"  {category:<10}{usage['bytes'][category] / 2**20:>10.2f} MB")
+            for title, sizes in (("directory", usage["by_directory"]), ("owner", usage["by_owner"])):
+                if sizes:
+                    print(f"{'by ' + title:<40}{'MB':>10}")
+                    for name, size in sizes.items():
+                        print(f"  {name:<38}{size / 2**20:>10.2f}")
+            if operations:
+                if allocations:
+                    print(f"{'operation':<40}{'alloc KB':>10}")
+                    for name, growth in sorted(allocations.items(), key=lambda item: item[1], reverse=True):
+                        print(f"  {name:<38}{growth / 1024:>10.1f}")
+                else:
+                    print(f"No allocations recorded (start fs-server --trace-memory or set {metrics.STATS_ENV}=alloc)")
+        except Exception as e:
+            self.out.error(e)
 
-def main():
+    """Run fs commands (and 'perms ...' commands) read one per line against state loaded once.
+    Modified state is saved when checkpoint seconds have passed since the last save, on
+    'save', and on exit, instead of after every command. Reads from a prompt when the
+    stream is a terminal. `batch` and `perms import -` take the lines that follow them,
+    up to a line reading "end". Refuses to start while an fs-server is running."""
+    def shell(self, stream, checkpoint: float = 30.0):
+        from src.cli import permissions
+        from src.utils.parser_helpers import create_filesys_parser, create_permissions_parser
+        import io
+        import shlex
+
+        # Saving this copy of the state would overwrite everything the server wrote meanwhile
+        if server_running():
+            raise Exception(f"fs-server is running on {socket_path()}; run commands through it "
+                            "(fs <command>) or stop it first (fs-server --stop)")
+
+        dirty = False
+        def mark_dirty():
+            nonlocal dirty
+            dirty = True
+
+        previous, self.save_state = self.save_state, mark_dirty
+        perms = permissions.PermissionsCLI(self.local, self.perm_manager, save_state=mark_dirty)
+        last_save = time.monotonic()
+        lines = iter(self._prompt_lines() if stream.isatty() else stream)
+
+        def block():
+            # batch and `perms import -` read the lines that follow, up to "end"
+            body = []
+            for line in lines:
+                if line.strip() == "end":
+                    break
+                body.append(line if line.endswith("\n") else line + "\n")
+            return io.StringIO("".join(body))
+
+        format = self.out.format  # fs --format jsonl shell applies to every line
+        try:
+            for line in lines:
+                try:
+                    parts = shlex.split(line, comments=True)
+                except ValueError as e:
+                    self.out.error(e)
+                    continue
+                if not parts:
+                    continue
+                if parts[0] in ("exit", "quit"):
+                    break
+                if parts[0] == "save":
+                    last_save, dirty = time.monotonic(), False
+                    self._write_state()
+                    continue
+                if parts[0] == "shell":
+                    self.out.error("already in a shell")
+                    continue
+                try:
+                    if parts[0] == "perms":
+                        args = create_permissions_parser().parse_args(parts[1:])
+                        reads_block = args.command == "import" and args.file == "-"
+                        permissions.run(parts[1:], perms, block() if reads_block else None, default_format=format)
+                    else:
+                        reads_block = create_filesys_parser().parse_args(parts).command == "batch"
+                        run(parts, self, block() if reads_block else None, default_format=format)
+                except SystemExit:
+                    pass  # argparse already printed the usage error
+                if dirty and checkpoint and time.monotonic() - last_save >= checkpoint:
+                    last_save, dirty = time.monotonic(), False
+                    self._write_state()
+        except KeyboardInterrupt:
+            print()
+        finally:
+            self.save_state = previous
+            if dirty:
+                self._write_state()
+
+    def _prompt_lines(self):
+        while True:
+            try:
+                yield input(f"fs:{self.dir_ops.pwd()}$ ")
+            except EOFError:
+                print()
+                return
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv == ["pwd"]:
+        # The cwd comes from the state sidecar (or the server), so skip the parser
+        if not forward("fs", argv):
+            with profiled("fs pwd"):
+                FileSystemCLI().pwd()
+        return
+    from src.utils.parser_helpers import create_filesys_parser
+    # Hand the command to a running fs-server, or run it in this process.
+    # A shell keeps its own copy of the state, so it always runs here (and
+    # refuses to start while a server is running).
+    # batch reads its operations from stdin, which is sent along, and import
+    # names a host directory relative to this process. Tar archives are binary and
+    # cannot travel over the socket, so with a server they go through --file.
+    # A --profile file is written by the process running the command, so it is made absolute too.
+    if {"import", "export-tar", "import-tar"} & set(argv):
+        args = create_filesys_parser().parse_args(argv)
+        value = args.host_dir if args.command == "import" else getattr(args, "file", None)
+        if value and value != "-":
+            argv = with_absolute_path(argv, value)
+    if any(arg == "--profile" or arg.startswith("--profile=") for arg in argv):
+        argv = with_absolute_path(argv, create_filesys_parser().parse_args(argv).profile)
+    if (argv and argv[0] == "shell") or not forward("fs", argv, bool(argv) and argv[0] == "batch"):
+        run(argv)
+
+"""Parse and execute one fs command against cli (default: a CLI over the saved state).
+default_format applies when the command line has no --format."""
+def run(argv, cli: FileSystemCLI = None, stdin=None, default_format: str = "text"):
+    from src.utils.parser_helpers import create_filesys_parser
     parser = create_filesys_parser()
-    args = parser.parse_args()
-    fs = FileSystemCLI()
+    args = parser.parse_args(argv)
+    fs = cli or FileSystemCLI()
+    fs.out = Output(args.format or default_format)
+    stdin = sys.stdin if stdin is None else stdin
 
     # Command mapping
     commands = {
@@ -190,21 +543,30 @@ def main():
         'write': lambda: fs.write(args.name, args.content),
         'read': lambda: fs.read(args.name),
         'move': lambda: fs.move(args.source, args.destination),
-        'find': lambda: fs.find(args.pattern)
+        'find': lambda: fs.find(args.pattern),
+        'batch': lambda: fs.batch(stdin, args.atomic),
+        'import': lambda: fs.import_tree(args.host_dir, args.fs_path, args.workers),
+        'stats': lambda: fs.stats(args.reset),
+        'locks': lambda: fs.locks(args.top, args.reset),
+        'mem': lambda: fs.mem(args.path, args.sample, args.top, args.operations),
+        'export-tar': lambda: fs.export_tar(args.path, args.file, args.gzip),
+        'import-tar': lambda: fs.import_tar(args.path, args.file, stdin),
+        'shell': lambda: fs.shell(stdin, args.checkpoint)
     }
 
     # Execute command
     if args.command:
-        try:
-            commands[args.command]()
-        except AttributeError:
-            print(f"Error: Missing required argument(s) for {args.command}")
-            return
-        except Exception as e:
-            print(f"Error: {str(e)}")
-            return
+        with profiled(f"fs {args.command}", args.profile, args.trace_alloc, use_environment=args.command != 'shell'):
+            try:
+                commands[args.command]()
+            except AttributeError:
+                fs.out.error(f"Missing required argument(s) for {args.command}")
+                return
+            except Exception as e:
+                fs.out.error(e)
+                return
     else:
         parser.print_help()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,82 @@
+"""Output of the fs and perms CLIs: human-readable text or JSON Lines records.
+
+In jsonl mode every result is one JSON object per line. Node records carry
+path, type, size, owner, mtime and permissions (the node's effective ACL, as
+list-perms reports it, mapping user -> "rw" / "r-" / "-w" / "--"). Status messages become {"message": ...}
+and failures {"error": ...}. Records are written as they are produced, in
+chunks, so large listings never build their whole output in memory.
+"""
+import sys
+
+# Indexed by Permission.bits (PERM_READ = 1, PERM_WRITE = 2)
+_MODES = ("--", "r-", "-w", "rw")
+
+_encode = None  # JSONEncoder.encode, built on first use so text output never imports json
+
+def _encoder():
+    global _encode
+    if _encode is None:
+        import json
+        _encode = json.JSONEncoder(ensure_ascii=False, check_circular=False, separators=(",", ":")).encode
+    return _encode
+
+def node_record(path: str, node, permissions: dict) -> dict:
+    """JSON-ready description of a node with its effective permissions (user -> Permission,
+    from PermissionManager.list_permissions/iter_permissions). size is the content length
+    of a file and the number of entries of a directory."""
+    return {
+        "path": path,
+        "type": "directory" if node.is_directory else "file",
+        "size": len(node.children) if node.is_directory else len(node.content or ""),
+        "owner": node.owner,
+        "mtime": node.modified_at.isoformat(),
+        "permissions": {user: _MODES[perm.bits] for user, perm in permissions.items()},
+    }
+
+
+class Output:
+    """Writes results in the format chosen with --format"""
+    CHUNK = 1024  # records per write in records()
+
+    def __init__(self, format: str = "text"):
+        self.format = format
+
+    @property
+    def jsonl(self) -> bool:
+        return self.format == "jsonl"
+
+    def message(self, text: str):
+        """A status line ("Created file: a.txt")"""
+        if self.jsonl:
+            self.record({"message": text})
+        else:
+            print(text)
+
+    def error(self, error):
+        if self.jsonl:
+            self.record({"error": str(error)})
+        else:
+            print(f"Error: {str(error)}")
+
+    def record(self, record: dict):
+        sys.stdout.write(_encoder()(record) + "\n")
+
+    def records(self, records) -> int:
+        """Stream records, writing every CHUNK lines; returns how many were written"""
+        stream = sys.stdout
+        encode = _encoder()
+        chunk = []
+        count = 0
+        try:
+            for record in records:
+                chunk.append(encode(record))
+                if len(chunk) == self.CHUNK:
+                    stream.write("\n".join(chunk) + "\n")
+                    count += len(chunk)
+                    chunk.clear()
+        finally:
+            # Records produced before a failure are still written
+            if chunk:
+                stream.write("\n".join(chunk) + "\n")
+                count += len(chunk)
+        return count
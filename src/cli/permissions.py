@@ -1,43 +1,74 @@
 #!/usr/bin/env python3
 
-from src.permissions.permissions_manager import PermissionManager
-from src.utils.models import FileSystemNode, Permission, LocalState
-from src.utils.parser_helpers import create_permissions_parser
-import os
-import pickle
+# Permissions and models are imported on first use, see cli/filesys.py
+from src.utils.state_manager import LazyState, save_local_state
+from src.cli.client import forward, with_absolute_path
+from src.cli.output import Output, node_record
+from src.utils.path_utils import node_path
+from src.utils.profiling import profiled
+from functools import cached_property
+import sys
+
+TYPE_CHECKING = False  # typing.TYPE_CHECKING, without importing typing at startup
+if TYPE_CHECKING:
+    from typing import Callable
+
+# Names this module used to import eagerly, still importable from here
+_LAZY_EXPORTS = {
+    "PermissionManager": "src.permissions.permissions_manager",
+    "FileSystemNode": "src.utils.models",
+    "Permission": "src.utils.models",
+    "LocalState": "src.utils.models",
+    "intern_permission": "src.utils.models",
+    "create_permissions_parser": "src.utils.parser_helpers",
+}
+
+def __getattr__(name):
+    if name in _LAZY_EXPORTS:
+        import importlib
+        return getattr(importlib.import_module(_LAZY_EXPORTS[name]), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 class PermissionsCLI:
-    def __init__(self):
-        # Load or initialize state
-        try:
-            with open(os.path.expanduser('~/.inmemory_fs_state.pkl'), 'rb') as f:
-                self.local = pickle.load(f)
-                if not self.local.cwd:
-                    root = FileSystemNode("/", owner="admin", is_directory=True)
-                    root.permissions["admin"] = Permission(owner="admin", read=True, write=True)
-                    self.local.cwd = root
-        except:
-            # Initialize root node with proper permissions
-            root = FileSystemNode("/", owner="admin", is_directory=True)
-            root.permissions["admin"] = Permission(owner="admin", read=True, write=True)
-            
-            # Initialize local state with admin privileges and root directory
-            self.local = LocalState(user="admin", cwd=root)
-        
-        # Initialize permissions manager
-        self.pm = PermissionManager(self.local.cwd, self.local)
+    """With local/perm_manager the CLI works on resident state (see cli/server.py);
+    save_state replaces the pickle write after each modification. Otherwise the
+    saved state is loaded the first time a command needs it."""
+    def __init__(self, local: 'LocalState' = None, perm_manager: 'PermissionManager' = None,
+                 save_state: 'Callable[[], None]' = None):
+        self._state = LazyState()
+        self._local = local
+        self.save_state = save_state
+        self.out = Output()
+        if perm_manager is not None:
+            self.pm = perm_manager
+
+    @property
+    def local(self) -> 'LocalState':
+        if self._local is None:
+            self._local = self._state.load()
+        return self._local
+
+    @cached_property
+    def pm(self) -> 'PermissionManager':
+        from src.permissions.permissions_manager import PermissionManager
+        return PermissionManager(self.local.cwd, self.local)
 
     def _save_state(self):
-        with open(os.path.expanduser('~/.inmemory_fs_state.pkl'), 'wb') as f:
-            pickle.dump(self.local, f)
+        if self.save_state is not None:
+            self.save_state()
+            return
+        save_local_state(self.local)
 
     """Create a file if it doesn't exist"""
     def _ensure_file_exists(self, name):
+        from src.utils.models import FileSystemNode, intern_permission
         if name not in self.local.cwd.children:
             node = FileSystemNode(name, is_directory=False, owner=self.local.user)
             node.parent = self.local.cwd
-            node.permissions[self.local.user] = Permission(owner=self.local.user, read=True, write=True)
-            self.local.cwd.children[name] = node
+            node.permissions[self.local.user] = intern_permission(owner=self.local.user, read=True, write=True)
+            self.local.acl_index.add(self.local.user, node)
+            with self.local.snapshots.mutation(self.local.cwd):
+                self.local.cwd.children[name] = node
             self._save_state()
         return self.local.cwd.children[name]
 
@@ -46,105 +77,167 @@ class PermissionsCLI:
         try:
             self.pm.set_user(username, password)
             self._save_state()
-            print(f"Created user: {username}")
+            self.out.message(f"Created user: {username}")
         except Exception as e:
-            print(f"Error: {str(e)}")
+            self.out.error(e)
 
     """Delete a user (admin only)"""
     def delete_user(self, username: str):
         try:
             self.pm.delete_user(username)
             self._save_state()
-            print(f"Deleted user: {username}")
+            self.out.message(f"Deleted user: {username}")
         except Exception as e:
-            print(f"Error: {str(e)}")
+            self.out.error(e)
 
     """Login as a user"""
     def login(self, username: str, password: str):
         try:
             self.pm.login(username, password)
             self._save_state()
-            print(f"Logged in as {username}")
+            self.out.message(f"Logged in as {username}")
         except Exception as e:
-            print(f"Error: {str(e)}")
+            self.out.error(e)
 
     """Create a new permission group (admin only)"""
     def create_group(self, groupname: str, read: bool = True, write: bool = False):
         try:
             self.pm.create_group(groupname, read, write)
             self._save_state()
-            print(f"Created group: {groupname} (read={read}, write={write})")
+            self.out.message(f"Created group: {groupname} (read={read}, write={write})")
         except Exception as e:
-            print(f"Error: {str(e)}")
+            self.out.error(e)
 
     """Delete a permission group (admin only)"""
     def delete_group(self, groupname: str):
         try:
             self.pm.delete_group(groupname)
             self._save_state()
-            print(f"Deleted group: {groupname}")
+            self.out.message(f"Deleted group: {groupname}")
         except Exception as e:
-            print(f"Error: {str(e)}")
+            self.out.error(e)
 
     """Add a user to a group (admin only)"""
     def add_to_group(self, username: str, groupname: str):
         try:
             self.pm.add_user_to_group(username, groupname)
             self._save_state()
-            print(f"Added {username} to group {groupname}")
+            self.out.message(f"Added {username} to group {groupname}")
         except Exception as e:
-            print(f"Error: {str(e)}")
+            self.out.error(e)
 
     """Remove a user from a group (admin only)"""
     def remove_from_group(self, username: str, groupname: str):
         try:
             self.pm.remove_user_from_group(username, groupname)
             self._save_state()
-            print(f"Removed {username} from group {groupname}")
+            self.out.message(f"Removed {username} from group {groupname}")
         except Exception as e:
-            print(f"Error: {str(e)}")
+            self.out.error(e)
 
     """List all permission groups"""
     def list_groups(self):
         try:
             groups = self.pm.list_groups()
+            if self.out.jsonl:
+                self.out.records({"group": name, "read": info['read'], "write": info['write'],
+                                  "members": sorted(info['members'])} for name, info in groups.items())
+                return
             for name, info in groups.items():
                 print(f"\nGroup: {name}")
                 print(f"  Read: {info['read']}")
                 print(f"  Write: {info['write']}")
                 print(f"  Members: {', '.join(info['members']) if info['members'] else 'None'}")
         except Exception as e:
-            print(f"Error: {str(e)}")
+            self.out.error(e)
 
     """Set permissions for a node (admin only)"""
-    def set_perms(self, name: str, username: str, read: str, write: str):
+    def set_perms(self, name: str, username: str, read: str, write: str, inherit: bool = False):
         try:
             node = self._ensure_file_exists(name)
             # Convert string values to boolean
             read_bool = read.lower() == 'true'
             write_bool = write.lower() == 'true'
-            self.pm.set_permissions(name, username, read_bool, write_bool)
+            self.pm.set_permissions(name, username, read_bool, write_bool, inherit)
             self._save_state()
-            print(f"Set permissions for {name}: user={username}, read={read_bool}, write={write_bool}")
+            scope = " (inherited)" if inherit else ""
+            self.out.message(f"Set permissions for {name}{scope}: user={username}, read={read_bool}, write={write_bool}")
         except Exception as e:
-            print(f"Error: {str(e)}")
+            self.out.error(e)
 
     """List permissions for a node"""
     def list_perms(self, name: str):
         try:
             node = self._ensure_file_exists(name)
             perms = self.pm.list_permissions(name)
+            if self.out.jsonl:
+                record = node_record(node_path(node), node, perms)
+                self.out.record(record)
+                return
             print(f"\nPermissions for {name}:")
             for username, perm in perms.items():
                 print(f"\nUser: {username}")
                 print(f"  read={perm.read}, write={perm.write}")
         except Exception as e:
-            print(f"Error: {str(e)}")
+            self.out.error(e)
 
-def main():
+    """Apply a CSV/JSONL file of users, groups, memberships and ACLs (admin only).
+    Every record is validated before anything changes; the state is saved once."""
+    def import_file(self, filename: str, file_format: str = None, stdin=None):
+        from src.permissions import bulk
+        try:
+            file_format = bulk.file_format_for(filename, file_format)
+            if filename == "-":
+                counts = bulk.import_records(self.pm, bulk.read_records(stdin or sys.stdin, file_format))
+            else:
+                with open(filename, newline="") as f:
+                    counts = bulk.import_records(self.pm, bulk.read_records(f, file_format))
+            self._save_state()
+            self.out.message(f"Imported {counts['user']} users, {counts['group']} groups, "
+                             f"{counts['member']} memberships, {counts['acl']} ACL entries")
+        except Exception as e:
+            self.out.error(e)
+
+    """Write users, groups, memberships and ACLs to a file, or stdout for '-' (admin only)"""
+    def export_file(self, filename: str = "-", file_format: str = None):
+        from src.permissions import bulk
+        try:
+            file_format = bulk.file_format_for(filename, file_format)
+            if filename == "-":
+                bulk.write_records(sys.stdout, bulk.export_records(self.pm), file_format)
+                return
+            with open(filename, "w", newline="") as f:
+                count = bulk.write_records(f, bulk.export_records(self.pm), file_format)
+            self.out.message(f"Exported {count} records to {filename}")
+        except Exception as e:
+            self.out.error(e)
+
+def main(argv=None):
+    from src.utils.parser_helpers import create_permissions_parser
+    argv = sys.argv[1:] if argv is None else argv
+    # Hand the command to a running fs-server, or run it in this process.
+    # import/export name files relative to this process, so the server gets
+    # absolute paths (as does a --profile file), and `import -` sends stdin along.
+    read_stdin = False
+    if "import" in argv or "export" in argv:
+        args = create_permissions_parser().parse_args(argv)
+        if args.command in ("import", "export"):
+            read_stdin = args.command == "import" and args.file == "-"
+            if args.file != "-":
+                argv = with_absolute_path(argv, args.file)
+    if any(arg == "--profile" or arg.startswith("--profile=") for arg in argv):
+        argv = with_absolute_path(argv, create_permissions_parser().parse_args(argv).profile)
+    if not forward("perms", argv, read_stdin):
+        run(argv)
+
+"""Parse and execute one perms command against cli (default: a CLI over the saved state).
+default_format applies when the command line has no --format."""
+def run(argv, cli: PermissionsCLI = None, stdin=None, default_format: str = "text"):
+    from src.utils.parser_helpers import create_permissions_parser
     parser = create_permissions_parser()
-    args = parser.parse_args()
-    cli = PermissionsCLI()
+    args = parser.parse_args(argv)
+    cli = cli or PermissionsCLI()
+    cli.out = Output(args.format or default_format)
 
     # Command mapping
     commands = {
@@ -156,20 +249,23 @@ def main():
         'add-to-group': lambda: cli.add_to_group(args.username, args.groupname),
         'remove-from-group': lambda: cli.remove_from_group(args.username, args.groupname),
         'list-groups': lambda: cli.list_groups(),
-        'set-perms': lambda: cli.set_perms(args.name, args.username, args.read, args.write),
-        'list-perms': lambda: cli.list_perms(args.name)
+        'set-perms': lambda: cli.set_perms(args.name, args.username, args.read, args.write, args.inherit),
+        'list-perms': lambda: cli.list_perms(args.name),
+        'import': lambda: cli.import_file(args.file, args.file_format, stdin),
+        'export': lambda: cli.export_file(args.file, args.file_format)
     }
 
     # Execute command
     if args.command:
-        try:
-            commands[args.command]()
-        except AttributeError:
-            print(f"Error: Missing required argument(s) for {args.command}")
-            return
-        except Exception as e:
-            print(f"Error: {str(e)}")
-            return
+        with profiled(f"perms {args.command}", args.profile, args.trace_alloc):
+            try:
+                commands[args.command]()
+            except AttributeError:
+                cli.out.error(f"Missing required argument(s) for {args.command}")
+                return
+            except Exception as e:
+                cli.out.error(e)
+                return
     else:
         parser.print_help()
 
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""fs-server: keeps the filesystem state resident and serves fs/perms commands.
+
+Clients (the fs and perms commands, see cli/client.py) send one JSON request per
+line over a Unix socket; a connection may carry any number of requests. Commands
+run one at a time against a single LocalState, exactly as they would standalone,
+but the state is pickled at most once per save interval (and on shutdown)
+instead of after every modification.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import signal
+import socketserver
+import threading
+
+from src.cli import filesys, permissions
+from src.cli.client import socket_path, request, server_running
+from src.utils.state_manager import save_local_state
+
+class FileSystemServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path: str = None, save_interval: float = 1.0):
+        self.path = path or socket_path()
+        self.save_interval = save_interval
+        self._lock = threading.Lock()  # one command (or save) at a time
+        self._dirty = False
+        self._stopped = threading.Event()
+
+        # Both CLIs share the state and one permission manager, so group changes
+        # made through perms are seen by fs
+        self.fs = filesys.FileSystemCLI(save_state=self._mark_dirty)
+        self.perms = permissions.PermissionsCLI(self.fs.local, self.fs.perm_manager, save_state=self._mark_dirty)
+        self.local = self.fs.local
+
+        _claim_socket(self.path)
+        # Created owner-only from the start: a chmod after bind leaves a window
+        # in which other users can connect
+        umask = os.umask(0o177)
+        try:
+            super().__init__(self.path, _RequestHandler)
+        finally:
+            os.umask(umask)
+
+    def _mark_dirty(self):
+        self._dirty = True
+
+    def execute(self, message: dict) -> dict:
+        """Run one request and capture everything it prints"""
+        tool, argv = message.get("tool"), message.get("argv", [])
+        output = io.StringIO()
+        status = 0
+        with self._lock, contextlib.redirect_stdout(output), contextlib.redirect_stderr(output):
+            try:
+                if not isinstance(argv, list) or not all(isinstance(arg, str) for arg in argv):
+                    # argparse would fall back to the server's own sys.argv for None
+                    print("Error: bad request: argv must be a list of strings")
+                    status = 2
+                elif tool == "fs" and argv[:1] == ["shell"]:
+                    print("Error: fs shell cannot run inside fs-server")
+                    status = 2
+                elif tool == "fs":
+                    filesys.run(argv, self.fs, io.StringIO(message.get("stdin", "")))
+                elif tool == "perms":
+                    permissions.run(argv, self.perms, io.StringIO(message.get("stdin", "")))
+                elif tool == "server" and argv == ["save"]:
+                    self._save()
+                elif tool == "server" and argv == ["stop"]:
+                    threading.Thread(target=self.stop).start()
+                else:
+                    print(f"Error: unknown request {tool} {' '.join(argv)}")
+                    status = 2
+            except SystemExit as e:
+                # argparse errors and --help
+                status = e.code if isinstance(e.code, int) else 0
+            except Exception as e:
+                # Answer instead of dropping the connection (e.g. an OSError while saving)
+                print(f"Error: {str(e)}")
+                status = 1
+        return {"output": output.getvalue(), "status": status}
+
+    def serve(self):
+        """Serve until stop() is called, saving dirty state every save_interval seconds"""
+        saver = threading.Thread(target=self._save_periodically, daemon=True)
+        saver.start()
+        try:
+            self.serve_forever(poll_interval=0.2)
+        finally:
+            self._stopped.set()
+            saver.join()
+            with self._lock:
+                self._save()
+            self.server_close()
+
+    def stop(self):
+        self.shutdown()
+
+    def server_close(self):
+        super().server_close()
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(self.path)
+
+    def _save_periodically(self):
+        while not self._stopped.wait(self.save_interval):
+            with self._lock:
+                self._save()
+
+    def _save(self):
+        if not self._dirty:
+            return
+        save_local_state(self.local)
+        self._dirty = False
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                response = self.server.execute(json.loads(line))
+            except ValueError as e:
+                response = {"output": f"Error: bad request: {e}\n", "status": 2}
+            self.wfile.write(json.dumps(response).encode() + b"\n")
+            self.wfile.flush()
+
+
+def _claim_socket(path: str):
+    """Remove a stale socket left by a server that died, refuse to replace a live one"""
+    if server_running(path):
+        raise OSError(f"fs-server is already running on {path}")
+    with contextlib.suppress(FileNotFoundError):
+        os.unlink(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Resident server for the fs and perms commands")
+    parser.add_argument('--socket', help="Socket path (default: $INMEMORY_FS_SOCKET or ~/.inmemory_fs.sock)")
+    parser.add_argument('--save-interval', type=float, default=1.0,
+                        help="Seconds between saves of modified state (default: 1.0)")
+    parser.add_argument('--stop', action='store_true', help="Save state and stop a running server")
+    parser.add_argument('--stats', action='store_true',
+                        help="Record per-operation counts and latencies, shown by `fs stats`")
+    parser.add_argument('--lock-stats', action='store_true',
+                        help="Record lock wait and hold times per directory, shown by `fs locks`")
+    parser.add_argument('--trace-memory', action='store_true',
+                        help="Record per-operation statistics with tracemalloc memory growth, shown by `fs mem --operations`")
+    args = parser.parse_args()
+
+    if args.stop:
+        try:
+            request("server", ["stop"], path=args.socket or socket_path())
+            print("fs-server stopped")
+        except OSError:
+            print("Error: fs-server is not running")
+        return
+
+    if args.lock_stats:
+        # Before the state is loaded, so every node gets an instrumented lock
+        from src.utils.locks import enable_lock_stats
+        enable_lock_stats()
+    try:
+        server = FileSystemServer(args.socket, args.save_interval)
+    except OSError as e:
+        print(f"Error: {str(e)}")
+        return
+    if args.stats or args.trace_memory:
+        from src.utils import metrics
+        metrics.enable(track_allocations=args.trace_memory)
+    signal.signal(signal.SIGTERM, lambda signum, frame: threading.Thread(target=server.stop).start())
+    print(f"fs-server listening on {server.path}")
+    try:
+        server.serve()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
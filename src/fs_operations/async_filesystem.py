@@ -0,0 +1,194 @@
+import asyncio
+import copy
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import AsyncIterator, List
+
+from src.utils.models import LocalState
+from src.permissions.permissions_manager import PermissionManager
+from src.fs_operations.file_operations import FileOperations
+
+"""
+asyncio facade over the filesystem operations.
+
+Every call runs on a bounded thread pool, so lock waits and large content copies
+never block the event loop. A semaphore caps the number of in-flight calls, and
+callers beyond that cap wait asynchronously rather than queueing unbounded work
+on the executor. Paths are absolute or relative to the shared LocalState cwd.
+"""
+class AsyncFileSystem:
+    def __init__(self, local: LocalState, perm_manager: PermissionManager = None,
+                 max_workers: int = 8, max_in_flight: int = 1024):
+        self.local = local
+        self.perm_manager = perm_manager or PermissionManager(local.root, local)
+        self.file_ops = FileOperations(local, self.perm_manager)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="inmemory-fs")
+        self._max_in_flight = max_in_flight
+        self._slots = None  # Created lazily inside the running loop
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.close()
+
+    def for_session(self, session) -> 'AsyncFileSystem':
+        """A facade acting for another session; the pool and the in-flight limit are shared"""
+        view = copy.copy(self)
+        view.local = session
+        view.file_ops = self.file_ops.for_session(session)
+        view.perm_manager = view.file_ops.perm_manager
+        view._run = self._run  # Submit through this facade's semaphore
+        return view
+
+    def close(self):
+        """Shut down the worker pool"""
+        self._executor.shutdown(wait=True)
+
+    async def _run(self, fn, *args):
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self._max_in_flight)
+        async with self._slots:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, partial(fn, *args))
+
+    """Read a file"""
+    async def read(self, path: str) -> str:
+        return await self._run(self._read, path)
+
+    """Write a file, creating it if needed"""
+    async def write(self, path: str, content: str) -> None:
+        await self._run(self.file_ops.write_many, [(path, content)])
+
+    """List a directory (default: cwd); directories get a trailing slash"""
+    async def ls(self, path: str = None) -> List[str]:
+        return await self._run(self._ls, path)
+
+    """Paths of readable nodes under path (default: cwd) matching a glob pattern"""
+    async def find(self, pattern: str, path: str = None) -> List[str]:
+        return [match async for match in self.iter_find(pattern, path)]
+
+    """Create a directory, and with parents=True any missing parents"""
+    async def mkdir(self, path: str, parents: bool = False) -> None:
+        await self._run(self._mkdir, path, parents)
+
+    """Move or rename a file or directory"""
+    async def move(self, source: str, destination: str) -> None:
+        await self._run(self._move, source, destination)
+
+    """Stream directory entries (default: cwd) as the listing produces them, chunk_size
+    entries per executor hop. Unlike ls() they come in insertion order, not sorted."""
+    async def iter_ls(self, path: str = None, chunk_size: int = 256) -> AsyncIterator[str]:
+        directory = await self._run(self._directory, path)
+        entries = self.file_ops.iter_ls(directory, chunk_size)
+        try:
+            while True:
+                chunk = await self._run(self._next_chunk, entries, chunk_size)
+                for name, node in chunk:
+                    yield f"{name}/" if node.is_directory else name
+                if len(chunk) < chunk_size:
+                    break
+        finally:
+            # Release the listing's snapshot even when the consumer stops early
+            await self._run(entries.close)
+
+    """Stream find matches as the walk produces them, chunk_size paths per executor hop"""
+    async def iter_find(self, pattern: str, path: str = None, chunk_size: int = 256) -> AsyncIterator[str]:
+        start = await self._run(self._directory, path)
+        matches = self.file_ops.iter_find(pattern, start)
+        try:
+            while True:
+                chunk = await self._run(self._next_chunk, matches, chunk_size)
+                for path, _ in chunk:
+                    yield path
+                if len(chunk) < chunk_size:
+                    break
+        finally:
+            # Release the walk's snapshot even when the consumer stops early
+            await self._run(matches.close)
+
+    @staticmethod
+    def _next_chunk(items, size: int) -> list:
+        return list(itertools.islice(items, size))
+
+    def _node(self, path: str):
+        node = self.file_ops._resolve_path(path)
+        if node is None:
+            raise Exception(f"'{path}' not found")
+        return node
+
+    def _directory(self, path: str = None):
+        node = self.local.cwd if path is None else self._node(path)
+        if not node.is_directory:
+            raise Exception(f"'{path}' is not a directory")
+        return node
+
+    def _read(self, path: str) -> str:
+        node = self._node(path)
+        if node.is_directory:
+            raise Exception(f"'{path}' is not a file")
+        self.perm_manager.check_permission(node, "read")
+        with node.lock.read("async.read"):
+            return node.content
+
+    def _ls(self, path: str = None) -> List[str]:
+        directory = self._directory(path)
+        with directory.lock.read("async.ls"):
+            self.perm_manager.check_permission(directory, "read")
+            children = list(directory.children.values())
+        readable = self.perm_manager.filter_readable(children)
+        return sorted(f"{node.name}/" if node.is_directory else node.name for node in readable)
+
+    def _mkdir(self, path: str, parents: bool = False):
+        if parents:
+            current = self.local.root if path.startswith("/") else self.local.cwd
+            for part in [p for p in path.strip("/").split("/") if p]:
+                child = current.children.get(part)
+                if child is None:
+                    child = self._create_dir(current, part)
+                elif not child.is_directory:
+                    raise Exception(f"'{part}' is not a directory")
+                current = child
+        else:
+            parent, name = self.file_ops._resolve_parent(path)
+            self._create_dir(parent, name)
+
+    def _create_dir(self, parent, name: str):
+        with parent.lock.write("async.mkdir"):
+            self.perm_manager.check_permission(parent, "write")
+            if name in parent.children:
+                raise Exception(f"'{name}' already exists")
+            node = self.file_ops._new_node(name, is_directory=True)
+            node.parent = parent
+            with self.local.snapshots.mutation(parent):
+                parent.children[name] = node
+            return node
+
+    def _move(self, source: str, destination: str):
+        src_parent, src_name = self.file_ops._resolve_parent(source)
+        if destination.endswith("/"):
+            dst_parent, dst_name = self._directory(destination.rstrip("/") or "/"), src_name
+        else:
+            dst_parent, dst_name = self.file_ops._resolve_parent(destination)
+
+        # Locked shallower directory first, the parent->child order used elsewhere
+        parents = (src_parent, dst_parent)
+        with self.file_ops._write_locked(parents, "async.move"):
+            node = src_parent.children.get(src_name)
+            if node is None:
+                raise Exception(f"'{source}' not found")
+            if dst_name in dst_parent.children:
+                raise Exception(f"'{destination}' already exists")
+            ancestor = dst_parent
+            while ancestor is not None:
+                if ancestor is node:
+                    raise Exception("Cannot move a directory into itself")
+                ancestor = ancestor.parent
+            for parent in parents:
+                self.perm_manager.check_permission(parent, "write")
+            with self.local.snapshots.mutation(src_parent), self.local.snapshots.mutation(dst_parent):
+                src_parent.remove_child(src_name)
+                node.name = dst_name
+                dst_parent.add_child(node)
+            self.local.invalidate_permissions()
@@ -1,23 +1,26 @@
 from src.fs_operations.node_operations import NodeOperations
 from src.utils.models import FileSystemNode, LocalState
+from src.utils import node_path
 from src.permissions.permissions_manager import PermissionManager
+from src.utils.metrics import instrumented
 from typing import List
 
 """
 All directory operations supported by the filesystem
 """
+@instrumented
 class DirectoryOperations(NodeOperations):
     def __init__(self, local: LocalState, perm_manager: PermissionManager = None):
         super().__init__(local, perm_manager)
 
     """Get the current working directory"""
     def pwd(self):
-        return super()._get_path(self.local.cwd)
+        return node_path(self.local.cwd)
 
     """List the contents of the current directory"""
     def ls(self) -> List[str]:
         cwd = self.local.cwd
-        with cwd.lock:
+        with cwd.lock.read("ls"):
             if not cwd.is_directory:
                 raise Exception("Current node is not a directory")
             
@@ -28,9 +31,10 @@ class DirectoryOperations(NodeOperations):
                 if not cwd.children:
                     return []
                 
-                # Get list of children
+                # Get list of readable children
                 items = []
-                for name, node in cwd.children.items():
+                for node in self.perm_manager.filter_readable(cwd.children.values()):
+                    name = node.name
                     # Add trailing slash for directories
                     if node.is_directory:
                         items.append(f"{name}/")
@@ -67,9 +71,8 @@ class DirectoryOperations(NodeOperations):
             # Create each directory in the path
             for part in parts[:-1]:
                 if part not in current.children:
-                    node = FileSystemNode(part, owner=self.local.user, is_directory=True)
-                    node.permissions[self.local.user] = Permission(owner=self.local.user, read=True, write=True)
-                    current.add_child(node)
+                    with self.local.snapshots.mutation(current):
+                        current.add_child(self._new_node(part, is_directory=True))
                 current = current.children[part]
             
             # Create the final directory
@@ -83,14 +86,16 @@ class DirectoryOperations(NodeOperations):
     """Remove a directory"""
     def rmdir(self, name):
         cwd = self.local.cwd
-        with cwd.lock:
+        with cwd.lock.write("rmdir"):
             self.perm_manager.check_permission(cwd, "write")
             node = self._check_node_exists(name)
             if not node.is_directory:
                 raise Exception(f"'{name}' is not a directory")
             if node.children:
                 raise Exception("Directory is not empty")
-            cwd.remove_child(name)
+            with self.local.snapshots.mutation(cwd):
+                cwd.remove_child(name)
+            self.local.acl_index.discard_subtree(node)
 
     """Move a directory"""
     def move(self, name, new_name):
@@ -115,28 +120,7 @@ class DirectoryOperations(NodeOperations):
         self.local.cwd = target
         
         # Print the new path
-        print(f"Changed directory to: {self._get_path(target)}")
-
-    """Resolve a path"""
-    def _resolve_path(self, path):
-        if not path or path == "/":
-            return self.root
-        parts = path.strip("/").split("/")
-        current = self.root if path.startswith("/") else self.local.cwd
-        for part in parts:
-            if part == "..":
-                if current.parent:
-                    current = current.parent
-                elif current == self.root:
-                    continue
-            elif part == "." or part == "":
-                continue
-            else:
-                with current.lock:
-                    if part not in current.children:
-                        return None
-                    current = current.children[part]
-        return current
+        print(f"Changed directory to: {node_path(target)}")
 
     def create_directory(self, path: str) -> None:
         """Create a new directory at the specified path"""
@@ -163,11 +147,14 @@ class DirectoryOperations(NodeOperations):
         parent = self.get_node(parent_path)
         name = self.get_basename(path)
         
-        if name in parent.children:
-            raise ValueError(f"Directory {name} already exists")
-            
-        node = FileSystemNode(name, is_directory=True)
-        parent.children[name] = node
+        with parent.lock.write("create_directory"):
+            if name in parent.children:
+                raise ValueError(f"Directory {name} already exists")
+
+            node = FileSystemNode(name, is_directory=True)
+            node.parent = parent
+            with self.local.snapshots.mutation(parent):
+                parent.children[name] = node
 
     def list_directory(self, path: str) -> dict:
         """List contents of a directory"""
@@ -185,17 +172,20 @@ class DirectoryOperations(NodeOperations):
         parent = self.get_node(parent_path)
         
         name = self.get_basename(path)
-        if name not in parent.children:
-            raise ValueError(f"Directory {name} not found")
-            
-        node = parent.children[name]
-        if not node.is_directory:
-            raise ValueError("Cannot delete file as directory")
-            
-        if not recursive and node.children:
-            raise ValueError("Directory not empty")
-            
-        del parent.children[name]
+        with parent.lock.write("delete"):
+            if name not in parent.children:
+                raise ValueError(f"Directory {name} not found")
+
+            node = parent.children[name]
+            if not node.is_directory:
+                raise ValueError("Cannot delete file as directory")
+
+            if not recursive and node.children:
+                raise ValueError("Directory not empty")
+
+            with self.local.snapshots.mutation(parent):
+                del parent.children[name]
+        self.local.acl_index.discard_subtree(node)
 
     def move_directory(self, src_path: str, dst_path: str) -> None:
         """Move a directory from src_path to dst_path"""
@@ -206,30 +196,34 @@ class DirectoryOperations(NodeOperations):
         src_parent_path = self.get_parent_path(src_path)
         src_parent = self.get_node(src_parent_path)
         src_name = self.get_basename(src_path)
-        
-        if src_name not in src_parent.children:
-            raise ValueError(f"Source directory {src_name} not found")
-            
-        src_node = src_parent.children[src_name]
-        if not src_node.is_directory:
-            raise ValueError("Cannot move file as directory")
-            
+
         # Get destination
         dst_parent_path = self.get_parent_path(dst_path)
         dst_parent = self.get_node(dst_parent_path)
         dst_name = self.get_basename(dst_path)
-        
-        if dst_name in dst_parent.children:
-            raise ValueError(f"Destination directory {dst_name} already exists")
-            
-        # Check if destination is subdirectory of source
-        current = dst_parent
-        while current != self.root:
-            if current == src_node:
-                raise ValueError("Cannot move directory to its subdirectory")
-            current = self.get_node(self.get_parent_path(current.name))
-            
-        # Move directory
-        dst_parent.children[dst_name] = src_node
-        src_node.name = dst_name
-        del src_parent.children[src_name] 
\ No newline at end of file
+
+        with self._write_locked((src_parent, dst_parent), "move"):
+            if src_name not in src_parent.children:
+                raise ValueError(f"Source directory {src_name} not found")
+
+            src_node = src_parent.children[src_name]
+            if not src_node.is_directory:
+                raise ValueError("Cannot move file as directory")
+
+            if dst_name in dst_parent.children:
+                raise ValueError(f"Destination directory {dst_name} already exists")
+
+            # Check if destination is subdirectory of source
+            current = dst_parent
+            while current is not None:
+                if current is src_node:
+                    raise ValueError("Cannot move directory to its subdirectory")
+                current = current.parent
+
+            # Move directory
+            with self.local.snapshots.mutation(dst_parent), self.local.snapshots.mutation(src_parent):
+                dst_parent.children[dst_name] = src_node
+                src_node.name = dst_name
+                src_node.parent = dst_parent
+                del src_parent.children[src_name]
+        self.local.invalidate_permissions() 
\ No newline at end of file
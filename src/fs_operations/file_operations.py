@@ -1,10 +1,12 @@
 from src.fs_operations.node_operations import NodeOperations
 from src.utils.models import FileSystemNode, LocalState
 from src.permissions.permissions_manager import PermissionManager
+from src.utils.metrics import instrumented
 
 """
 All file operations supported by the filesystem
 """
+@instrumented
 class FileOperations(NodeOperations):
     def __init__(self, local: LocalState, perm_manager: PermissionManager = None):
         super().__init__(local, perm_manager)
@@ -16,25 +18,77 @@ class FileOperations(NodeOperations):
     """Write to a file"""
     def write(self, name, content):
         cwd = self.local.cwd
-        with cwd.lock:
+        with cwd.lock.write("write"):
             file = self._check_node_exists(name)
             self.perm_manager.check_permission(file, "write")
             if file.is_directory:
                 raise Exception(f"'{name}' is not a file")
-            with file.lock:
+            with file.lock.write("write"), self.local.snapshots.mutation(file):
                 file.content = content
 
     """Read a file"""
     def read(self, name):
         cwd = self.local.cwd
-        with cwd.lock:
+        with cwd.lock.read("read"):
             file = self._check_node_exists(name)
             self.perm_manager.check_permission(file, "read")
             if file.is_directory:
                 raise Exception(f"'{name}' is not a file")
-            with file.lock:
+            with file.lock.read("read"):
                 return file.content
 
+    """Write several files in one pass; entries are (path, content) pairs"""
+    def write_many(self, entries) -> int:
+        return self.apply_batch(("write", path, content) for path, content in entries)
+
+    """Apply a batch of ("touch", path) / ("write", path, content) operations.
+    Entries are grouped by parent directory so each directory is resolved and
+    permission-checked once. All parents are locked together and every group is
+    validated before any entry is applied, so a failing batch changes nothing."""
+    def apply_batch(self, operations) -> int:
+        groups = {}
+        for op in operations:
+            action, path = op[0], op[1]
+            if action not in ("touch", "write"):
+                raise ValueError(f"Unsupported batch operation '{action}'")
+            if action == "write" and len(op) < 3:
+                raise ValueError(f"write '{path}' has no content")
+            parent, name = self._resolve_parent(path)
+            content = op[2] if len(op) > 2 else None
+            groups.setdefault(id(parent), (parent, []))[1].append((action, name, content))
+
+        applied = 0
+        with self._write_locked([parent for parent, _ in groups.values()], "batch"):
+            # Validate the whole batch before touching the tree
+            for parent, items in groups.values():
+                checked = set()
+                dir_checked = False
+                for action, name, content in items:
+                    node = parent.children.get(name)
+                    if node is None:
+                        if not dir_checked:
+                            self.perm_manager.check_permission(parent, "write")
+                            dir_checked = True
+                    elif node.is_directory:
+                        raise Exception(f"'{name}' is not a file")
+                    elif action == "write" and id(node) not in checked:
+                        self.perm_manager.check_permission(node, "write")
+                        checked.add(id(node))
+
+            for parent, items in groups.values():
+                for action, name, content in items:
+                    node = parent.children.get(name)
+                    if node is None:
+                        node = self._new_node(name, is_directory=False)
+                        node.parent = parent
+                        with self.local.snapshots.mutation(parent):
+                            parent.children[name] = node
+                    if action == "write":
+                        with node.lock.write("batch"), self.local.snapshots.mutation(node):
+                            node.content = content
+                    applied += 1
+        return applied
+
     """Move a file"""
     def move(self, name, new_name):
         return super().move(name, new_name)
@@ -52,12 +106,15 @@ class FileOperations(NodeOperations):
             raise ValueError("Parent must be a directory")
             
         name = self.get_basename(path)
-        if name in parent.children:
-            raise ValueError(f"File {name} already exists")
-            
-        node = FileSystemNode(name, is_directory=False)
-        node.content = content
-        parent.children[name] = node
+        with parent.lock.write("create"):
+            if name in parent.children:
+                raise ValueError(f"File {name} already exists")
+
+            node = FileSystemNode(name, is_directory=False)
+            node.content = content
+            node.parent = parent
+            with self.local.snapshots.mutation(parent):
+                parent.children[name] = node
 
     """Read the contents of a file"""
     def read_file(self, path: str) -> str:
@@ -72,7 +129,9 @@ class FileOperations(NodeOperations):
             node = self.get_node(path)
             if node.is_directory:
                 raise ValueError("Cannot write to directory")
-            node.content = content
+            # Parent then file, as write() locks them
+            with node.parent.lock.write("write"), node.lock.write("write"), self.local.snapshots.mutation(node):
+                node.content = content
         except Exception:
             self.create_file(path, content)
 
@@ -82,38 +141,45 @@ class FileOperations(NodeOperations):
         parent = self.get_node(parent_path)
         
         name = self.get_basename(path)
-        if name not in parent.children:
-            raise ValueError(f"File {name} not found")
-            
-        node = parent.children[name]
-        if node.is_directory:
-            raise ValueError("Cannot delete directory as file")
-            
-        del parent.children[name]
+        with parent.lock.write("delete"):
+            if name not in parent.children:
+                raise ValueError(f"File {name} not found")
+
+            node = parent.children[name]
+            if node.is_directory:
+                raise ValueError("Cannot delete directory as file")
+
+            with self.local.snapshots.mutation(parent):
+                del parent.children[name]
+        self.local.acl_index.discard_subtree(node)
 
     """Move a file from src_path to dst_path"""
     def move_file(self, src_path: str, dst_path: str) -> None:
         src_parent_path = self.get_parent_path(src_path)
         src_parent = self.get_node(src_parent_path)
         src_name = self.get_basename(src_path)
-        
-        if src_name not in src_parent.children:
-            raise ValueError(f"Source file {src_name} not found")
-            
-        src_node = src_parent.children[src_name]
-        if src_node.is_directory:
-            raise ValueError("Cannot move directory as file")
-            
+
         # Get destination
         dst_parent_path = self.get_parent_path(dst_path)
         dst_parent = self.get_node(dst_parent_path)
         dst_name = self.get_basename(dst_path)
-        
-        if dst_name in dst_parent.children:
-            raise ValueError(f"Destination file {dst_name} already exists")
-            
-        # Move file
-        dst_parent.children[dst_name] = src_node
-        src_node.name = dst_name
-        del src_parent.children[src_name]
+
+        with self._write_locked((src_parent, dst_parent), "move"):
+            if src_name not in src_parent.children:
+                raise ValueError(f"Source file {src_name} not found")
+
+            src_node = src_parent.children[src_name]
+            if src_node.is_directory:
+                raise ValueError("Cannot move directory as file")
+
+            if dst_name in dst_parent.children:
+                raise ValueError(f"Destination file {dst_name} already exists")
+
+            # Move file
+            with self.local.snapshots.mutation(dst_parent), self.local.snapshots.mutation(src_parent):
+                dst_parent.children[dst_name] = src_node
+                src_node.name = dst_name
+                src_node.parent = dst_parent
+                del src_parent.children[src_name]
+        self.local.invalidate_permissions()
         
\ No newline at end of file
@@ -1,38 +1,37 @@
 from src.utils.models import FileSystemNode, Permission, LocalState
-from src.utils import split_path, normalize_path, get_parent_path, get_basename
+from src.utils import split_path, normalize_path, get_parent_path, get_basename, node_depth, node_path
 from src.permissions.permissions_manager import PermissionManager
+from src.utils.metrics import instrumented, not_instrumented
+import contextlib
+import copy
 import fnmatch
-from typing import List
+import itertools
+from typing import Iterator, List, Tuple
 import os
 
 """
 All operations supported by the filesystem (applies to both files and directories)
 """
+@instrumented
 class NodeOperations:
     def __init__(self, local: LocalState, perm_manager: PermissionManager = None):
         self.local = local
         self.root = local.root
         self.perm_manager = perm_manager
 
-    """Get the path of a node"""
-    def _get_path(self, node):
-        if not node:
-            return "/"
-        if node == self.root:
-            return "/"
-        path = []
-        current = node
-        while current and current != self.root:
-            path.append(current.name)
-            current = current.parent
-        if not path:
-            return "/"
-        return "/" + "/".join(reversed(path))
+    """The same operations acting for another session over the shared tree"""
+    @not_instrumented
+    def for_session(self, session) -> 'NodeOperations':
+        view = copy.copy(self)
+        view.local = session
+        if self.perm_manager is not None:
+            view.perm_manager = self.perm_manager.for_session(session)
+        return view
 
     """Move a node (file or directory)"""
     def move(self, name, new_name):
         cwd = self.local.cwd
-        with cwd.lock:
+        with cwd.lock.write("move"):
             # Check write permission on current directory
             self.perm_manager.check_permission(cwd, "write")
             
@@ -53,20 +52,26 @@ class NodeOperations:
                 if not dest_dir.is_directory:
                     raise Exception(f"'{dest_dir_name}' is not a directory")
                 
-                # Check write permission on destination directory
-                self.perm_manager.check_permission(dest_dir, "write")
-                
-                # Move node to destination directory
-                node = cwd.remove_child(name)
-                dest_dir.add_child(node)
+                # dest_dir's children change too, so hold both (cwd's write lock is reentrant)
+                with self._write_locked((cwd, dest_dir), "move"):
+                    # Check write permission on destination directory
+                    self.perm_manager.check_permission(dest_dir, "write")
+
+                    # Move node to destination directory
+                    with self.local.snapshots.mutation(cwd), self.local.snapshots.mutation(dest_dir):
+                        node = cwd.remove_child(name)
+                        dest_dir.add_child(node)
+                # Inherited ACLs follow the new parent chain
+                self.local.invalidate_permissions()
                 return True, dest_dir_name  # Return success and destination info
             else:
                 # Regular move/rename
                 if new_name in cwd.children:
                     raise Exception(f"'{new_name}' already exists")
-                node = cwd.remove_child(name)
-                node.name = new_name
-                cwd.add_child(node)
+                with self.local.snapshots.mutation(cwd):
+                    node = cwd.remove_child(name)
+                    node.name = new_name
+                    cwd.add_child(node)
                 return False, new_name  # Return success and destination info
 
     """Check if a node exists in current directory"""
@@ -81,20 +86,71 @@ class NodeOperations:
     """Create a new node (file or directory)"""
     def _create_node(self, name: str, is_directory: bool = False) -> FileSystemNode:
         cwd = self.local.cwd
-        with cwd.lock:
+        with cwd.lock.write("create"):
             self.perm_manager.check_permission(cwd, "write")
             self._check_node_exists(name, should_exist=False)
-            
+
             # Create new node
-            node = FileSystemNode(name, owner=self.local.user, is_directory=is_directory)
-            node.permissions[self.local.user] = Permission(owner=self.local.user, read=True, write=True)
-            
+            node = self._new_node(name, is_directory)
+
             # Set up parent-child relationship
             node.parent = cwd
-            cwd.children[name] = node
-            
+            with self.local.snapshots.mutation(cwd):
+                cwd.children[name] = node
+
             return node
 
+    """Write-lock several nodes for one change. Ancestors are locked first, the
+    parent->child order every other lock site follows, so multi-node changes
+    (moves, transaction commits) cannot deadlock with each other."""
+    @contextlib.contextmanager
+    def _write_locked(self, nodes, site: str):
+        with contextlib.ExitStack() as stack:
+            for node in sorted(set(nodes), key=lambda node: (node_depth(node), id(node))):
+                stack.enter_context(node.lock.write(site))
+            yield
+
+    """Build a detached node owned by the current user. Owners have full access
+    and other users resolve inherited directory ACLs, so no ACL entry is stamped."""
+    def _new_node(self, name: str, is_directory: bool = False) -> FileSystemNode:
+        return FileSystemNode(name, owner=self.local.user, is_directory=is_directory)
+
+    """Split a path into its parent directory node and basename"""
+    def _resolve_parent(self, path: str):
+        parent_path, _, name = path.rstrip("/").rpartition("/")
+        if not name:
+            raise Exception(f"Invalid path '{path}'")
+        if not parent_path:
+            parent = self.root if path.startswith("/") else self.local.cwd
+        else:
+            parent = self._resolve_path(parent_path)
+        if parent is None:
+            raise Exception(f"Directory '{parent_path}' not found")
+        if not parent.is_directory:
+            raise Exception(f"'{parent_path}' is not a directory")
+        return parent, name
+
+    """Resolve a path"""
+    def _resolve_path(self, path):
+        if not path or path == "/":
+            return self.root
+        parts = path.strip("/").split("/")
+        current = self.root if path.startswith("/") else self.local.cwd
+        for part in parts:
+            if part == "..":
+                if current.parent:
+                    current = current.parent
+                elif current == self.root:
+                    continue
+            elif part == "." or part == "":
+                continue
+            else:
+                with current.lock.read("resolve"):
+                    if part not in current.children:
+                        return None
+                    current = current.children[part]
+        return current
+
     """Get node at specified path"""
     def get_node(self, path: str) -> FileSystemNode:
         path = normalize_path(path)
@@ -125,18 +181,59 @@ class NodeOperations:
     def find(self, name: str) -> FileSystemNode:
         return self.local.cwd.children.get(name)
 
-    """Find a node recursively"""
-    def _find_recursive(self, node: FileSystemNode, pattern: str) -> List[str]:
+    """Yield (name, node) for the readable entries of directory (default cwd) in insertion
+    order, unsorted (ls() sorts). Reads a pinned snapshot and filters chunk_size entries
+    at a time, so no more than one chunk is held however large the directory is."""
+    def iter_ls(self, directory: FileSystemNode = None, chunk_size: int = 256) -> Iterator[Tuple[str, FileSystemNode]]:
+        directory = self.local.cwd if directory is None else directory
+        if not directory.is_directory:
+            raise Exception(f"'{directory.name}' is not a directory")
+        self.perm_manager.check_permission(directory, "read")
+        with self.local.snapshots.pin() as snapshot:
+            entries = iter(snapshot.children(directory).items())
+            while True:
+                chunk = list(itertools.islice(entries, chunk_size))
+                if not chunk:
+                    return
+                readable = set(self.perm_manager.filter_readable(node for _, node in chunk))
+                for name, node in chunk:
+                    if node in readable:
+                        yield name, node
+
+    """Yield (path, node) for readable nodes under start (default cwd) whose name matches a
+    glob pattern. Walks a pinned snapshot depth-first and streams matches as they are found."""
+    def iter_find(self, pattern: str, start: FileSystemNode = None) -> Iterator[Tuple[str, FileSystemNode]]:
+        start = self.local.cwd if start is None else start
+        with self.local.snapshots.pin() as snapshot:
+            stack = [(node_path(start), start.name, start)]
+            while stack:
+                path, name, node = stack.pop()
+                if fnmatch.fnmatch(name, pattern):
+                    yield path, node
+                if node.is_directory:
+                    children = snapshot.children(node)
+                    readable = set(self.perm_manager.filter_readable(children.values()))
+                    prefix = path.rstrip("/")
+                    for child_name, child in reversed(list(children.items())):
+                        if child in readable:
+                            stack.append((f"{prefix}/{child_name}", child_name, child))
+
+    """Find a node recursively. The walk reads a pinned snapshot, so it sees one
+    consistent tree and never blocks concurrent writers."""
+    def _find_recursive(self, node: FileSystemNode, pattern: str, snapshot=None, name: str = None) -> List[str]:
+        if snapshot is None:
+            with self.local.snapshots.pin() as snapshot:
+                return self._find_recursive(node, pattern, snapshot, name)
+        name = node.name if name is None else name
         result = []
-        if fnmatch.fnmatch(node.name, pattern):
-            result.append(node.name)
-            
+        if fnmatch.fnmatch(name, pattern):
+            result.append(name)
+
         if node.is_directory:
-            for child in node.children.values():
-                try:
-                    self.perm_manager.check_permission(child, "read")
-                    child_matches = self._find_recursive(child, pattern)
-                    result.extend([os.path.join(node.name, match) for match in child_matches])
-                except:
-                    continue
+            children = snapshot.children(node)
+            readable = set(self.perm_manager.filter_readable(children.values()))
+            for child_name, child in children.items():
+                if child in readable:
+                    child_matches = self._find_recursive(child, pattern, snapshot, child_name)
+                    result.extend([os.path.join(name, match) for match in child_matches])
         return result 
\ No newline at end of file
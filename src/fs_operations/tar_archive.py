@@ -0,0 +1,129 @@
+from src.utils.models import LocalState
+from src.permissions.permissions_manager import PermissionManager
+from src.fs_operations.node_operations import NodeOperations
+from src.fs_operations.host_import import ImportStats
+from datetime import datetime
+import io
+import posixpath
+import tarfile
+import time
+
+"""
+Streaming tar export and import of subtrees.
+
+Both directions use tarfile's stream modes ("w|" / "r|"), so archives are written
+to and read from pipes without seeking and without holding the archive in memory.
+Export walks a pinned snapshot, skipping entries the user cannot read, and writes
+each file body as soon as it is reached; only one file is encoded at a time.
+Import builds the members into a detached subtree as they arrive and attaches its
+top-level entries under one lock of the destination directory at the end, so a
+truncated or invalid archive changes nothing. Only regular files and directories
+are imported; file bodies are decoded as UTF-8 (undecodable bytes become U+FFFD).
+"""
+class TarArchiver(NodeOperations):
+    def __init__(self, local: LocalState, perm_manager: PermissionManager = None):
+        super().__init__(local, perm_manager)
+
+    """Write the subtree at path to stream as a tar archive (gzip-compressed with
+    compress=True). Entries are named from the subtree's own name, or from the
+    top level for the root. Returns the number of entries written."""
+    def export_tar(self, path: str, stream, compress: bool = False) -> int:
+        node = self._resolve_path(path)
+        if node is None:
+            raise Exception(f"'{path}' not found")
+        self.perm_manager.check_permission(node, "read")
+        count = 0
+        with tarfile.open(fileobj=stream, mode="w|gz" if compress else "w|") as tar, \
+                self.local.snapshots.pin() as snapshot:
+            stack = [("" if node is self.root else node.name, node)]
+            while stack:
+                name, current = stack.pop()
+                if name:
+                    info = tarfile.TarInfo(name)
+                    info.mtime = int(current.modified_at.timestamp())
+                    info.uname = current.owner or ""
+                    if current.is_directory:
+                        info.type = tarfile.DIRTYPE
+                        info.mode = 0o755
+                        tar.addfile(info)
+                    else:
+                        data = snapshot.content(current).encode("utf-8")
+                        info.size = len(data)
+                        info.mode = 0o644
+                        tar.addfile(info, io.BytesIO(data))
+                    count += 1
+                if current.is_directory:
+                    children = snapshot.children(current)
+                    readable = set(self.perm_manager.filter_readable(children.values()))
+                    for child_name, child in sorted(children.items(), reverse=True):
+                        if child in readable:
+                            stack.append((posixpath.join(name, child_name), child))
+        return count
+
+    """Read a tar archive from stream into the existing directory path. Compression is
+    detected automatically. Top-level entries must not exist there yet."""
+    def import_tar(self, stream, path: str = ".") -> ImportStats:
+        start = time.perf_counter()
+        destination = self._resolve_path(path)
+        if destination is None:
+            raise Exception(f"Directory '{path}' not found")
+        if not destination.is_directory:
+            raise Exception(f"'{path}' is not a directory")
+        # Fail before reading the archive; checked again when attaching
+        self.perm_manager.check_permission(destination, "write")
+
+        stats = ImportStats()
+        staging = self._new_node(destination.name, is_directory=True)
+        with tarfile.open(fileobj=stream, mode="r|*") as tar:
+            for member in tar:
+                if not (member.isfile() or member.isdir()):
+                    continue
+                parts = self._member_parts(member.name)
+                if not parts:
+                    continue
+                parent = staging
+                for part in parts[:-1]:
+                    child = parent.children.get(part)
+                    if child is None:
+                        child = self._new_node(part, is_directory=True)
+                        parent.add_child(child)
+                        stats.directories += 1
+                    elif not child.is_directory:
+                        raise Exception(f"'{member.name}': '{part}' is a file in the archive")
+                    parent = child
+
+                node = parent.children.get(parts[-1])
+                if node is None:
+                    node = self._new_node(parts[-1], is_directory=member.isdir())
+                    parent.add_child(node)
+                    if member.isdir():
+                        stats.directories += 1
+                    else:
+                        stats.files += 1
+                elif node.is_directory != member.isdir():
+                    raise Exception(f"'{member.name}' appears as both a file and a directory")
+                if member.isfile():
+                    data = tar.extractfile(member).read()
+                    node.content = data.decode("utf-8", errors="replace")
+                    stats.bytes += len(data)
+                node.modified_at = datetime.fromtimestamp(member.mtime)
+
+        with destination.lock.write("import-tar"):
+            self.perm_manager.check_permission(destination, "write")
+            for name in staging.children:
+                if name in destination.children:
+                    raise Exception(f"'{name}' already exists")
+            with self.local.snapshots.mutation(destination):
+                for node in list(staging.children.values()):
+                    destination.add_child(node)
+        stats.seconds = time.perf_counter() - start
+        return stats
+
+    """Path components of a member name; absolute names and '..' are rejected"""
+    def _member_parts(self, name: str):
+        if name.startswith("/"):
+            raise Exception(f"'{name}': absolute paths are not allowed in archives")
+        parts = [part for part in name.split("/") if part not in ("", ".")]
+        if ".." in parts:
+            raise Exception(f"'{name}': '..' is not allowed in archives")
+        return parts
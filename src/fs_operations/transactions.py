@@ -0,0 +1,221 @@
+from src.utils.models import FileSystemNode, LocalState
+from src.utils import normalize_path, get_parent_path, get_basename, node_path
+from src.permissions.permissions_manager import PermissionManager
+from src.fs_operations.node_operations import NodeOperations
+from typing import Callable, Dict, List, Optional
+
+class TransactionConflict(Exception):
+    """A node read by the transaction changed before it could commit"""
+
+"""
+Multi-operation transactions with optimistic concurrency control.
+
+Operations are buffered and nothing touches the tree until commit. Every node the
+transaction looks at is recorded with its version (changed_at, perm_version). At
+commit the touched nodes are locked exclusively, ancestors first, and the read set
+is validated. If nothing changed, the whole plan is applied at once and the
+on_commit hook (e.g. a single state save) runs. Otherwise TransactionConflict is
+raised and nothing is applied.
+"""
+class Transaction(NodeOperations):
+    def __init__(self, local: LocalState, perm_manager: PermissionManager = None,
+                 on_commit: Optional[Callable[[], None]] = None):
+        super().__init__(local, perm_manager)
+        self.on_commit = on_commit
+        self._ops: List[tuple] = []
+        self._reads: Dict[FileSystemNode, tuple] = {}
+        self._perm_version = local.perm_version
+        self.committed = False
+
+    # Buffered operations
+    """Create a directory (with parents=True, missing parents too and no error if it exists)"""
+    def mkdir(self, path: str, parents: bool = False):
+        self._ops.append(("mkdir", self._absolute(path), parents))
+
+    """Create an empty file if it does not exist"""
+    def touch(self, path: str):
+        self._ops.append(("touch", self._absolute(path)))
+
+    """Write a file, creating it if needed"""
+    def write(self, path: str, content: str):
+        self._ops.append(("write", self._absolute(path), content))
+
+    """Set direct (or inheritable) permissions on a node (admin only)"""
+    def set_permissions(self, path: str, target_user: str, read: bool = None, write: bool = None,
+                        inherit: bool = False):
+        self._ops.append(("perms", self._absolute(path), target_user, read, write, inherit))
+
+    """Read a file as seen by this transaction (buffered writes first)"""
+    def read(self, path: str) -> str:
+        path = self._absolute(path)
+        for op in reversed(self._ops):
+            if op[1] == path and op[0] == "write":
+                return op[2]
+        if any(op[0] == "touch" and op[1] == path for op in self._ops) and self._lookup(path) is None:
+            return ""
+        return self._existing_content(path)
+
+    """Validate the read set and apply every buffered operation atomically"""
+    def commit(self):
+        if self.committed:
+            raise Exception("Transaction already committed")
+        plan, anchors = self._plan()
+
+        with self._write_locked(anchors, "commit"):
+            self._validate()
+            self._apply(plan)
+
+        self.committed = True
+        if self.on_commit is not None:
+            self.on_commit()
+
+    def _absolute(self, path: str) -> str:
+        if not path.startswith("/"):
+            cwd = node_path(self.local.cwd)
+            path = cwd.rstrip("/") + "/" + path
+        return normalize_path(path) or "/"
+
+    def _record(self, node: FileSystemNode):
+        if node not in self._reads:
+            self._reads[node] = (node.changed_at, node.perm_version)
+
+    def _lookup(self, path: str) -> Optional[FileSystemNode]:
+        """Existing node at an absolute path, recording every node on the way"""
+        current = self.root
+        self._record(current)
+        if path == "/":
+            return current
+        for part in path.strip("/").split("/"):
+            if not current.is_directory:
+                return None
+            current = current.children.get(part)
+            if current is None:
+                return None
+            self._record(current)
+        return current
+
+    def _existing_content(self, path: str) -> str:
+        node = self._lookup(path)
+        if node is None:
+            raise Exception(f"'{path}' not found")
+        if node.is_directory:
+            raise Exception(f"'{path}' is not a file")
+        self.perm_manager.check_permission(node, "read")
+        return node.content
+
+    def _plan(self):
+        """Check every operation against the live tree plus earlier buffered creations"""
+        pending: Dict[str, bool] = {}  # path -> is_directory, for nodes this transaction creates
+        anchors = set()
+        plan = []
+
+        def kind(path):
+            if path in pending:
+                return "dir" if pending[path] else "file", None
+            node = self._lookup(path)
+            if node is None:
+                return None, None
+            return "dir" if node.is_directory else "file", node
+
+        def require_parent(path):
+            parent_path = get_parent_path(path)
+            parent_kind, parent = kind(parent_path)
+            if parent_kind != "dir":
+                raise Exception(f"Directory '{parent_path}' not found")
+            if parent is not None:
+                self.perm_manager.check_permission(parent, "write")
+                anchors.add(parent)
+
+        for op in self._ops:
+            action, path = op[0], op[1]
+            if path == "/" and action != "perms":
+                raise Exception("Invalid path '/'")
+            node_kind, node = kind(path)
+            if action == "mkdir":
+                parents = op[2]
+                if node_kind == "dir" and parents:
+                    continue
+                if node_kind is not None:
+                    raise Exception(f"'{path}' already exists")
+                if parents:
+                    missing = []
+                    current = get_parent_path(path)
+                    while kind(current)[0] is None:
+                        missing.append(current)
+                        current = get_parent_path(current)
+                    for directory in reversed(missing):
+                        require_parent(directory)
+                        pending[directory] = True
+                        plan.append(("mkdir", directory))
+                require_parent(path)
+                pending[path] = True
+                plan.append(("mkdir", path))
+            elif action in ("touch", "write"):
+                if node_kind == "dir":
+                    raise Exception(f"'{path}' is not a file")
+                if node_kind is None:
+                    require_parent(path)
+                    pending[path] = False
+                    plan.append(("touch", path))
+                elif node is not None and action == "write":
+                    self.perm_manager.check_permission(node, "write")
+                    anchors.add(node)
+                if action == "write":
+                    plan.append(("write", path, op[2]))
+            else:
+                target_user, read, write, inherit = op[2:]
+                if self.local.user != "admin":
+                    raise PermissionError("This operation requires admin privileges")
+                if target_user not in self.local.users:
+                    raise Exception("Target user not found")
+                if node_kind is None:
+                    raise Exception(f"'{path}' not found")
+                if inherit and node_kind != "dir":
+                    raise Exception("Inherited permissions can only be set on directories")
+                if node is not None:
+                    anchors.add(node)
+                plan.append(("perms", path, target_user, read, write, inherit))
+        return plan, anchors
+
+    def _validate(self):
+        if self.local.perm_version != self._perm_version:
+            raise TransactionConflict("Permissions changed during the transaction")
+        for node, version in self._reads.items():
+            if (node.changed_at, node.perm_version) != version:
+                raise TransactionConflict(f"'{node.name}' changed during the transaction")
+
+    def _apply(self, plan):
+        created: Dict[str, FileSystemNode] = {}
+
+        def node_at(path):
+            return created.get(path) or self._lookup(path)
+
+        for step in plan:
+            action, path = step[0], step[1]
+            if action in ("mkdir", "touch"):
+                parent = node_at(get_parent_path(path))
+                node = self._new_node(get_basename(path), is_directory=action == "mkdir")
+                node.parent = parent
+                with self.local.snapshots.mutation(parent):
+                    parent.children[node.name] = node
+                created[path] = node
+            elif action == "write":
+                node = node_at(path)
+                with self.local.snapshots.mutation(node):
+                    node.content = step[2]
+            else:
+                self.perm_manager.node_perms.set_permissions(node_at(path), *step[2:])
+
+
+"""Run fn(transaction) and commit, retrying from scratch on conflicts"""
+def run_transaction(local: LocalState, perm_manager: PermissionManager, fn: Callable[[Transaction], None],
+                    retries: int = 3, on_commit: Optional[Callable[[], None]] = None):
+    for attempt in range(retries + 1):
+        transaction = Transaction(local, perm_manager, on_commit)
+        result = fn(transaction)
+        try:
+            transaction.commit()
+            return result
+        except TransactionConflict:
+            if attempt == retries:
+                raise
@@ -0,0 +1,156 @@
+"""Bulk import and export of users, groups, memberships and node ACLs.
+
+Records are flat dicts with a ``kind`` and the fields that kind uses:
+
+    user    name, password
+    group   name, read, write
+    member  user, group
+    acl     path, user, read, write, inherit
+
+In CSV every row has all of FIELDS (unused ones empty). In JSONL each line is one
+object with only its own fields. Both formats round-trip through export_records.
+"""
+import csv
+import json
+from typing import Dict, Iterable, Iterator, List
+
+FIELDS = ("kind", "name", "password", "read", "write", "user", "group", "path", "inherit")
+KINDS = ("user", "group", "member", "acl")
+FILE_FORMATS = ("csv", "jsonl")
+
+def file_format_for(filename: str, file_format: str = None) -> str:
+    """Explicit format, else guessed from the file extension (default: jsonl)"""
+    if file_format:
+        return file_format
+    return "csv" if filename and filename.lower().endswith(".csv") else "jsonl"
+
+def read_records(stream, file_format: str) -> Iterator[dict]:
+    """Parse records from a text stream"""
+    if file_format == "csv":
+        for row in csv.DictReader(stream):
+            yield {key: value for key, value in row.items() if key and value not in (None, "")}
+    else:
+        for lineno, line in enumerate(stream, 1):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError as e:
+                raise ValueError(f"line {lineno}: {e}")
+
+def write_records(stream, records: Iterable[dict], file_format: str) -> int:
+    """Write records to a text stream; returns how many were written"""
+    count = 0
+    if file_format == "csv":
+        writer = csv.DictWriter(stream, fieldnames=FIELDS, lineterminator="\n")
+        writer.writeheader()
+        for record in records:
+            writer.writerow(record)
+            count += 1
+    else:
+        encode = json.JSONEncoder(separators=(",", ":")).encode
+        for record in records:
+            stream.write(encode(record) + "\n")
+            count += 1
+    return count
+
+def export_records(pm) -> Iterator[dict]:
+    """Users (except admin), groups, memberships and every ACL entry in the tree (admin only)"""
+    pm.node_perms._check_admin()
+    for name, password in sorted(pm.users.items()):
+        if name != "admin":
+            yield {"kind": "user", "name": name, "password": password}
+    for name, group in pm.groups.items():
+        yield {"kind": "group", "name": name, "read": group.read, "write": group.write}
+    for name, group in pm.groups.items():
+        for member in sorted(group.members):
+            yield {"kind": "member", "user": member, "group": name}
+
+    stack = [("/", pm.root)]
+    while stack:
+        path, node = stack.pop()
+        for inherit, acl in ((False, node.permissions), (True, node.inheritable_permissions)):
+            for user, perm in sorted(acl.items()):
+                yield {"kind": "acl", "path": path, "user": user,
+                       "read": perm.read, "write": perm.write, "inherit": inherit}
+        if node.is_directory:
+            prefix = path.rstrip("/")
+            for name in sorted(node.children, reverse=True):
+                stack.append((f"{prefix}/{name}", node.children[name]))
+
+def import_records(pm, records: Iterable[dict]) -> Dict[str, int]:
+    """Validate every record, then apply them users first, groups, memberships and ACLs
+    last. Nothing is applied if any record is invalid. Existing users get the new
+    password, existing groups must have the same read/write flags, memberships
+    and ACL entries are added or updated. Returns the number applied per kind."""
+    pm.node_perms._check_admin()
+    by_kind: Dict[str, List[dict]] = {kind: [] for kind in KINDS}
+    for number, record in enumerate(records, 1):
+        kind = record.get("kind")
+        if kind not in by_kind:
+            raise ValueError(f"record {number}: unknown kind '{kind}'")
+        required = {"user": ("name", "password"), "group": ("name",),
+                    "member": ("user", "group"), "acl": ("path", "user")}[kind]
+        missing = [name for name in required if not record.get(name)]
+        if missing:
+            raise ValueError(f"record {number}: {kind} is missing {', '.join(missing)}")
+        by_kind[kind].append(record)
+
+    users = set(pm.users) | {record["name"] for record in by_kind["user"]}
+    groups = {}
+    for record in by_kind["group"]:
+        flags = (_flag(record.get("read"), True), _flag(record.get("write"), False))
+        existing = pm.groups.get(record["name"])
+        if existing is not None and (existing.read, existing.write) != flags:
+            if record["name"] == "admins":
+                raise PermissionError("Cannot modify admins group")
+            raise ValueError(f"Group {record['name']} already exists with different permissions")
+        groups[record["name"]] = flags
+    if any(record["name"] == "admin" for record in by_kind["user"]):
+        raise PermissionError("Cannot modify admin user")
+    for record in by_kind["member"]:
+        if record["user"] not in users:
+            raise ValueError(f"User {record['user']} not found")
+        if record["group"] not in pm.groups and record["group"] not in groups:
+            raise ValueError(f"Group {record['group']} not found")
+    acls = []
+    for record in by_kind["acl"]:
+        if record["user"] not in users:
+            raise ValueError(f"User {record['user']} not found")
+        node = _resolve(pm.root, record["path"])
+        inherit = _flag(record.get("inherit"), False)
+        if inherit and not node.is_directory:
+            raise ValueError(f"'{record['path']}': inherited permissions can only be set on directories")
+        acls.append((node, record["user"], _flag(record.get("read"), False),
+                     _flag(record.get("write"), False), inherit))
+
+    for record in by_kind["user"]:
+        pm.user_ops.set_user(record["name"], record["password"])
+    for name, (read, write) in groups.items():
+        if name not in pm.groups:
+            pm.group_ops.create_group(name, read, write)
+    for record in by_kind["member"]:
+        pm.group_ops.add_user_to_group(record["user"], record["group"])
+    for node, user, read, write, inherit in acls:
+        pm.node_perms.set_permissions(node, user, read, write, inherit)
+    return {kind: len(by_kind[kind]) for kind in KINDS}
+
+def _flag(value, default: bool) -> bool:
+    if value is None or value == "":
+        return default
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ("true", "1", "yes")
+
+def _resolve(root, path: str):
+    if not path.startswith("/"):
+        raise ValueError(f"'{path}': ACL paths must be absolute")
+    node = root
+    for part in path.strip("/").split("/"):
+        if not part:
+            continue
+        child = node.children.get(part) if node.is_directory else None
+        if child is None:
+            raise ValueError(f"'{path}' not found")
+        node = child
+    return node
@@ -0,0 +1,69 @@
+from typing import Dict, Set
+from src.utils.models import PERM_READ, PERM_WRITE
+
+class GroupIndex:
+    """Reverse index from user to groups with a precomputed group permission mask per user"""
+
+    def __init__(self, groups):
+        self.groups = groups
+        self.user_groups: Dict[str, Set[str]] = {}
+        self.masks: Dict[str, int] = {}
+        self.rebuild()
+
+    def rebuild(self):
+        """Rebuild the index from the groups dict"""
+        self.user_groups = {}
+        for groupname, group in self.groups.items():
+            for member in group.members:
+                self.user_groups.setdefault(member, set()).add(groupname)
+        self.masks = {user: self._compute_mask(user) for user in self.user_groups}
+
+    def groups_for(self, username: str) -> Set[str]:
+        """Names of the groups a user belongs to"""
+        return self.user_groups.get(username, set())
+
+    def mask(self, username: str) -> int:
+        """Combined read/write bits granted to a user by all their groups"""
+        return self.masks.get(username, 0)
+
+    def add_group(self, groupname: str):
+        """Index a newly created group"""
+        for member in self.groups[groupname].members:
+            self.add_member(member, groupname)
+
+    def remove_group(self, groupname: str):
+        """Drop a group from every member's entry (call before deleting it)"""
+        for member in list(self.groups[groupname].members):
+            self.remove_member(member, groupname)
+
+    def add_member(self, username: str, groupname: str):
+        self.user_groups.setdefault(username, set()).add(groupname)
+        self.masks[username] = self.mask(username) | self._group_bits(self.groups[groupname])
+
+    def remove_member(self, username: str, groupname: str):
+        names = self.user_groups.get(username)
+        if not names:
+            return
+        names.discard(groupname)
+        if names:
+            self.masks[username] = self._compute_mask(username)
+        else:
+            del self.user_groups[username]
+            self.masks.pop(username, None)
+
+    def remove_user(self, username: str):
+        """Forget a user entirely"""
+        self.user_groups.pop(username, None)
+        self.masks.pop(username, None)
+
+    def _compute_mask(self, username: str) -> int:
+        mask = 0
+        for groupname in self.user_groups.get(username, ()):
+            group = self.groups.get(groupname)
+            if group is not None:
+                mask |= self._group_bits(group)
+        return mask
+
+    @staticmethod
+    def _group_bits(group) -> int:
+        return (PERM_READ if group.read else 0) | (PERM_WRITE if group.write else 0)
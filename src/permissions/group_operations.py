@@ -1,6 +1,7 @@
 from typing import Dict
 from dataclasses import dataclass, field
 from typing import Set
+from .group_index import GroupIndex
 
 @dataclass
 class PermissionGroup:
@@ -26,10 +27,11 @@ class PermissionGroup:
 class GroupOperations:
     """Operations for managing permission groups"""
     
-    def __init__(self, groups: Dict[str, PermissionGroup], users: Dict[str, str], local):
+    def __init__(self, groups: Dict[str, PermissionGroup], users: Dict[str, str], local, index: GroupIndex = None):
         self.groups = groups
         self.users = users
         self.local = local
+        self.index = index if index is not None else GroupIndex(groups)
 
     def create_group(self, groupname: str, read: bool = True, write: bool = False):
         """Create a new permission group (admin only)"""
@@ -40,6 +42,8 @@ class GroupOperations:
             raise ValueError(f"Group {groupname} already exists")
             
         self.groups[groupname] = PermissionGroup(groupname, read, write)
+        self.index.add_group(groupname)
+        self.local.invalidate_permissions()
 
     def delete_group(self, groupname: str):
         """Delete a permission group (admin only)"""
@@ -52,7 +56,9 @@ class GroupOperations:
         if groupname not in self.groups:
             raise ValueError(f"Group {groupname} not found")
             
+        self.index.remove_group(groupname)
         del self.groups[groupname]
+        self.local.invalidate_permissions()
 
     def add_user_to_group(self, username: str, groupname: str):
         """Add a user to a group (admin only)"""
@@ -66,6 +72,8 @@ class GroupOperations:
             raise ValueError(f"Group {groupname} not found")
             
         self.groups[groupname].members.add(username)
+        self.index.add_member(username, groupname)
+        self.local.invalidate_permissions()
 
     def remove_user_from_group(self, username: str, groupname: str):
         """Remove a user from a group (admin only)"""
@@ -80,12 +88,15 @@ class GroupOperations:
             
         if username in self.groups[groupname].members:
             self.groups[groupname].members.remove(username)
+            self.index.remove_member(username, groupname)
+            self.local.invalidate_permissions()
 
     def remove_user_from_all_groups(self, username: str):
         """Remove a user from all groups"""
-        for group in self.groups.values():
-            if username in group.members:
-                group.members.remove(username)
+        for groupname in self.index.groups_for(username):
+            self.groups[groupname].members.discard(username)
+        self.index.remove_user(username)
+        self.local.invalidate_permissions()
 
     def list_groups(self):
         """List all permission groups and their members"""
@@ -1,19 +1,46 @@
-from typing import Dict, Tuple
-from src.utils.models import Permission, FileSystemNode
+import copy
+import weakref
+from typing import Dict, Iterable, Iterator, List, Tuple
+from src.utils.models import (Permission, FileSystemNode, ACTION_BITS, PERM_READ, PERM_WRITE, EMPTY_ACL,
+                              intern_permission)
+from src.utils.path_utils import node_path
+from .group_index import GroupIndex
 
 class NodePermissions:
-    def __init__(self, root_node: FileSystemNode, local, users: Dict[str, str], groups):
+    # Upper bound on memoized (user, node, action) decisions before the cache is reset
+    CACHE_LIMIT = 100000
+
+    def __init__(self, root_node: FileSystemNode, local, users: Dict[str, str], groups, group_index: GroupIndex = None):
         self.root = root_node
         self.local = local
         self.users = users
         self.groups = groups
+        self.group_index = group_index if group_index is not None else GroupIndex(groups)
+        # Keyed on id() with a weak reference in the entry, so removed nodes are not kept
+        # alive and a reused id never matches.
+        # (user, id(node), action) -> (node ref, global version, node version, allowed)
+        self._cache = {}
+        # id(directory) -> (directory ref, global version, inheritable ACL in effect there)
+        self._resolved = {}
+        # (global version, user -> (read, write) granted through groups)
+        self._rollup = None
+
+    """A view acting for another session; decision caches and the group index stay shared"""
+    def for_session(self, session) -> 'NodePermissions':
+        view = copy.copy(self)
+        view.local = session
+        return view
 
-    """Set direct permissions for a node (admin only)"""
-    def set_permissions(self, node: FileSystemNode, target_user: str, read: bool = None, write: bool = None):
+    """Set direct permissions for a node (admin only). With inherit=True the
+    entry is stored on a directory and applies to the directory and everything below it."""
+    def set_permissions(self, node: FileSystemNode, target_user: str, read: bool = None, write: bool = None,
+                        inherit: bool = False):
         self._check_admin()
             
         if target_user not in self.users:
             raise Exception("Target user not found")
+        if inherit and not node.is_directory:
+            raise Exception("Inherited permissions can only be set on directories")
 
         # Convert string values to boolean
         if isinstance(read, str):
@@ -21,70 +48,220 @@ class NodePermissions:
         if isinstance(write, str):
             write = write.lower() == 'true'
 
-        current_perm = node.permissions.get(target_user, Permission())
-        if read is not None:
-            current_perm.read = read
-        if write is not None:
-            current_perm.write = write
-        node.permissions[target_user] = current_perm
+        # Permission values are shared, so build a new one instead of mutating. The ACL
+        # dict is replaced too, so readers iterating the old one (a save) are unaffected.
+        field = "inheritable_permissions" if inherit else "permissions"
+        acl = dict(getattr(node, field))
+        current_perm = acl.get(target_user, intern_permission())
+        acl[target_user] = intern_permission(
+            current_perm.owner, current_perm.group,
+            current_perm.read if read is None else read,
+            current_perm.write if write is None else write,
+        )
+        setattr(node, field, acl)
+        self.local.acl_index.add(target_user, node)
+        if inherit:
+            # Every resolved ACL below this directory is now stale
+            self.local.invalidate_permissions()
+        else:
+            node.perm_version += 1
 
+    """Effective permissions per user: the direct ACL combined with group rollups.
+    Builds fresh Permission objects, so the node's stored ACL is never modified."""
     def list_permissions(self, node: FileSystemNode) -> Dict[str, Permission]:
-        # Combine direct permissions and group permissions
-        effective_perms = {}
-        
-        # Add direct permissions
-        for user, perm in node.permissions.items():
-            effective_perms[user] = perm
-
-        # Add group permissions
-        for groupname, group in self.groups.items():
-            for member in group.members:
-                if member not in effective_perms:
-                    effective_perms[member] = Permission(read=group.read, write=group.write)
-                else:
-                    # Combine with existing permissions
-                    effective_perms[member].read |= group.read
-                    effective_perms[member].write |= group.write
+        return self._effective_acl(node, self._group_rollup())
+
+    """Effective permissions for every child of a directory, sharing one group rollup"""
+    def list_permissions_many(self, directory: FileSystemNode) -> Dict[str, Dict[str, Permission]]:
+        if not directory.is_directory:
+            raise Exception(f"'{directory.name}' is not a directory")
+        return {name: acl for name, _, acl in self.iter_permissions(directory.children.items())}
+
+    """Yield (key, node, effective permissions) for (key, node) pairs as they are pulled,
+    sharing one group rollup"""
+    def iter_permissions(self, entries: Iterable[Tuple[str, FileSystemNode]]
+                         ) -> Iterator[Tuple[str, FileSystemNode, Dict[str, Permission]]]:
+        rollup = self._group_rollup()
+        for key, node in entries:
+            yield key, node, self._effective_acl(node, rollup)
+
+    """Read/write bits granted to each group member, taken from the group index and
+    cached until invalidate_permissions() moves the global version"""
+    def _group_rollup(self) -> Dict[str, Tuple[bool, bool]]:
+        version = self.local.perm_version
+        cached = self._rollup
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        rollup = {
+            user: (bool(mask & PERM_READ), bool(mask & PERM_WRITE))
+            for user, mask in self.group_index.masks.items()
+        }
+        self._rollup = (version, rollup)
+        return rollup
 
+    def _effective_acl(self, node: FileSystemNode, rollup: Dict[str, Tuple[bool, bool]]) -> Dict[str, Permission]:
+        grants = {}
+        if node.owner:
+            grants[node.owner] = (True, True)
+        for acl in (self._inherited_acl(node), node.permissions):
+            for user, perm in acl.items():
+                read, write = grants.get(user, (False, False))
+                grants[user] = (read or perm.read, write or perm.write)
+        for user, (group_read, group_write) in rollup.items():
+            read, write = grants.get(user, (False, False))
+            grants[user] = (read or group_read, write or group_write)
+
+        effective_perms = {}
+        for user, (read, write) in grants.items():
+            direct = node.permissions.get(user)
+            effective_perms[user] = intern_permission(owner=direct.owner if direct else None,
+                                                      group=direct.group if direct else None,
+                                                      read=read, write=write)
         return effective_perms
 
     """Check if current user has permission for an action"""
     def check_permission(self, node: FileSystemNode, action: str) -> bool:
+        user = self.local.user
         # Admin and fsuser always have full access
-        if self.local.user in ["admin", "fsuser"]:
+        if user in ["admin", "fsuser"]:
             return True
-            
+
+        # Memoized decisions stay valid until the global or the node's version moves
+        key = (user, id(node), action)
+        version = self.local.perm_version
+        entry = self._cache.get(key)
+        if entry is not None and entry[1] == version and entry[2] == node.perm_version and entry[0]() is node:
+            allowed = entry[3]
+        else:
+            allowed = self._evaluate_permission(node, user, action)
+            if len(self._cache) >= self.CACHE_LIMIT:
+                self._cache.clear()
+            self._cache[key] = (weakref.ref(node), version, node.perm_version, allowed)
+
+        if allowed:
+            return True
+        raise PermissionError(f"{action.capitalize()} permission denied")
+
+    """Nodes the current user may read, computed in a single pass"""
+    def filter_readable(self, nodes: Iterable[FileSystemNode]) -> List[FileSystemNode]:
+        return self.filter_accessible(nodes, "read")
+
+    """Nodes the current user may access for an action. Works on permission bitmasks and
+    the user's group mask, resolving inherited ACLs once per parent, and never raises
+    PermissionError for denied nodes."""
+    def filter_accessible(self, nodes: Iterable[FileSystemNode], action: str) -> List[FileSystemNode]:
+        user = self.local.user
+        bit = ACTION_BITS.get(action, 0)
+        if user in ["admin", "fsuser"] or self._group_mask(user) & bit:
+            return list(nodes)
+
+        allowed = []
+        inherited_bits = {}  # directory -> bits inherited by the user there
+        for node in nodes:
+            if node.owner == user:
+                allowed.append(node)
+                continue
+            direct = node.permissions.get(user)
+            if direct is not None and direct.bits & bit:
+                allowed.append(node)
+                continue
+            directory = node if node.is_directory else node.parent
+            if directory is None:
+                continue
+            bits = inherited_bits.get(directory)
+            if bits is None:
+                inherited = self._resolve_directory_acl(directory).get(user)
+                bits = inherited.bits if inherited is not None else 0
+                inherited_bits[directory] = bits
+            if bits & bit:
+                allowed.append(node)
+        return allowed
+
+    """Evaluate owner, direct ACL and group permissions without caching"""
+    def _evaluate_permission(self, node: FileSystemNode, user: str, action: str) -> bool:
         # Node owner has full permissions
-        if node.owner == self.local.user:
+        if node.owner == user:
             return True
 
         # Check direct permissions
-        direct_perms = node.permissions.get(self.local.user, Permission())
-        if (action == "read" and direct_perms.read) or (action == "write" and direct_perms.write):
-            return True
+        direct_perms = node.permissions.get(user)
+        if direct_perms is not None:
+            if (action == "read" and direct_perms.read) or (action == "write" and direct_perms.write):
+                return True
+
+        # Check permissions inherited from enclosing directories
+        inherited = self._inherited_acl(node).get(user)
+        if inherited is not None:
+            if (action == "read" and inherited.read) or (action == "write" and inherited.write):
+                return True
 
         # Check group permissions
-        for group in self.groups.values():
-            if self.local.user in group.members:
-                if action == "read" and group.read:
-                    return True
-                if action == "write" and group.write:
-                    return True
+        return bool(self._group_mask(user) & ACTION_BITS.get(action, 0))
 
-        raise PermissionError(f"{action.capitalize()} permission denied")
+    def _group_mask(self, user: str) -> int:
+        # The acting user's mask is cached on its session
+        if user == self.local.user:
+            return self.local.group_mask(self.group_index)
+        return self.group_index.mask(user)
+
+    """Inheritable ACL entries that apply to a node"""
+    def _inherited_acl(self, node: FileSystemNode) -> Dict[str, Permission]:
+        directory = node if node.is_directory else node.parent
+        if directory is None:
+            return {}
+        return self._resolve_directory_acl(directory)
 
-    """Recursively remove user's permissions from root node and its children"""
+    """Inheritable ACL in effect at a directory, merged down the parent chain (nearest entry wins).
+    Results are cached per directory against the global version, which moves whenever an
+    inheritable entry changes or a subtree is re-parented."""
+    def _resolve_directory_acl(self, directory: FileSystemNode) -> Dict[str, Permission]:
+        version = self.local.perm_version
+        chain = []
+        resolved = {}
+        current = directory
+        while current is not None:
+            entry = self._resolved.get(id(current))
+            if entry is not None and entry[1] == version and entry[0]() is current:
+                resolved = entry[2]
+                break
+            chain.append(current)
+            current = current.parent
+
+        if len(self._resolved) + len(chain) > self.CACHE_LIMIT:
+            self._resolved.clear()
+        for current in reversed(chain):
+            # Directories without entries share their parent's resolved dict
+            if current.inheritable_permissions:
+                resolved = {**resolved, **current.inheritable_permissions}
+            self._resolved[id(current)] = (weakref.ref(current), version, resolved)
+        return resolved
+
+    """Remove a user's ACL entries from every node that carries one"""
     def remove_user_permissions(self, username: str):
-        self._remove_user_permissions_recursive(self.root, username)
+        for node in self.local.acl_index.pop_user(username):
+            # Replaced rather than mutated, as in set_permissions
+            if username in node.permissions:
+                node.permissions = {user: perm for user, perm in node.permissions.items() if user != username}
+                node.perm_version += 1
+            if username in node.inheritable_permissions:
+                node.inheritable_permissions = {user: perm for user, perm in node.inheritable_permissions.items()
+                                                if user != username} or EMPTY_ACL
+                self.local.invalidate_permissions()
 
-    """Helper method to recursively remove user's permissions"""
-    def _remove_user_permissions_recursive(self, node: FileSystemNode, username: str):
-        if node.permissions and username in node.permissions:
-            del node.permissions[username]
-            
-        if node.is_directory and node.children:
-            for child in node.children.values():
-                self._remove_user_permissions_recursive(child, username)
+    """Paths of attached nodes with a direct or inheritable ACL entry for a user"""
+    def list_user_permissions(self, username: str) -> Dict[str, Permission]:
+        result = {}
+        for node in self.local.acl_index.nodes_for(username):
+            perm = node.permissions.get(username) or node.inheritable_permissions.get(username)
+            top = node
+            while top.parent is not None:
+                top = top.parent
+            if perm is None or top is not self.root:
+                # Stale entry: the ACL was removed or the node left the tree
+                self.local.acl_index.discard(username, node)
+                continue
+            result[node_path(node)] = perm
+        return dict(sorted(result.items()))
 
     """Check if current user is admin"""
     def _check_admin(self):
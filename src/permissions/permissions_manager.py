@@ -1,9 +1,13 @@
-from src.utils.models import Permission, FileSystemNode, LocalState
-from typing import Dict
+import copy
+from src.utils.models import Permission, FileSystemNode, LocalState, intern_permission
+from typing import Dict, List
 from .user_operations import UserOperations
 from .group_operations import GroupOperations, PermissionGroup
+from .group_index import GroupIndex
 from .node_permissions import NodePermissions
+from src.utils.metrics import instrumented, not_instrumented
 
+@instrumented
 class PermissionManager:
     def __init__(self, root_node: FileSystemNode, local: LocalState, admin_password: str = "admin123"):
         # Initialize state
@@ -21,10 +25,24 @@ class PermissionManager:
             self.groups["admins"] = PermissionGroup("admins", read=True, write=True)
             self.groups["admins"].members.add("admin")
 
-        # Initialize operations
+        # Initialize operations (group ops and node perms share one user->groups index)
+        self.group_index = GroupIndex(self.groups)
         self.user_ops = UserOperations(self.users, self.local)
-        self.group_ops = GroupOperations(self.groups, self.users, self.local)
-        self.node_perms = NodePermissions(self.root, self.local, self.users, self.groups)
+        self.group_ops = GroupOperations(self.groups, self.users, self.local, self.group_index)
+        self.node_perms = NodePermissions(self.root, self.local, self.users, self.groups, self.group_index)
+
+    """A lightweight view of this manager acting for one session. Users, groups,
+    the group index and the permission caches are shared, nothing is copied."""
+    @not_instrumented
+    def for_session(self, session) -> 'PermissionManager':
+        view = copy.copy(self)
+        view.local = session
+        view.user_ops = copy.copy(self.user_ops)
+        view.user_ops.local = session
+        view.group_ops = copy.copy(self.group_ops)
+        view.group_ops.local = session
+        view.node_perms = self.node_perms.for_session(session)
+        return view
 
     # User operations
     """Create a new user (admin only)"""
@@ -36,6 +54,7 @@ class PermissionManager:
         self.user_ops.delete_user(username)
         self.group_ops.remove_user_from_all_groups(username)
         self.node_perms.remove_user_permissions(username)
+        self.local.invalidate_permissions()
 
     """Login as a user"""
     def login(self, username: str, password: str) -> Permission:
@@ -65,19 +84,41 @@ class PermissionManager:
 
     # Node permission operations
     """Set direct permissions for a node (admin only)"""
-    def set_permissions(self, name: str, target_user: str, read: str = None, write: str = None):
+    def set_permissions(self, name: str, target_user: str, read: str = None, write: str = None,
+                        inherit: bool = False):
         node = self._get_or_create_node_in_cwd(name)
-        self.node_perms.set_permissions(node, target_user, read, write)
+        self.node_perms.set_permissions(node, target_user, read, write, inherit)
 
     """List permissions for a node"""
     def list_permissions(self, name: str) -> Dict[str, Permission]:
         node = self._get_or_create_node_in_cwd(name)
         return self.node_perms.list_permissions(node)
 
+    """List permissions for every entry of a directory (defaults to the current directory)"""
+    def list_permissions_many(self, name: str = None) -> Dict[str, Dict[str, Permission]]:
+        directory = self.local.cwd if not name else self.local.cwd.children.get(name)
+        if directory is None:
+            raise ValueError(f"{name} not found")
+        return self.node_perms.list_permissions_many(directory)
+
+    """Effective permissions for each (key, node) pair, see NodePermissions.iter_permissions"""
+    def iter_permissions(self, entries):
+        return self.node_perms.iter_permissions(entries)
+
+    """List the nodes a user has direct permissions on, by path"""
+    def list_user_permissions(self, username: str) -> Dict[str, Permission]:
+        if username not in self.users:
+            raise ValueError(f"User {username} not found")
+        return self.node_perms.list_user_permissions(username)
+
     """Check if current user has permission for an action"""
     def check_permission(self, node, action: str) -> bool:
         return self.node_perms.check_permission(node, action)
 
+    """Nodes the current user may read, without raising per denied node"""
+    def filter_readable(self, nodes) -> List[FileSystemNode]:
+        return self.node_perms.filter_readable(nodes)
+
     """Helper to get or create a node by name from current directory"""
     def _get_or_create_node_in_cwd(self, name: str) -> FileSystemNode:
         if not self.local.cwd:
@@ -86,6 +127,8 @@ class PermissionManager:
         if not node:
             node = FileSystemNode(name, owner=self.local.user)
             node.parent = self.local.cwd
-            node.permissions[self.local.user] = Permission(owner=self.local.user, read=True, write=True)
-            self.local.cwd.children[name] = node
+            node.permissions[self.local.user] = intern_permission(owner=self.local.user, read=True, write=True)
+            self.local.acl_index.add(self.local.user, node)
+            with self.local.snapshots.mutation(self.local.cwd):
+                self.local.cwd.children[name] = node
         return node 
\ No newline at end of file
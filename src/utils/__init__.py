@@ -6,4 +6,6 @@ from .path_utils import (
     normalize_path,
     get_parent_path,
     get_basename,
+    node_path,
+    node_depth,
 ) 
\ No newline at end of file
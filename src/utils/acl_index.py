@@ -0,0 +1,49 @@
+from typing import Dict, Set
+
+class AclIndex:
+    """Reverse index from user to the nodes that carry an ACL entry for them, direct
+    (node.permissions) or inheritable (a directory's inheritable_permissions)"""
+
+    def __init__(self):
+        self.entries: Dict[str, Set] = {}  # username -> set of FileSystemNode
+
+    def add(self, username: str, node):
+        self.entries.setdefault(username, set()).add(node)
+
+    def discard(self, username: str, node):
+        nodes = self.entries.get(username)
+        if nodes is not None:
+            nodes.discard(node)
+            if not nodes:
+                del self.entries[username]
+
+    def discard_subtree(self, root):
+        """Drop the entries of a removed node and everything below it"""
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            for username in (*node.permissions, *node.inheritable_permissions):
+                self.discard(username, node)
+            if node.is_directory:
+                stack.extend(node.children.values())
+
+    def nodes_for(self, username: str) -> Set:
+        """Nodes with an ACL entry for a user (nodes detached without discard_subtree may remain)"""
+        return set(self.entries.get(username, ()))
+
+    def pop_user(self, username: str) -> Set:
+        """Forget a user and return the nodes that referenced them"""
+        return self.entries.pop(username, set())
+
+    def rebuild(self, root):
+        """Rebuild the index by walking the tree iteratively"""
+        self.entries = {}
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            for username in node.permissions:
+                self.add(username, node)
+            for username in node.inheritable_permissions:
+                self.add(username, node)
+            if node.is_directory:
+                stack.extend(node.children.values())
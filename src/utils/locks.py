@@ -0,0 +1,295 @@
+"""Lock primitives used by filesystem nodes.
+
+Nodes get their lock from new_lock(). Normally that is a plain RWLock; after
+enable_lock_stats() (or with INMEMORY_FS_LOCK_STATS=1 in the environment) nodes
+created or loaded from then on get an InstrumentedRWLock, which records wait
+time, hold time and contention per lock site. A site is the operation named at
+the ``with node.lock.read("ls"):`` call plus the node the lock belongs to, and
+lock_report() ranks directories by the time threads spent waiting on them.
+
+Waits only happen between threads of one process: AsyncFileSystem workers, or
+library code calling the operations from its own threads. fs-server runs one
+command at a time, so under it the report shows acquisitions and hold times per
+site, and contention stays at zero.
+"""
+import os
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+
+LOCK_STATS_ENV = "INMEMORY_FS_LOCK_STATS"
+
+
+# Mutexes guarding RWLock state, shared by stripe: a node's lock costs a few slots
+# rather than its own mutex, condition variable and reader table
+_STRIPES = tuple(threading.Lock() for _ in range(64))
+
+
+class RWLock:
+    """Reentrant reader-writer lock with writer preference.
+
+    Any number of threads may hold the lock shared (``with lock.read():``) while
+    no writer holds it. A writer (``with lock.write():`` or plain ``with lock:``)
+    gets exclusive access. New readers queue behind waiting writers, so a steady
+    stream of reads cannot starve mutations. A thread that already holds the lock
+    may re-acquire it in either mode, except that upgrading a shared hold to an
+    exclusive one while other readers are active blocks until they leave.
+
+    Every node has one, so idle locks are kept small: state changes happen under
+    a mutex from _STRIPES, the condition variable is created the first time a
+    thread has to wait, and the per-thread reader table only exists while the
+    lock is held shared.
+    """
+    __slots__ = ("_mutex", "_cond", "_readers", "_reader_counts", "_writer", "_write_depth",
+                 "_waiting_writers")
+
+    def __init__(self):
+        self._mutex = _STRIPES[(id(self) >> 4) % len(_STRIPES)]
+        self._cond = None  # threading.Condition over _mutex, once a thread had to wait
+        self._readers = 0  # total shared holds across threads
+        self._reader_counts = None  # thread ident -> shared hold depth, while held shared
+        self._writer = None  # ident of the thread holding the lock exclusively
+        self._write_depth = 0
+        self._waiting_writers = 0
+
+    def _wait(self):
+        # Called with _mutex held; waiters and notifiers share it, so no wakeup is lost
+        cond = self._cond
+        if cond is None:
+            cond = self._cond = threading.Condition(self._mutex)
+        cond.wait()
+
+    def _notify(self):
+        if self._cond is not None:
+            self._cond.notify_all()
+
+    def acquire_read(self):
+        me = threading.get_ident()
+        with self._mutex:
+            counts = self._reader_counts
+            held = counts.get(me, 0) if counts else 0
+            waited = False
+            if self._writer != me and not held:
+                while self._writer is not None or self._waiting_writers:
+                    waited = True
+                    self._wait()
+            counts = self._reader_counts
+            if counts is None:
+                counts = self._reader_counts = {}
+            counts[me] = held + 1
+            self._readers += 1
+            return waited
+
+    def release_read(self):
+        me = threading.get_ident()
+        with self._mutex:
+            counts = self._reader_counts
+            held = counts.get(me, 0) if counts else 0
+            if not held:
+                raise RuntimeError("Cannot release a read lock that is not held")
+            if held > 1:
+                counts[me] = held - 1
+            elif len(counts) == 1:
+                self._reader_counts = None
+            else:
+                del counts[me]
+            self._readers -= 1
+            if self._readers == 0 or self._waiting_writers:
+                self._notify()
+
+    def acquire_write(self):
+        me = threading.get_ident()
+        with self._mutex:
+            if self._writer == me:
+                self._write_depth += 1
+                return False
+            waited = False
+            self._waiting_writers += 1
+            try:
+                while self._writer is not None or self._readers - self._own_reads(me):
+                    waited = True
+                    self._wait()
+            finally:
+                self._waiting_writers -= 1
+            self._writer = me
+            self._write_depth = 1
+            return waited
+
+    def _own_reads(self, me) -> int:
+        counts = self._reader_counts
+        return counts.get(me, 0) if counts else 0
+
+    def release_write(self):
+        with self._mutex:
+            if self._writer != threading.get_ident():
+                raise RuntimeError("Cannot release a write lock that is not held")
+            self._write_depth -= 1
+            if self._write_depth == 0:
+                self._writer = None
+                self._notify()
+
+    @contextmanager
+    def read(self, site: str = None):
+        """Hold the lock shared for the duration of the block. site names the
+        operation taking the lock for InstrumentedRWLock and is ignored here."""
+        self.acquire_read()
+        try:
+            yield self
+        finally:
+            self.release_read()
+
+    @contextmanager
+    def write(self, site: str = None):
+        """Hold the lock exclusively for the duration of the block"""
+        self.acquire_write()
+        try:
+            yield self
+        finally:
+            self.release_write()
+
+    # Plain acquire/release and ``with lock:`` are exclusive, like the RLock this replaces
+    def acquire(self):
+        self.acquire_write()
+        return True
+
+    def release(self):
+        self.release_write()
+
+    def __enter__(self):
+        self.acquire_write()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release_write()
+
+
+class SiteStats:
+    """Acquisitions of one lock from one site"""
+    __slots__ = ("acquisitions", "contended", "wait_ns", "max_wait_ns", "hold_ns", "max_hold_ns")
+
+    def __init__(self):
+        self.acquisitions = self.contended = 0
+        self.wait_ns = self.max_wait_ns = self.hold_ns = self.max_hold_ns = 0
+
+    def add(self, other: 'SiteStats'):
+        self.acquisitions += other.acquisitions
+        self.contended += other.contended
+        self.wait_ns += other.wait_ns
+        self.hold_ns += other.hold_ns
+        self.max_wait_ns = max(self.max_wait_ns, other.max_wait_ns)
+        self.max_hold_ns = max(self.max_hold_ns, other.max_hold_ns)
+
+    def summary(self) -> dict:
+        return {
+            "acquisitions": self.acquisitions,
+            "contended": self.contended,
+            "wait_ms": self.wait_ns / 1e6,
+            "max_wait_ms": self.max_wait_ns / 1e6,
+            "hold_ms": self.hold_ns / 1e6,
+            "max_hold_ms": self.max_hold_ns / 1e6,
+        }
+
+
+class InstrumentedRWLock(RWLock):
+    """RWLock that records, per site, how often it was taken, how often a thread had
+    to wait for it, and the time spent waiting for and holding it"""
+
+    def __init__(self, node=None):
+        super().__init__()
+        self._node = weakref.ref(node) if node is not None else None
+        self._stats_lock = threading.Lock()
+        self.sites = {}  # site -> SiteStats
+        _instrumented_locks.add(self)
+
+    @property
+    def node(self):
+        return self._node() if self._node is not None else None
+
+    def _record(self, site, waited: bool, wait_ns: int, hold_ns: int):
+        with self._stats_lock:
+            stats = self.sites.get(site)
+            if stats is None:
+                stats = self.sites[site] = SiteStats()
+            stats.acquisitions += 1
+            stats.contended += waited
+            stats.wait_ns += wait_ns
+            stats.hold_ns += hold_ns
+            if wait_ns > stats.max_wait_ns:
+                stats.max_wait_ns = wait_ns
+            if hold_ns > stats.max_hold_ns:
+                stats.max_hold_ns = hold_ns
+
+    @contextmanager
+    def read(self, site: str = None):
+        start = time.perf_counter_ns()
+        waited = self.acquire_read()
+        acquired = time.perf_counter_ns()
+        try:
+            yield self
+        finally:
+            self.release_read()
+            self._record(site or "read", waited, acquired - start, time.perf_counter_ns() - acquired)
+
+    @contextmanager
+    def write(self, site: str = None):
+        start = time.perf_counter_ns()
+        waited = self.acquire_write()
+        acquired = time.perf_counter_ns()
+        try:
+            yield self
+        finally:
+            self.release_write()
+            self._record(site or "write", waited, acquired - start, time.perf_counter_ns() - acquired)
+
+
+_instrumented_locks = weakref.WeakSet()
+_lock_stats = False
+
+def new_lock(node=None) -> RWLock:
+    """The lock for a new (or unpickled) node"""
+    return InstrumentedRWLock(node) if _lock_stats else RWLock()
+
+def enable_lock_stats():
+    """Give nodes created or loaded from now on instrumented locks"""
+    global _lock_stats
+    _lock_stats = True
+
+def lock_stats_enabled() -> bool:
+    return _lock_stats
+
+def reset_lock_stats():
+    for lock in list(_instrumented_locks):
+        with lock._stats_lock:
+            lock.sites.clear()
+
+def lock_report(top: int = 10) -> list:
+    """The top directories by total wait time (then contention and hold time). A file's
+    lock counts towards its directory. Each entry has the directory path, its totals
+    and a per-site breakdown (sites of file locks are suffixed with ':file')."""
+    from src.utils.path_utils import node_path
+    directories = {}
+    for lock in list(_instrumented_locks):
+        node = lock.node
+        with lock._stats_lock:
+            sites = list(lock.sites.items())
+        if node is None or not sites:
+            continue
+        suffix = ""
+        if not node.is_directory:
+            node, suffix = node.parent, ":file"
+            if node is None:
+                continue
+        total, by_site = directories.setdefault(id(node), (node, SiteStats(), {}))[1:]
+        for site, stats in sites:
+            total.add(stats)
+            by_site.setdefault(site + suffix, SiteStats()).add(stats)
+
+    ranked = sorted(directories.values(), key=lambda entry: (entry[1].wait_ns, entry[1].contended, entry[1].hold_ns),
+                    reverse=True)
+    return [{"path": node_path(node), **total.summary(),
+             "sites": {site: stats.summary() for site, stats in sorted(by_site.items())}}
+            for node, total, by_site in ranked[:top]]
+
+if os.environ.get(LOCK_STATS_ENV):
+    enable_lock_stats()
@@ -0,0 +1,131 @@
+"""Memory accounting for the in-memory tree.
+
+memory_usage() walks a subtree iteratively and adds up sys.getsizeof of what each
+node keeps alive, split into five categories:
+
+    nodes    the node object, its attribute dict, name, timestamps, tags and
+             children dict
+    content  file bodies
+    acl      the direct and inheritable ACL dicts (Permission values and the
+             shared EMPTY_ACL of nodes without inheritable entries are not
+             charged to any node)
+    locks    the node's lock, plus its condition variable once a thread has
+             had to wait for it
+    history  children dicts and file bodies kept on node.history for pinned
+             snapshots (see utils/snapshots.py), until the last reader unpins
+
+Totals are also broken down per immediate subdirectory and per owner. With
+readable (PermissionManager.filter_readable), children the caller may not read
+are skipped together with everything below them. For huge
+trees, sample=0.01 measures about 1% of the nodes (every node is still visited
+and counted) and scales the byte totals up, which is much faster and usually
+within a few percent.
+"""
+import random
+import sys
+from src.utils.models import EMPTY_ACL
+from src.utils.path_utils import node_path
+
+CATEGORIES = ("nodes", "content", "acl", "locks", "history")
+
+def _lock_size(lock) -> int:
+    getsizeof = sys.getsizeof
+    # The stripe mutex is shared, so an idle lock is just its slots
+    size = getsizeof(lock)
+    cond = lock._cond
+    if cond is not None:
+        # Created once a thread had to wait: bound acquire/release methods and a waiters deque
+        size += getsizeof(cond) + getsizeof(vars(cond)) + sum(
+            getsizeof(value) for name, value in vars(cond).items() if name != "_lock")
+    if lock._reader_counts:
+        size += getsizeof(lock._reader_counts)
+    extra = getattr(lock, "__dict__", None)  # InstrumentedRWLock bookkeeping
+    if extra is not None:
+        size += getsizeof(extra)
+        sites = extra.get("sites")
+        if sites:
+            size += getsizeof(sites) + len(sites) * 100
+    return size
+
+def _history_size(node) -> int:
+    history = node.history
+    if not history:
+        return 0
+    getsizeof = sys.getsizeof
+    size = getsizeof(history)
+    for entry in history:
+        _, _, children, content = entry
+        size += getsizeof(entry)
+        # Entries still shared with the live node are charged to nodes/content
+        if children is not node.children:
+            size += getsizeof(children)
+        if content and content is not node.content:
+            size += getsizeof(content)
+    return size
+
+def node_footprint(node) -> dict:
+    """Bytes per category held by one node (its children are not included)"""
+    getsizeof = sys.getsizeof
+    # Files carry an (empty) children dict too
+    nodes = (getsizeof(node) + getsizeof(vars(node)) + getsizeof(node.name) + getsizeof(node.tags)
+             + getsizeof(node.children) + getsizeof(node.created_at) + getsizeof(node.modified_at)
+             + getsizeof(node.accessed_at))
+    return {
+        "nodes": nodes,
+        "content": getsizeof(node.content) if node.content else 0,
+        "acl": getsizeof(node.permissions) + (0 if node.inheritable_permissions is EMPTY_ACL
+                                              else getsizeof(node.inheritable_permissions)),
+        "locks": _lock_size(node.lock),
+        "history": _history_size(node),
+    }
+
+def memory_usage(root, sample: float = 1.0, top: int = 10, seed: int = 0, readable=None) -> dict:
+    """Memory held by the subtree at root. Returns node counts, bytes per category
+    ("total" included), the top subdirectories and owners by bytes, and the fraction
+    of nodes actually measured. Byte figures are estimates when sample < 1. readable,
+    if given, filters each directory's children down to the ones to descend into."""
+    if not 0 < sample <= 1:
+        raise ValueError("sample must be in (0, 1]")
+    rng = random.Random(seed)
+    measured = 0
+    counts = {"files": 0, "directories": 0}
+    totals = dict.fromkeys(CATEGORIES, 0)
+    by_directory = {}
+    by_owner = {}
+
+    stack = [(root, None)]
+    while stack:
+        node, bucket = stack.pop()
+        counts["directories" if node.is_directory else "files"] += 1
+        if node.is_directory:
+            children = list(node.children.values())  # copied: the tree may change meanwhile
+            if readable is not None:
+                children = readable(children)
+            for child in children:
+                # Everything below an immediate subdirectory is charged to it
+                stack.append((child, bucket if bucket is not None else (child if child.is_directory else None)))
+        if sample < 1 and rng.random() >= sample:
+            continue
+        measured += 1
+        footprint = node_footprint(node)
+        size = sum(footprint.values())
+        for category, value in footprint.items():
+            totals[category] += value
+        if bucket is not None:
+            by_directory[bucket] = by_directory.get(bucket, 0) + size
+        by_owner[node.owner] = by_owner.get(node.owner, 0) + size
+
+    scale = 1 / sample
+    totals = {category: round(value * scale) for category, value in totals.items()}
+    totals["total"] = sum(totals.values())
+    directories = sorted(by_directory.items(), key=lambda item: item[1], reverse=True)[:top]
+    owners = sorted(by_owner.items(), key=lambda item: item[1], reverse=True)[:top]
+    return {
+        "path": node_path(root),
+        "nodes": counts["files"] + counts["directories"],
+        **counts,
+        "sampled": measured / max(1, counts["files"] + counts["directories"]),
+        "bytes": totals,
+        "by_directory": {node_path(node): round(size * scale) for node, size in directories},
+        "by_owner": {str(owner): round(size * scale) for owner, size in owners},
+    }
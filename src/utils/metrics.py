@@ -0,0 +1,255 @@
+"""Per-operation counters and latency histograms.
+
+Classes marked with @instrumented have their public methods timed while metrics
+are enabled: every call adds to the operation's count (and error count when it
+raises) and records its latency in a log-bucketed histogram. The wrappers are
+installed by enable() and removed again by disable(), so with metrics disabled
+(the default) the methods are the plain functions and cost nothing extra.
+Generator methods are left alone, since their work happens after the call, as
+are methods marked with @not_instrumented. Only the outermost call of a method
+name is recorded on each thread, so an override delegating to its base method
+(FileOperations.move -> NodeOperations.move) counts once, under the override.
+
+Metrics are per process: they are most useful in fs-server (--stats) and in
+`fs shell`, and can be switched on for any process with INMEMORY_FS_STATS=1.
+With enable(track_allocations=True) (INMEMORY_FS_STATS=alloc) tracemalloc runs
+as well and every call also records how much traced memory grew while it ran.
+This is net growth across all threads, so concurrent operations blur it.
+
+    from src.utils import metrics
+    metrics.enable()
+    ...
+    metrics.snapshot()["FileOperations.read"]["p99_us"]
+    metrics.reset()
+"""
+import functools
+import inspect
+import os
+import threading
+import time
+import tracemalloc
+
+STATS_ENV = "INMEMORY_FS_STATS"
+
+class Histogram:
+    """HDR-style histogram of nanosecond values: each power of two is split into
+    SUB_BUCKETS linear buckets, so a recorded value is off by at most 1/SUB_BUCKETS."""
+    SUB_BITS = 3
+    SUB_BUCKETS = 1 << SUB_BITS
+
+    def __init__(self):
+        self.counts = []
+        self.total = 0
+
+    @classmethod
+    def index(cls, value: int) -> int:
+        if value < cls.SUB_BUCKETS:
+            return max(value, 0)
+        shift = value.bit_length() - cls.SUB_BITS - 1
+        return cls.SUB_BUCKETS * (shift + 1) + (value >> shift) - cls.SUB_BUCKETS
+
+    @classmethod
+    def upper_bound(cls, index: int) -> int:
+        """Largest value that falls into a bucket"""
+        if index < cls.SUB_BUCKETS:
+            return index
+        shift, sub = divmod(index - cls.SUB_BUCKETS, cls.SUB_BUCKETS)
+        return ((cls.SUB_BUCKETS + sub + 1) << shift) - 1
+
+    def record(self, value: int):
+        index = self.index(value)
+        if index >= len(self.counts):
+            self.counts.extend([0] * (index + 1 - len(self.counts)))
+        self.counts[index] += 1
+        self.total += 1
+
+    def percentile(self, fraction: float) -> int:
+        """Upper bound of the bucket holding the given fraction of values (0 when empty)"""
+        if not self.total:
+            return 0
+        target = max(1, round(fraction * self.total))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return self.upper_bound(index)
+        return self.upper_bound(len(self.counts) - 1)
+
+    def buckets(self):
+        """(upper bound, count) of the non-empty buckets"""
+        return [(self.upper_bound(index), count) for index, count in enumerate(self.counts) if count]
+
+
+class OperationStats:
+    """Count, errors and latency histogram of one operation"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.errors = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        self.histogram = Histogram()
+        self.alloc_calls = 0
+        self.alloc_bytes = 0  # net growth of traced memory over those calls
+
+    def record_allocation(self, growth: int):
+        with self.lock:
+            self.alloc_calls += 1
+            self.alloc_bytes += growth
+
+    def record(self, elapsed_ns: int, failed: bool):
+        with self.lock:
+            self.count += 1
+            self.errors += failed
+            self.total_ns += elapsed_ns
+            if elapsed_ns > self.max_ns:
+                self.max_ns = elapsed_ns
+            self.histogram.record(elapsed_ns)
+
+    def summary(self) -> dict:
+        with self.lock:
+            histogram = self.histogram
+            # Bucket bounds can overshoot the largest value actually seen
+            percentile = lambda fraction: min(histogram.percentile(fraction), self.max_ns) / 1000
+            allocations = {"alloc_bytes": self.alloc_bytes} if self.alloc_calls else {}
+            return {**allocations,
+                "count": self.count,
+                "errors": self.errors,
+                "mean_us": self.total_ns / self.count / 1000 if self.count else 0.0,
+                "p50_us": percentile(0.5),
+                "p90_us": percentile(0.9),
+                "p99_us": percentile(0.99),
+                "max_us": self.max_ns / 1000,
+                "histogram": [(upper / 1000, count) for upper, count in histogram.buckets()],
+            }
+
+
+_lock = threading.Lock()
+_classes = []     # classes marked with @instrumented
+_originals = {}   # (class, method name) -> original function, while enabled
+_stats = {}       # operation name -> OperationStats
+enabled = False
+tracking_allocations = False
+_started_tracemalloc = False  # stopped again by disable()
+_running = threading.local()  # .names: instrumented method names being called on this thread
+
+def instrumented(cls):
+    """Class decorator: time the public methods of cls while metrics are enabled"""
+    with _lock:
+        _classes.append(cls)
+        if enabled:
+            _wrap_class(cls)
+    return cls
+
+def not_instrumented(function):
+    """Method decorator: leave this method of an @instrumented class untimed"""
+    function.not_instrumented = True
+    return function
+
+def enable(track_allocations: bool = False):
+    """Start recording (installs the wrappers). track_allocations also starts
+    tracemalloc and records the traced memory growth of every call."""
+    global enabled, tracking_allocations, _started_tracemalloc
+    if enabled and tracking_allocations != track_allocations:
+        disable()
+    with _lock:
+        if not enabled:
+            if track_allocations and not tracemalloc.is_tracing():
+                tracemalloc.start()
+                _started_tracemalloc = True
+            enabled = True
+            tracking_allocations = track_allocations
+            for cls in _classes:
+                _wrap_class(cls)
+
+def disable():
+    """Stop recording and restore the plain methods (and stop tracemalloc if enable()
+    started it); recorded values are kept"""
+    global enabled, _started_tracemalloc
+    with _lock:
+        if enabled:
+            enabled = False
+            for (cls, name), function in _originals.items():
+                setattr(cls, name, function)
+            _originals.clear()
+            if _started_tracemalloc:
+                tracemalloc.stop()
+                _started_tracemalloc = False
+
+def snapshot() -> dict:
+    """Summary per operation name ("Class.method"): count, errors, mean/p50/p90/p99/max
+    latency in microseconds and the non-empty histogram buckets"""
+    with _lock:
+        items = sorted(_stats.items())
+    return {name: stats.summary() for name, stats in items if stats.count}
+
+def reset():
+    """Forget everything recorded so far"""
+    with _lock:
+        stats = list(_stats.values())
+    for operation in stats:
+        with operation.lock:
+            operation.reset()
+
+def _wrap_class(cls):
+    for name, function in list(vars(cls).items()):
+        if (name.startswith("_") or not inspect.isfunction(function) or inspect.isgeneratorfunction(function)
+                or getattr(function, "not_instrumented", False)):
+            continue
+        _originals[(cls, name)] = function
+        stats = _stats.setdefault(f"{cls.__name__}.{name}", OperationStats())
+        recorded = (_traced if tracking_allocations else _timed)(function, stats)
+        setattr(cls, name, _outermost(name, function, recorded))
+
+def _outermost(name: str, function, recorded):
+    """Call recorded, or the plain function when a call of the same name is already
+    being recorded on this thread (an override calling super())"""
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        try:
+            names = _running.names
+        except AttributeError:
+            names = _running.names = set()
+        if name in names:
+            return function(*args, **kwargs)
+        names.add(name)
+        try:
+            return recorded(*args, **kwargs)
+        finally:
+            names.discard(name)
+    return wrapper
+
+def _timed(function, stats: OperationStats):
+    clock = time.perf_counter_ns
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        start = clock()
+        failed = True
+        try:
+            result = function(*args, **kwargs)
+            failed = False
+            return result
+        finally:
+            stats.record(clock() - start, failed)
+    return wrapper
+
+def _traced(function, stats: OperationStats):
+    timed = _timed(function, stats)
+    traced_memory = tracemalloc.get_traced_memory
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        before = traced_memory()[0]
+        try:
+            return timed(*args, **kwargs)
+        finally:
+            stats.record_allocation(traced_memory()[0] - before)
+    return wrapper
+
+if os.environ.get(STATS_ENV):
+    enable(track_allocations=os.environ[STATS_ENV] == "alloc")
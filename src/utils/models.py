@@ -1,14 +1,50 @@
+import itertools
 import threading
 from datetime import datetime
-from typing import Dict, Optional, Set
+from types import MappingProxyType
+from typing import ClassVar, Dict, Mapping, Optional, Set
 from dataclasses import dataclass, field
+from src.utils.acl_index import AclIndex
+from src.utils.locks import RWLock, new_lock
+from src.utils.snapshots import SnapshotManager
 
-@dataclass
+# Bits used for compact read/write masks
+PERM_READ = 1
+PERM_WRITE = 2
+ACTION_BITS = {"read": PERM_READ, "write": PERM_WRITE}
+
+@dataclass(frozen=True)
 class Permission:
+    """Immutable permission value. Use intern_permission() to share one instance
+    per distinct value; changes are made by replacing the entry (copy-on-write)."""
     owner: str = None
     group: str = None
     read: bool = True
     write: bool = False
+    bits: int = field(init=False, repr=False, compare=False)  # PERM_READ/PERM_WRITE mask
+
+    def __post_init__(self):
+        object.__setattr__(self, 'bits', (PERM_READ if self.read else 0) | (PERM_WRITE if self.write else 0))
+
+    def __reduce__(self):
+        # Re-intern on unpickle so loaded states share instances too
+        return (intern_permission, (self.owner, self.group, self.read, self.write))
+
+_interned_permissions: Dict[tuple, Permission] = {}
+_intern_lock = threading.Lock()
+
+def intern_permission(owner: str = None, group: str = None, read: bool = True, write: bool = False) -> Permission:
+    """Return the shared Permission instance for a value"""
+    key = (owner, group, bool(read), bool(write))
+    perm = _interned_permissions.get(key)
+    if perm is None:
+        with _intern_lock:
+            perm = _interned_permissions.setdefault(key, Permission(*key))
+    return perm
+
+# Shared read-only stand-in for the inheritable ACL of the (many) nodes without one.
+# set_permissions(..., inherit=True) replaces it with a real dict.
+EMPTY_ACL: Mapping[str, Permission] = MappingProxyType({})
 
 class FileType:
     REGULAR = "regular"
@@ -16,7 +52,7 @@ class FileType:
     SYMLINK = "symlink"
     EXECUTABLE = "executable"
 
-@dataclass
+@dataclass(eq=False)  # Nodes compare and hash by identity
 class FileSystemNode:
     name: str
     is_directory: bool = False
@@ -26,32 +62,47 @@ class FileSystemNode:
     children: Dict[str, 'FileSystemNode'] = field(default_factory=dict)
     content: str = ""
     size: int = 0
-    lock: threading.RLock = field(default_factory=threading.RLock)
+    lock: RWLock = None  # from new_lock() in __post_init__
     group: Optional[str] = None
     permissions: Dict[str, Permission] = field(default_factory=dict)
+    # Directory ACL entries that also apply to everything below the directory
+    inheritable_permissions: Mapping[str, Permission] = field(default_factory=lambda: EMPTY_ACL)
     created_at: datetime = field(default_factory=datetime.now)
     modified_at: datetime = field(default_factory=datetime.now)
     accessed_at: datetime = field(default_factory=datetime.now)
     target_path: Optional[str] = None
     tags: Set[str] = field(default_factory=set)
     mime_type: Optional[str] = None
-    perms: Permission = field(default_factory=Permission)
+    perms: Permission = field(default_factory=intern_permission)
+    # Class-level defaults, so a node only stores these once they change
+    perm_version: ClassVar[int] = 0  # Bumped whenever this node's ACL changes
+    # Runtime-only snapshot bookkeeping (see SnapshotManager), never pickled
+    changed_at: ClassVar[int] = 0
+    history: ClassVar[Optional[list]] = None
 
     def __post_init__(self):
+        if self.lock is None:
+            self.lock = new_lock(self)
         self.file_type = FileType.DIRECTORY if self.is_directory else FileType.REGULAR
         if not self.is_directory:
             self.content = "" if self.content is None else self.content
 
     def __getstate__(self):
         state = self.__dict__.copy()
-        # Don't pickle the lock
+        # Don't pickle the lock or snapshot bookkeeping
         del state['lock']
+        state.pop('changed_at', None)
+        state.pop('history', None)
+        if not state.get('inheritable_permissions'):
+            del state['inheritable_permissions']  # EMPTY_ACL is restored on load
         return state
 
     def __setstate__(self, state):
+        if not state.get('inheritable_permissions'):
+            state['inheritable_permissions'] = EMPTY_ACL
         self.__dict__.update(state)
         # Recreate the lock
-        self.lock = threading.RLock()
+        self.lock = new_lock(self)
 
     def add_child(self, child: 'FileSystemNode'):
         """Add a child node and set its parent"""
@@ -72,13 +123,17 @@ class LocalState:
         self.user = user
         self.users = {"admin": "admin123"}  # username -> password
         self.groups = {}  # groupname -> PermissionGroup
+        self._reset_perm_version()
+        self.snapshots = SnapshotManager()
         
         # Initialize root node if not provided
         if not cwd:
             root = FileSystemNode("/", owner="admin", is_directory=True)
-            root.permissions["admin"] = Permission(owner="admin", read=True, write=True)
+            root.permissions["admin"] = intern_permission(owner="admin", read=True, write=True)
             self.root = root
             self.cwd = root
+            self.acl_index = AclIndex()
+            self.acl_index.add("admin", root)
         else:
             # Find the root node by traversing up from cwd
             current = cwd
@@ -86,25 +141,30 @@ class LocalState:
                 current = current.parent
             self.root = current
             self.cwd = cwd
+            self.acl_index = AclIndex()
+            self.acl_index.rebuild(self.root)
 
     def __getstate__(self):
+        # root before cwd, so a snapshot dump reaches every node through the tree
         return {
             'user': self.user,
-            'cwd': self.cwd,
             'root': self.root,
+            'cwd': self.cwd,
             'users': self.users,
-            'groups': self.groups
+            'groups': self.groups,
         }
 
     def __setstate__(self, state):
         self.user = state['user']
         self.users = state['users']
         self.groups = state['groups']
+        self._reset_perm_version()
+        self.snapshots = SnapshotManager()
         
         # Initialize root node if not present
         if 'root' not in state or not state['root']:
             self.root = FileSystemNode("/", owner="admin", is_directory=True)
-            self.root.permissions["admin"] = Permission(owner="admin", read=True, write=True)
+            self.root.permissions["admin"] = intern_permission(owner="admin", read=True, write=True)
             self.cwd = self.root
         else:
             self.root = state['root']
@@ -120,4 +180,79 @@ class LocalState:
                         # If we can't find a path to root, reset to root
                         self.cwd = self.root
                         break
-                    current = current.parent
\ No newline at end of file
+                    current = current.parent
+
+        # The index is derived from the tree, so it is rebuilt instead of pickled
+        self.acl_index = AclIndex()
+        self.acl_index.rebuild(self.root)
+
+    def invalidate_permissions(self):
+        """Invalidate cached permission decisions for every node"""
+        self.perm_version = next(self._perm_versions)
+
+    def session(self, user: str = None, cwd: 'FileSystemNode' = None) -> 'Session':
+        """A new session over this state (default: the current user, starting at the root)"""
+        return Session(self, user or self.user, cwd)
+
+    def group_mask(self, group_index) -> int:
+        """Group read/write bits of the current user"""
+        return group_index.mask(self.user)
+
+    def _reset_perm_version(self):
+        # Runtime-only counter, never pickled
+        self._perm_versions = itertools.count(1)
+        self.perm_version = 0
+
+
+class Session:
+    """One logical client of a shared LocalState.
+
+    A session owns only its user, its cwd and a cached group permission mask; the
+    tree, users, groups, ACL index, snapshots and permission version are read
+    through to the shared state, so any number of sessions can work on one
+    instance without copying. Operation classes accept a session wherever they
+    accept a LocalState.
+    """
+
+    def __init__(self, state: LocalState, user: str = "admin", cwd: FileSystemNode = None):
+        self.state = state
+        self.user = user
+        self.cwd = cwd or state.root
+        self._mask = None  # (perm_version, user, mask)
+
+    @property
+    def root(self) -> FileSystemNode:
+        return self.state.root
+
+    @property
+    def users(self) -> Dict[str, str]:
+        return self.state.users
+
+    @property
+    def groups(self) -> dict:
+        return self.state.groups
+
+    @property
+    def acl_index(self) -> AclIndex:
+        return self.state.acl_index
+
+    @property
+    def snapshots(self) -> SnapshotManager:
+        return self.state.snapshots
+
+    @property
+    def perm_version(self) -> int:
+        return self.state.perm_version
+
+    def invalidate_permissions(self):
+        self.state.invalidate_permissions()
+
+    def group_mask(self, group_index) -> int:
+        """Group read/write bits of the session user, cached until permissions change"""
+        version = self.state.perm_version
+        cached = self._mask
+        if cached is not None and cached[0] == version and cached[1] == self.user:
+            return cached[2]
+        mask = group_index.mask(self.user)
+        self._mask = (version, self.user, mask)
+        return mask
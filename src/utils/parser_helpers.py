@@ -1,8 +1,21 @@
 import argparse
 
+def _add_format_argument(parser):
+    parser.add_argument('--format', choices=['text', 'jsonl'], default=None,
+                        help="Output format: human-readable text (default) or one JSON record per line")
+
+def _add_profiling_arguments(parser):
+    parser.add_argument('--profile', metavar='FILE',
+                        help="Run the command under cProfile and dump the stats to FILE (see python -m pstats)")
+    parser.add_argument('--trace-alloc', metavar='N', type=int, nargs='?', const=10, default=0,
+                        help="Report the N source lines whose allocations grew most during the command (default: 10)")
+
+
 """Create a parser for the filesys CLI"""
 def create_filesys_parser():
-    parser = argparse.ArgumentParser(description="File System CLI")
+    parser = argparse.ArgumentParser(prog="fs", description="File System CLI")
+    _add_format_argument(parser)
+    _add_profiling_arguments(parser)
     subparsers = parser.add_subparsers(dest="command", help="Available commands")
     
     # Add arguments for each command
@@ -35,13 +48,52 @@ def create_filesys_parser():
     
     find_parser = subparsers.add_parser('find', help="Find files/directories by pattern")
     find_parser.add_argument('pattern', help="Pattern to search for (supports glob patterns like *.txt)")
-    
+
+    batch_parser = subparsers.add_parser('batch', help="Apply touch/write operations read from stdin, one per line")
+    batch_parser.add_argument('--atomic', action='store_true',
+                              help="Apply all lines in one transaction; also allows mkdir and set-perms lines")
+
+    import_parser = subparsers.add_parser('import', help="Copy a directory tree from the host into the filesystem")
+    import_parser.add_argument('host_dir', help="Directory on the host to read")
+    import_parser.add_argument('fs_path', help="New directory to create in the filesystem")
+    import_parser.add_argument('--workers', type=int, help="Threads reading file contents (default: 4 per CPU, at most 32)")
+
+    export_tar_parser = subparsers.add_parser('export-tar', help="Write a subtree as a tar archive")
+    export_tar_parser.add_argument('path', help="File or directory to export")
+    export_tar_parser.add_argument('-f', '--file', default='-', help="Archive to write (default: stdout)")
+    export_tar_parser.add_argument('-z', '--gzip', action='store_true', help="Compress the archive with gzip")
+
+    import_tar_parser = subparsers.add_parser('import-tar', help="Unpack a tar archive into a directory")
+    import_tar_parser.add_argument('path', nargs='?', default='.', help="Existing directory to unpack into (default: current)")
+    import_tar_parser.add_argument('-f', '--file', default='-', help="Archive to read, plain or compressed (default: stdin)")
+
+    stats_parser = subparsers.add_parser('stats', help="Show per-operation counts and latency percentiles")
+    stats_parser.add_argument('--reset', action='store_true', help="Clear the statistics after showing them")
+
+    locks_parser = subparsers.add_parser('locks', help="Show the directories whose locks threads waited on longest")
+    locks_parser.add_argument('--top', type=int, default=10, help="Number of directories to show (default: 10)")
+    locks_parser.add_argument('--reset', action='store_true', help="Clear the lock statistics after showing them")
+
+    mem_parser = subparsers.add_parser('mem', help="Show how much memory a subtree holds, by category, directory and owner")
+    mem_parser.add_argument('path', nargs='?', default='.', help="Subtree to measure (default: current directory)")
+    mem_parser.add_argument('--sample', type=float, default=1.0,
+                            help="Fraction of nodes to measure, totals are scaled up (default: 1.0)")
+    mem_parser.add_argument('--top', type=int, default=10, help="Number of directories and owners to show (default: 10)")
+    mem_parser.add_argument('--operations', action='store_true',
+                            help="Also show the memory growth recorded per operation (fs-server --trace-memory)")
+
+    shell_parser = subparsers.add_parser('shell', help="Run commands interactively or from a piped script with the state loaded once")
+    shell_parser.add_argument('--checkpoint', type=float, default=30.0,
+                              help="Save modified state when this many seconds passed since the last save (0: only on exit)")
+
     return parser
 
 
 """Create a parser for the permissions CLI"""
 def create_permissions_parser():
-    parser = argparse.ArgumentParser(description='Manage filesystem permissions')
+    parser = argparse.ArgumentParser(prog="perms", description='Manage filesystem permissions')
+    _add_format_argument(parser)
+    _add_profiling_arguments(parser)
     subparsers = parser.add_subparsers(dest='command')
 
     # set-user command
@@ -87,9 +139,20 @@ def create_permissions_parser():
     set_perms_parser.add_argument('username', help='Username')
     set_perms_parser.add_argument('read', type=str, choices=['true', 'false'], help='Read permission (true/false)')
     set_perms_parser.add_argument('write', type=str, choices=['true', 'false'], help='Write permission (true/false)')
+    set_perms_parser.add_argument('--inherit', action='store_true', help='Apply to the directory and everything below it')
 
     # list-perms command
     list_perms_parser = subparsers.add_parser('list-perms', help='List permissions for a file or directory')
     list_perms_parser.add_argument('name', help='File or directory name')
 
+    # import/export commands
+    import_parser = subparsers.add_parser('import', help='Load users, groups, memberships and ACLs from a CSV or JSONL file')
+    import_parser.add_argument('file', help="File to read ('-' for stdin)")
+    import_parser.add_argument('--file-format', choices=['csv', 'jsonl'],
+                               help='Format of the file (default: from the extension, else jsonl)')
+    export_parser = subparsers.add_parser('export', help='Write users, groups, memberships and ACLs to a CSV or JSONL file')
+    export_parser.add_argument('file', nargs='?', default='-', help="File to write (default: stdout)")
+    export_parser.add_argument('--file-format', choices=['csv', 'jsonl'],
+                               help='Format of the file (default: from the extension, else jsonl)')
+
     return parser
\ No newline at end of file
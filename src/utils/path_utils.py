@@ -61,4 +61,20 @@ def get_basename(path: str) -> str:
         return ""
 
     parts = split_path(path)
-    return parts[-1] if parts else "" 
\ No newline at end of file
+    return parts[-1] if parts else "" 
+
+def node_path(node) -> str:
+    """Absolute path of a node, walking parent links up to the root"""
+    parts = []
+    while node is not None and node.parent is not None:
+        parts.append(node.name)
+        node = node.parent
+    return "/" + "/".join(reversed(parts))
+
+def node_depth(node) -> int:
+    """Number of parent links between a node and the root"""
+    depth = 0
+    while node.parent is not None:
+        node = node.parent
+        depth += 1
+    return depth
@@ -0,0 +1,97 @@
+"""Profiling hooks around CLI command dispatch.
+
+`fs`/`perms --profile FILE <command>` runs the command under cProfile and dumps
+the stats to FILE (read them with `python -m pstats FILE`). `--trace-alloc [N]`
+runs it with tracemalloc and reports the N source lines whose allocations grew
+the most. Reports go to stderr, so command output (and --format jsonl) is left
+alone; through fs-server they come back with the command's output.
+
+For a long-lived process, set the environment variables instead and every
+command it runs is covered: fs-server profiles each request, `fs shell` each
+line. Each command then gets its own pstats file in the profile directory.
+
+    INMEMORY_FS_PROFILE=/tmp/profiles fs-server
+    INMEMORY_FS_TRACE_ALLOC=20 fs shell
+
+Profiling does not nest: a command run while another one is being profiled
+(a shell line under `fs --profile FILE shell`) is covered by the outer profile.
+"""
+import itertools
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+PROFILE_ENV = "INMEMORY_FS_PROFILE"          # directory for one pstats file per command
+TRACE_ALLOC_ENV = "INMEMORY_FS_TRACE_ALLOC"  # allocation sites to report per command
+
+_active = None  # label of the command being profiled; cProfile allows one profiler at a time
+_sequence = itertools.count(1)
+
+def _environment(label: str):
+    """(pstats path, allocation sites) requested through the environment for one command"""
+    profile = None
+    directory = os.environ.get(PROFILE_ENV)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+        profile = os.path.join(directory, f"{label}-{os.getpid()}-{next(_sequence)}.pstats")
+    try:
+        trace_alloc = int(os.environ.get(TRACE_ALLOC_ENV) or 0)
+    except ValueError:
+        trace_alloc = 0
+    return profile, trace_alloc
+
+@contextmanager
+def profiled(label: str, profile: str = None, trace_alloc: int = 0, use_environment: bool = True):
+    """Profile the block into the pstats file profile and/or report its top trace_alloc
+    allocation sites. Without either, use_environment falls back to PROFILE_ENV and
+    TRACE_ALLOC_ENV. label ("fs ls") names the command in reports and file names."""
+    global _active
+    if not profile and not trace_alloc and use_environment:
+        profile, trace_alloc = _environment(label.replace(" ", "-"))
+    if _active or not (profile or trace_alloc):
+        yield
+        return
+
+    # Imported here so the CLIs can import this module without paying for them
+    import cProfile
+    import tracemalloc
+
+    _active = label
+    started_tracing = False
+    before = None
+    if trace_alloc:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            started_tracing = True
+        before = tracemalloc.take_snapshot()
+    profiler = cProfile.Profile() if profile else None
+    start = time.perf_counter()
+    try:
+        if profiler:
+            profiler.enable()
+        try:
+            yield
+        finally:
+            if profiler:
+                profiler.disable()
+    finally:
+        elapsed = time.perf_counter() - start
+        _active = None
+        if before is not None:
+            after = tracemalloc.take_snapshot()
+            if started_tracing:
+                tracemalloc.stop()
+            _report_allocations(label, before, after, trace_alloc)
+        if profiler:
+            profiler.dump_stats(profile)
+            print(f"[{label}] {elapsed * 1000:.1f} ms, profile written to {profile}", file=sys.stderr)
+
+def _report_allocations(label: str, before, after, top: int):
+    import tracemalloc
+    ignore = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+    differences = after.filter_traces(ignore).compare_to(before.filter_traces(ignore), "lineno")
+    growth = sum(stat.size_diff for stat in differences)
+    print(f"[{label}] memory grew {growth / 1024:.1f} KB; top {top} allocation sites:", file=sys.stderr)
+    for stat in differences[:top]:
+        print(f"  {stat}", file=sys.stderr)
@@ -0,0 +1,200 @@
+"""Multi-version snapshots of the namespace for consistent long-running reads"""
+import copyreg
+import pickle
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, Tuple
+
+
+class SnapshotManager:
+    """Versions the tree so readers can pin a consistent view without locks.
+
+    Every mutation takes a new version number and stamps it on the node as
+    ``changed_at``. While snapshots are pinned, the first mutation of a node that
+    a snapshot can still see pushes the node's previous ``children`` dict and
+    ``content`` onto ``node.history`` and gives the writer a fresh copy
+    (copy-on-write), so snapshot readers keep the old objects. Writers never
+    wait on readers. Pinning waits only for mutations already in progress.
+    History that no pinned snapshot can see is dropped when snapshots are released.
+
+    Only ``children`` and ``content`` are versioned. ACL dicts are replaced whole
+    on change (never mutated in place), so a reader iterating one is safe, but a
+    snapshot sees the current ACLs, owner and timestamps. Snapshot.dump takes a
+    node's name and parent from its position in the snapshot.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self.version = 0
+        self._pins: Dict[int, int] = {}  # pinned version -> count
+        self._inflight: Dict[int, int] = {}  # version of an in-progress mutation -> count
+        self._tracked = {}  # nodes holding history -> None
+
+    @contextmanager
+    def mutation(self, node):
+        """Wrap a change to ``node.children`` or ``node.content``"""
+        version = self._begin(node)
+        try:
+            yield
+        finally:
+            self._end(version)
+
+    def pin(self) -> 'Snapshot':
+        """Pin the current version; release the snapshot (or use it as a context manager) when done"""
+        with self._cond:
+            version = self.version
+            self._pins[version] = self._pins.get(version, 0) + 1
+            # Changes that began before the pin may still be applying in place
+            while any(v <= version for v in self._inflight):
+                self._cond.wait()
+        return Snapshot(self, version)
+
+    def _begin(self, node) -> int:
+        with self._cond:
+            self.version += 1
+            version = self.version
+            if self._pins and node.changed_at <= max(self._pins):
+                # A pinned snapshot can see the current state: keep it and copy-on-write
+                history = list(node.history or ())
+                history.append((node.changed_at, version, node.children, node.content))
+                node.history = history
+                self._tracked[node] = None
+                node.changed_at = version
+                if node.is_directory:
+                    node.children = dict(node.children)
+            else:
+                node.changed_at = version
+            self._inflight[version] = self._inflight.get(version, 0) + 1
+            return version
+
+    def _end(self, version: int):
+        with self._cond:
+            count = self._inflight.pop(version) - 1
+            if count:
+                self._inflight[version] = count
+            self._cond.notify_all()
+
+    def _release(self, version: int):
+        with self._cond:
+            count = self._pins.pop(version) - 1
+            if count:
+                self._pins[version] = count
+            oldest = min(self._pins) if self._pins else None
+            for node in list(self._tracked):
+                # Entries ending at or before the oldest pin are invisible to every snapshot
+                history = [entry for entry in node.history or () if oldest is not None and entry[1] > oldest]
+                node.history = history or None
+                if not history:
+                    del self._tracked[node]
+
+
+class Snapshot:
+    """A pinned, read-only view of the tree at one version"""
+
+    def __init__(self, manager: SnapshotManager, version: int):
+        self.manager = manager
+        self.version = version
+        self._released = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
+    def release(self):
+        if not self._released:
+            self._released = True
+            self.manager._release(self.version)
+
+    def _state(self, node) -> Tuple[dict, str]:
+        # Read the live fields before changed_at: a concurrent copy-on-write
+        # publishes history and changed_at before swapping them
+        children, content = node.children, node.content
+        if node.changed_at <= self.version:
+            return children, content
+        for start, end, old_children, old_content in reversed(node.history or ()):
+            if start <= self.version < end:
+                return old_children, old_content
+        # Created after this snapshot was taken
+        return {}, ""
+
+    def children(self, node) -> dict:
+        """Children of a directory as of this snapshot (do not mutate)"""
+        return self._state(node)[0]
+
+    def content(self, node) -> str:
+        """File content as of this snapshot"""
+        return self._state(node)[1]
+
+    def walk(self, node, path: str = "/") -> Iterator[Tuple[str, object]]:
+        """Yield (path, node) for a subtree in depth-first order"""
+        stack = [(path, node)]
+        while stack:
+            path, current = stack.pop()
+            yield path, current
+            if current.is_directory:
+                prefix = path.rstrip("/")
+                for name, child in reversed(list(self.children(current).items())):
+                    stack.append((f"{prefix}/{name}", child))
+
+    def dump(self, obj, file, protocol: int = None):
+        """Pickle obj (a LocalState or a node) to file as of this snapshot, without
+        copying the tree: nodes are written from their snapshot children/content,
+        and each node's name and parent come from where the snapshot has it."""
+        _SnapshotPickler(file, protocol, self).dump(obj)
+
+    def export(self, node):
+        """Copy a subtree as it was at this version into new detached nodes"""
+        from src.utils.models import FileSystemNode
+        root_copy = None
+        stack = [(node, None, node.name)]
+        while stack:
+            current, copy_parent, current_name = stack.pop()
+            children, content = self._state(current)
+            copy = FileSystemNode(current_name, is_directory=current.is_directory, owner=current.owner)
+            for attr in ("size", "group", "created_at", "modified_at", "accessed_at",
+                         "target_path", "mime_type", "perms"):
+                setattr(copy, attr, getattr(current, attr))
+            copy.content = content
+            copy.permissions = dict(current.permissions)
+            if current.inheritable_permissions:
+                copy.inheritable_permissions = dict(current.inheritable_permissions)
+            copy.tags = set(current.tags)
+            if copy_parent is None:
+                root_copy = copy
+            else:
+                copy_parent.add_child(copy)
+            for child_name, child in children.items():
+                stack.append((child, copy, child_name))
+        return root_copy
+
+
+class _SnapshotPickler(pickle.Pickler):
+    """Pickles nodes as a snapshot sees them. Directories are reduced before their
+    children (their state holds the children dict), so every node reached through
+    the tree gets the name and parent of its snapshot position."""
+
+    def __init__(self, file, protocol, snapshot: Snapshot):
+        from src.utils.models import FileSystemNode
+        super().__init__(file, protocol)
+        self.snapshot = snapshot
+        self._node_type = FileSystemNode
+        self._placement = {}  # id(node) -> (parent, name) in the snapshot
+
+    def reducer_override(self, obj):
+        # Called for every non-builtin object (timestamps, Permissions), so keep the miss cheap
+        if type(obj) is not self._node_type:
+            return NotImplemented
+        children, content = self.snapshot._state(obj)
+        state = obj.__getstate__()
+        state["children"] = children
+        state["content"] = content
+        placement = self._placement.pop(id(obj), None)
+        if placement is not None:
+            state["parent"], state["name"] = placement
+        if children:
+            placement = self._placement
+            for name, child in children.items():
+                placement[id(child)] = (obj, name)
+        return copyreg.__newobj__, (type(obj),), state
@@ -1,25 +1,131 @@
+"""Loading and saving of the persisted filesystem state.
+
+This is the only place that knows where the state lives. The fs and perms CLIs,
+the shell and fs-server all go through load_local_state/save_local_state. The
+module imports only os up front (json, pickle and the models are imported
+when state is actually read or written), so commands that never touch the tree
+start fast.
+
+Next to the pickle, save_local_state writes a small JSON sidecar with the
+current user and working directory. LazyState answers those from the sidecar
+and only unpickles the full tree when something else is needed.
+"""
 import os
-import pickle
-from typing import Optional
-from src.utils.models import FileSystemNode
+from src.utils.path_utils import node_path
+
+TYPE_CHECKING = False  # typing.TYPE_CHECKING, without importing typing at startup
+if TYPE_CHECKING:
+    from typing import Optional
+
+STATE_FILE = "~/.inmemory_fs_state.pkl"
+
+def state_path() -> str:
+    """Absolute path of the pickled LocalState"""
+    return os.path.expanduser(STATE_FILE)
+
+def meta_path(path: str = None) -> str:
+    """Path of the JSON sidecar describing the state file"""
+    return os.path.splitext(path or state_path())[0] + ".meta.json"
+
+def new_local_state():
+    """A fresh state: admin logged in at an empty root"""
+    from src.utils.models import LocalState
+    return LocalState(user="admin")
+
+def load_local_state(path: str = None):
+    """Unpickle the saved LocalState, or start fresh if there is none (or it is unreadable).
+    LocalState.__setstate__ repairs a missing root and a detached cwd."""
+    import pickle
+    try:
+        with open(path or state_path(), 'rb') as f:
+            return pickle.load(f)
+    except Exception:
+        return new_local_state()
+
+def save_local_state(local, path: str = None) -> None:
+    """Pickle a LocalState, replacing the previous file atomically, and refresh the sidecar"""
+    import json
+    import pickle
+    path = path or state_path()
+    tmp = f"{path}.tmp"
+    with open(tmp, 'wb') as f, local.snapshots.pin() as snapshot:
+        # Writers keep going while the pinned version is pickled
+        snapshot.dump(local, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+
+    stat = os.stat(path)
+    meta = {"user": local.user, "cwd": node_path(local.cwd),
+            "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+    tmp = f"{meta_path(path)}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump(meta, f)
+    os.replace(tmp, meta_path(path))
+
+class LazyState:
+    """Saved state that is unpickled on first use"""
+
+    def __init__(self, path: str = None):
+        self.path = path or state_path()
+        self._local = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._local is not None
+
+    def load(self):
+        """The full LocalState (loaded once)"""
+        if self._local is None:
+            self._local = load_local_state(self.path)
+        return self._local
+
+    def meta(self) -> 'Optional[dict]':
+        """User and cwd path of the saved state without unpickling it, or None when the
+        sidecar is missing or no longer matches the state file"""
+        if self._local is not None:
+            return {"user": self._local.user, "cwd": node_path(self._local.cwd)}
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            # Nothing saved yet: load() would start a fresh state, admin at the root
+            return {"user": "admin", "cwd": "/"}
+        except OSError:
+            return None
+        import json
+        try:
+            with open(meta_path(self.path)) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if (meta.get("size"), meta.get("mtime_ns")) != (stat.st_size, stat.st_mtime_ns):
+            return None
+        return meta
+
 
 class StateManager:
-    STATE_FILE = os.path.expanduser("~/.inmemory_fs_state.pkl")
+    """Save and load a bare root node (used for snapshot exports)"""
+    STATE_FILE = state_path()
 
     @staticmethod
-    def save_state(root_node: FileSystemNode) -> None:
-        """Save filesystem state to disk"""
+    def save_state(root_node, snapshots=None) -> None:
+        """Save filesystem state to disk. With a SnapshotManager, the tree is pickled
+        from a pinned snapshot so writers keep running while it is written."""
+        import pickle
         try:
             # Create directory if it doesn't exist
             os.makedirs(os.path.dirname(StateManager.STATE_FILE), exist_ok=True)
             with open(StateManager.STATE_FILE, 'wb') as f:
-                pickle.dump(root_node, f)
+                if snapshots is not None:
+                    with snapshots.pin() as snapshot:
+                        snapshot.dump(root_node, f)
+                else:
+                    pickle.dump(root_node, f)
         except Exception as e:
             raise Exception(f"Failed to save state: {str(e)}")
 
     @staticmethod
-    def load_state() -> Optional[FileSystemNode]:
+    def load_state():
         """Load filesystem state from disk"""
+        import pickle
         try:
             with open(StateManager.STATE_FILE, 'rb') as f:
                 root = pickle.load(f)
@@ -27,4 +133,4 @@ class StateManager:
         except FileNotFoundError:
             return None
         except Exception as e:
-            raise Exception(f"Failed to load state: {str(e)}") 
\ No newline at end of file
+            raise Exception(f"Failed to load state: {str(e)}")
@@ -0,0 +1,7 @@
+import pytest
+
+@pytest.fixture(autouse=True)
+def isolated_home(tmp_path, monkeypatch):
+    """CLI commands load and save state under $HOME; give every test a fresh one"""
+    monkeypatch.setenv("HOME", str(tmp_path))
+    monkeypatch.delenv("INMEMORY_FS_SOCKET", raising=False)
@@ -1,6 +1,10 @@
+import contextlib
+import io
+import json
 import pytest
-from src.cli.filesys import FileSystemCLI
-from src.utils.models import Permission
+from src.cli.filesys import FileSystemCLI, run
+from src.cli.output import Output
+from src.utils.models import FileSystemNode, Permission
 
 @pytest.fixture
 def fs_cli():
@@ -80,6 +84,144 @@ def test_find(fs_cli, capsys):
     assert "/dir1/test.txt" in captured.out
     assert "/dir2/test.txt" in captured.out
 
+def test_batch(fs_cli, capsys):
+    fs_cli.batch([
+        "# seed files",
+        "touch batch_a.txt",
+        "write batch_b.txt 'Batched content'",
+    ])
+    captured = capsys.readouterr()
+    assert "Applied 2 operations" in captured.out
+
+    fs_cli.read("batch_b.txt")
+    captured = capsys.readouterr()
+    assert "Batched content" in captured.out
+
+def test_atomic_batch(fs_cli, capsys):
+    fs_cli.batch([
+        "mkdir atomic_dir/sub",
+        "write atomic_dir/sub/a.txt 'atomic content'",
+        "write missing_dir/b.txt 'never written'",
+    ], atomic=True)
+    captured = capsys.readouterr()
+    assert "Error" in captured.out
+
+    fs_cli.ls()
+    captured = capsys.readouterr()
+    assert "atomic_dir" not in captured.out
+
+def test_shell_saves_once(fs_cli, capsys):
+    saves = []
+    fs_cli._write_state = lambda: saves.append(True)
+    fs_cli.shell(io.StringIO(
+        "mkdir shell_dir\n"
+        "cd shell_dir\n"
+        "# comment\n"
+        "touch a.txt\n"
+        "write a.txt 'from the shell'\n"
+        "bogus\n"
+        "perms set-user shelluser pw\n"
+        "read a.txt\n"
+        "pwd\n"
+    ), checkpoint=0)
+    captured = capsys.readouterr()
+    assert "from the shell" in captured.out
+    assert "Created user: shelluser" in captured.out
+    assert captured.out.strip().endswith("/shell_dir")
+    assert saves == [True]
+
+def test_shell_checkpoint_and_exit(fs_cli, capsys):
+    saves = []
+    fs_cli._write_state = lambda: saves.append(True)
+    fs_cli.shell(io.StringIO("mkdir cp_a\nmkdir cp_b\nexit\nmkdir cp_c\n"), checkpoint=1e-9)
+    assert len(saves) == 2
+    assert "cp_c" not in fs_cli.local.cwd.children
+
+def test_shell_batch_reads_its_own_block(fs_cli, capsys):
+    fs_cli._write_state = lambda: None
+    fs_cli.shell(io.StringIO(
+        "batch\n"
+        "touch block.txt\n"
+        "write block.txt 'from the block'\n"
+        "end\n"
+        "read block.txt\n"
+        "perms import -\n"
+        '{"kind": "user", "name": "blockuser", "password": "pw"}\n'
+        "end\n"
+    ), checkpoint=0)
+    out = capsys.readouterr().out
+    assert "Applied 2 operations" in out and "from the block" in out
+    assert "blockuser" in fs_cli.local.users
+
+def test_shell_refuses_to_run_beside_a_server(fs_cli, capsys, monkeypatch):
+    from src.cli import filesys
+    monkeypatch.setattr(filesys, "server_running", lambda: True)
+    fs_cli.out = Output()
+    run(["shell"], fs_cli, io.StringIO("mkdir never\n"))
+    assert "fs-server is running" in capsys.readouterr().out
+    assert "never" not in fs_cli.local.root.children
+
+def test_jsonl_output(fs_cli, capsys):
+    fs_cli.mkdir("json_dir")
+    fs_cli.cd("json_dir")
+    fs_cli.touch("a.txt")
+    fs_cli.write("a.txt", "hello")
+    fs_cli.mkdir("sub")
+    capsys.readouterr()
+
+    fs_cli.out = Output("jsonl")
+    fs_cli.ls()
+    records = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [(r["path"], r["type"], r["size"]) for r in records] == [
+        ("/json_dir/a.txt", "file", 5), ("/json_dir/sub", "directory", 0)]
+    assert set(records[0]) == {"path", "type", "size", "owner", "mtime", "permissions"}
+
+    fs_cli.read("a.txt")
+    record = json.loads(capsys.readouterr().out)
+    assert record["path"] == "/json_dir/a.txt" and record["content"] == "hello"
+
+    fs_cli.find("*.txt")
+    assert [json.loads(line)["path"] for line in capsys.readouterr().out.splitlines()] == ["/json_dir/a.txt"]
+
+    fs_cli.read("missing.txt")
+    assert "error" in json.loads(capsys.readouterr().out)
+
+def test_jsonl_records_carry_effective_permissions(fs_cli, capsys):
+    fs_cli.mkdir("shared")
+    fs_cli.cd("shared")
+    fs_cli.touch("a.txt")
+    pm = fs_cli.perm_manager
+    pm.set_user("alice", "secret")
+    user = fs_cli.local.user
+    fs_cli.local.user = "admin"
+    pm.node_perms.set_permissions(fs_cli.local.cwd, "alice", read=True, write=False, inherit=True)
+    fs_cli.local.user = user
+    capsys.readouterr()
+
+    fs_cli.out = Output("jsonl")
+    fs_cli.ls()
+    record = json.loads(capsys.readouterr().out)
+    # Inherited from the directory, as list-perms reports it
+    assert record["permissions"]["alice"] == "r-"
+    assert record["permissions"] == {name: ("r" if perm.read else "-") + ("w" if perm.write else "-")
+                                     for name, perm in pm.list_permissions("a.txt").items()}
+
+    fs_cli.find("a.txt")
+    assert json.loads(capsys.readouterr().out)["permissions"]["alice"] == "r-"
+
+def test_jsonl_records_stream_in_chunks(capsys, monkeypatch):
+    out = Output("jsonl")
+    monkeypatch.setattr(Output, "CHUNK", 3)
+    assert out.records({"n": i} for i in range(7)) == 7
+    assert [json.loads(line)["n"] for line in capsys.readouterr().out.splitlines()] == list(range(7))
+
+def test_run_format_flag(fs_cli, capsys):
+    cwd = fs_cli.dir_ops.pwd()
+    run(["--format", "jsonl", "pwd"], fs_cli)
+    assert json.loads(capsys.readouterr().out) == {"path": cwd}
+    run(["pwd"], fs_cli)
+    assert capsys.readouterr().out.strip() == cwd
+
 def test_error_handling(fs_cli, capsys):
     # Test non-existent directory
     fs_cli.cd("nonexistent")
@@ -94,4 +236,93 @@ def test_error_handling(fs_cli, capsys):
     # Test invalid move operation
     fs_cli.move(["nonexistent.txt", "new.txt"])
     captured = capsys.readouterr()
-    assert "Error" in captured.out 
\ No newline at end of file
+    assert "Error" in captured.out
+
+def test_import_tree(fs_cli, capsys, tmp_path):
+    host = tmp_path / "host"
+    (host / "docs").mkdir(parents=True)
+    (host / "docs" / "a.txt").write_text("alpha")
+    fs_cli.import_tree(str(host), "/imported")
+    output = capsys.readouterr().out
+    assert "Imported 1 files, 2 directories" in output and "files/sec" in output and "MB/sec" in output
+    fs_cli.cd("/imported/docs")
+    capsys.readouterr()
+    fs_cli.read("a.txt")
+    assert "alpha" in capsys.readouterr().out
+
+def test_tar_export_and_import(fs_cli, capsys, tmp_path):
+    archive = tmp_path / "docs.tar.gz"
+    fs_cli.mkdir("docs")
+    fs_cli.cd("docs")
+    fs_cli.touch("a.txt")
+    fs_cli.write("a.txt", "alpha")
+    fs_cli.cd("/")
+    capsys.readouterr()
+    fs_cli.export_tar("docs", str(archive), compress=True)
+    assert f"Exported 2 entries to {archive}" in capsys.readouterr().out
+
+    fs_cli.mkdir("restore")
+    fs_cli.import_tar("restore", str(archive))
+    assert "Imported 1 files, 1 directories" in capsys.readouterr().out
+    fs_cli.cd("/restore/docs")
+    fs_cli.read("a.txt")
+    assert "alpha" in capsys.readouterr().out
+
+    # Output captured by fs-server has no byte stream underneath
+    captured = io.StringIO()
+    with contextlib.redirect_stdout(captured):
+        fs_cli.export_tar("/", "-")
+    assert "use --file" in captured.getvalue()
+
+def test_stats(fs_cli, capsys):
+    from src.utils import metrics
+    fs_cli.stats()
+    assert "Statistics are disabled" in capsys.readouterr().out
+    metrics.enable()
+    try:
+        fs_cli.touch("stats.txt")
+        fs_cli.out = Output("jsonl")
+        fs_cli.stats(reset=True)
+        records = {r["operation"]: r for r in map(json.loads, capsys.readouterr().out.splitlines()[1:])}
+        assert records["FileOperations.touch"]["count"] == 1
+        assert metrics.snapshot() == {}
+    finally:
+        metrics.disable()
+        metrics.reset()
+
+def test_locks(fs_cli, capsys):
+    fs_cli.locks()
+    assert "Lock statistics are disabled" in capsys.readouterr().out
+
+def test_mem(fs_cli, capsys):
+    fs_cli.mkdir("big")
+    fs_cli.cd("big")
+    fs_cli.touch("a.txt")
+    fs_cli.write("a.txt", "x" * 5000)
+    fs_cli.cd("/")
+    capsys.readouterr()
+    fs_cli.mem(operations=True)
+    out = capsys.readouterr().out
+    assert "content" in out and "/big" in out and "No allocations recorded" in out
+    fs_cli.out = Output("jsonl")
+    fs_cli.mem("big")
+    record = json.loads(capsys.readouterr().out)
+    assert record["files"] == 1 and record["bytes"]["content"] >= 5000
+    fs_cli.mem("missing")
+    assert "not found" in json.loads(capsys.readouterr().out)["error"]
+
+def test_mem_counts_only_readable_nodes(fs_cli, capsys):
+    fs_cli.mkdir("open")
+    fs_cli.mkdir("private")
+    root = fs_cli.local.root
+    root.children["open"].owner = "default_user"
+    root.children["open"].add_child(FileSystemNode("a.txt", owner="default_user", content="x"))
+    root.children["private"].add_child(FileSystemNode("secret.txt", owner="admin", content="x" * 5000))
+    fs_cli.local.user = "default_user"
+    fs_cli.out = Output("jsonl")
+    capsys.readouterr()
+    fs_cli.mem("/")
+    record = json.loads(capsys.readouterr().out)
+    assert record["files"] == 1 and list(record["by_directory"]) == ["/open"]
+    fs_cli.mem("/private")
+    assert "denied" in json.loads(capsys.readouterr().out)["error"]
@@ -1,4 +1,7 @@
+import json
+import io
 import pytest
+from src.cli.output import Output
 from src.cli.permissions import PermissionsCLI, LocalState, PermissionManager
 
 @pytest.fixture
@@ -119,4 +122,47 @@ def test_group_permission_combinations(perms_cli, capsys):
     assert "readonly" in captured.out and "Read: True" in captured.out and "Write: False" in captured.out
     assert "writeonly" in captured.out and "Read: False" in captured.out and "Write: True" in captured.out
     assert "readwrite" in captured.out and "Read: True" in captured.out and "Write: True" in captured.out
-    assert "noaccess" in captured.out and "Read: False" in captured.out and "Write: False" in captured.out 
\ No newline at end of file
+    assert "noaccess" in captured.out and "Read: False" in captured.out and "Write: False" in captured.out 
+
+def test_jsonl_output(perms_cli, capsys):
+    perms_cli.out = Output("jsonl")
+    perms_cli.create_group("devs", True, False)
+    assert json.loads(capsys.readouterr().out) == {"message": "Created group: devs (read=True, write=False)"}
+
+    perms_cli.list_groups()
+    groups = {r["group"]: r for r in map(json.loads, capsys.readouterr().out.splitlines())}
+    assert groups["devs"] == {"group": "devs", "read": True, "write": False, "members": []}
+
+    perms_cli.list_perms("jsonl_file.txt")
+    record = json.loads(capsys.readouterr().out.splitlines()[-1])
+    assert record["path"].endswith("/jsonl_file.txt")
+    assert record["permissions"]["admin"] == "rw"
+
+def test_import_export(perms_cli, capsys, tmp_path):
+    source = tmp_path / "perms.csv"
+    source.write_text("kind,name,password,read,write,user,group,path,inherit\n"
+                      "user,carol,secret,,,,,,\n"
+                      "group,ops,,true,true,,,,\n"
+                      "member,,,,,carol,ops,,\n"
+                      "acl,,,true,false,carol,,/,true\n")
+    perms_cli.import_file(str(source))
+    assert "Imported 1 users, 1 groups, 1 memberships, 1 ACL entries" in capsys.readouterr().out
+    assert "carol" in perms_cli.local.groups["ops"].members
+
+    perms_cli.export_file("-", "jsonl")
+    records = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert {"kind": "user", "name": "carol", "password": "secret"} in records
+    assert {"kind": "acl", "path": "/", "user": "carol", "read": True, "write": False, "inherit": True} in records
+
+    perms_cli.import_file("-", "jsonl", io.StringIO('{"kind": "member", "user": "nobody", "group": "ops"}\n'))
+    assert "Error: User nobody not found" in capsys.readouterr().out
+
+def test_profile_option(tmp_path, capsys):
+    from src.cli.permissions import run
+    path = tmp_path / "perms.pstats"
+    run(["--format", "jsonl", "--profile", str(path), "--trace-alloc", "2", "list-groups"])
+    captured = capsys.readouterr()
+    assert path.exists()
+    assert "[perms list-groups]" in captured.err
+    # Reports stay out of the command's output
+    assert all(line.startswith("{") for line in captured.out.splitlines())
@@ -0,0 +1,94 @@
+import os
+import stat
+import threading
+import pytest
+from src.cli import client, filesys
+from src.cli.server import FileSystemServer
+from src.cli.client import request, forward, with_absolute_path, SOCKET_ENV
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    monkeypatch.setenv("HOME", str(tmp_path))
+    monkeypatch.setenv(SOCKET_ENV, str(tmp_path / "fs.sock"))
+    server = FileSystemServer(save_interval=60)
+    thread = threading.Thread(target=server.serve)
+    thread.start()
+    yield server
+    server.stop()
+    thread.join()
+
+def test_commands_share_resident_state(server):
+    """Test fs and perms requests run against one in-memory state"""
+    assert "Created directory: docs" in request("fs", ["mkdir", "docs"])["output"]
+    request("fs", ["cd", "docs"])
+    request("fs", ["touch", "a.txt"])
+    request("fs", ["write", "a.txt", "hello"])
+    assert request("fs", ["pwd"])["output"].strip() == "/docs"
+    assert "hello" in request("fs", ["read", "a.txt"])["output"]
+    assert "Created user: bob" in request("perms", ["set-user", "bob", "pw"])["output"]
+    assert "bob" in server.local.users
+
+def test_batch_stdin_and_parse_errors(server):
+    """Test batch lines travel with the request and argparse errors come back as a status"""
+    response = request("fs", ["batch"], stdin="touch x.txt\nwrite x.txt hi\n")
+    assert "Applied 2 operations" in response["output"]
+    assert request("fs", ["bogus"])["status"] == 2
+
+def test_state_saved_on_request_and_shutdown(server, tmp_path):
+    """Test modifications are saved on demand instead of after every command"""
+    state = tmp_path / ".inmemory_fs_state.pkl"
+    request("fs", ["mkdir", "data"])
+    assert not state.exists()
+    request("server", ["save"])
+    assert state.exists()
+
+def test_forward_prints_output(server, capsys):
+    """Test the thin client prints the server's output"""
+    assert forward("fs", ["pwd"])
+    assert capsys.readouterr().out.strip() == "/"
+
+def test_forward_falls_back_without_server(tmp_path, monkeypatch):
+    """Test the thin client reports no server when the socket is missing"""
+    monkeypatch.setenv(SOCKET_ENV, str(tmp_path / "missing.sock"))
+    assert not forward("fs", ["pwd"])
+
+def test_refuses_second_server(server):
+    """Test a live socket is not taken over"""
+    with pytest.raises(OSError, match="already running"):
+        FileSystemServer(server.path)
+
+def test_failed_requests_still_get_a_response(server, monkeypatch):
+    """Test malformed argv and unexpected exceptions come back as errors, not a dropped connection"""
+    response = server.execute({"tool": "perms", "argv": None})
+    assert response["status"] == 2 and "argv must be a list" in response["output"]
+
+    def broken(*args, **kwargs):
+        raise OSError("disk full")
+    monkeypatch.setattr(filesys, "run", broken)
+    assert request("fs", ["pwd"]) == {"output": "Error: disk full\n", "status": 1}
+
+def test_socket_is_private(server):
+    """Test the socket is created owner-only"""
+    assert stat.S_IMODE(os.stat(server.path).st_mode) == 0o600
+
+def test_forward_reports_a_dropped_connection(server, monkeypatch, capsys):
+    """Test the client exits with an error instead of a traceback or a local re-run"""
+    def dropped(*args, **kwargs):
+        raise ConnectionError("fs-server closed the connection")
+    monkeypatch.setattr(client, "request", dropped)
+    with pytest.raises(SystemExit):
+        forward("fs", ["pwd"])
+    assert "fs-server failed to answer: fs-server closed the connection" in capsys.readouterr().out
+
+def test_perms_import_reads_forwarded_stdin(server):
+    """Test perms import - gets its records from the request's stdin"""
+    response = request("perms", ["import", "-"], stdin='{"kind": "user", "name": "dana", "password": "pw"}\n')
+    assert "Imported 1 users" in response["output"]
+    assert server.local.users["dana"] == "pw"
+
+def test_with_absolute_path(tmp_path, monkeypatch):
+    """Test relative file arguments are resolved before forwarding"""
+    monkeypatch.chdir(tmp_path)
+    assert with_absolute_path(["import", "a.csv"], "a.csv") == ["import", str(tmp_path / "a.csv")]
+    assert with_absolute_path(["export-tar", "x", "--file=a.tar"], "a.tar") == \
+        ["export-tar", "x", f"--file={tmp_path / 'a.tar'}"]
@@ -22,16 +22,16 @@ def local_state(root_node):
     return local
 
 @pytest.fixture
-def node_ops(local_state):
-    return NodeOperations(local_state)
+def node_ops(local_state, perms_manager):
+    return NodeOperations(local_state, perms_manager)
 
 @pytest.fixture
-def file_ops(local_state):
-    return FileOperations(local_state)
+def file_ops(local_state, perms_manager):
+    return FileOperations(local_state, perms_manager)
 
 @pytest.fixture
-def dir_ops(local_state):
-    return DirectoryOperations(local_state)
+def dir_ops(local_state, perms_manager):
+    return DirectoryOperations(local_state, perms_manager)
 
 @pytest.fixture
 def user_ops(local_state):
@@ -0,0 +1,114 @@
+import asyncio
+import pytest
+from src.fs_operations.async_filesystem import AsyncFileSystem
+from src.utils import locks
+
+@pytest.fixture
+def afs(local_state, perms_manager):
+    fs = AsyncFileSystem(local_state, perms_manager, max_workers=4, max_in_flight=16)
+    yield fs
+    fs.close()
+
+def test_read_write_ls(afs):
+    """Test basic coroutines round-trip through the tree"""
+    async def scenario():
+        await afs.mkdir("/docs/notes", parents=True)
+        await afs.write("/docs/a.txt", "hello")
+        assert await afs.read("/docs/a.txt") == "hello"
+        assert await afs.ls("/docs") == ["a.txt", "notes/"]
+        return [name async for name in afs.iter_ls("/docs")]
+    # Streamed in creation order: notes/ was made first
+    assert asyncio.run(scenario()) == ["notes/", "a.txt"]
+
+def test_iter_ls_streams_in_chunks(afs):
+    """Test iter_ls yields a large directory across several executor hops"""
+    async def scenario():
+        await afs.mkdir("/big")
+        await asyncio.gather(*(afs.write(f"/big/f{i}.txt", "") for i in range(7)))
+        return [name async for name in afs.iter_ls("/big", chunk_size=3)]
+    assert sorted(asyncio.run(scenario())) == sorted(f"f{i}.txt" for i in range(7))
+
+def test_many_concurrent_writes(afs):
+    """Test more requests than workers and in-flight slots all complete"""
+    async def scenario():
+        await afs.mkdir("/data")
+        await asyncio.gather(*(afs.write(f"/data/f{i}.txt", str(i)) for i in range(200)))
+        return await asyncio.gather(*(afs.read(f"/data/f{i}.txt") for i in range(200)))
+    assert asyncio.run(scenario()) == [str(i) for i in range(200)]
+
+def test_find_streams_in_chunks(afs):
+    """Test iter_find yields every match across several chunks and find collects them"""
+    async def scenario():
+        await afs.mkdir("/src/pkg", parents=True)
+        for i in range(5):
+            await afs.write(f"/src/pkg/m{i}.py", "")
+        await afs.write("/src/readme.md", "")
+        streamed = [path async for path in afs.iter_find("*.py", "/src", chunk_size=2)]
+        return streamed, await afs.find("*.md")
+    streamed, found = asyncio.run(scenario())
+    assert sorted(streamed) == [f"/src/pkg/m{i}.py" for i in range(5)]
+    assert found == ["/src/readme.md"]
+
+def test_find_early_exit_releases_snapshot(afs, local_state):
+    """Test abandoning a streaming find releases its pinned snapshot"""
+    async def scenario():
+        await afs.mkdir("/d")
+        for i in range(10):
+            await afs.write(f"/d/f{i}", "")
+        stream = afs.iter_find("*", "/d", chunk_size=3)
+        async for _ in stream:
+            break
+        await stream.aclose()
+    asyncio.run(scenario())
+    assert not local_state.snapshots._pins
+
+def test_move(afs):
+    """Test moving into a directory and renaming, and rejecting a cycle"""
+    async def scenario():
+        await afs.mkdir("/a/b", parents=True)
+        await afs.mkdir("/c")
+        await afs.write("/a/file.txt", "x")
+        await afs.move("/a/file.txt", "/c/")
+        await afs.move("/c/file.txt", "/c/renamed.txt")
+        with pytest.raises(Exception, match="into itself"):
+            await afs.move("/a", "/a/b/a")
+        return await afs.ls("/c"), await afs.read("/c/renamed.txt")
+    assert asyncio.run(scenario()) == (["renamed.txt"], "x")
+
+def test_errors_propagate(afs):
+    """Test missing paths and permission errors surface as exceptions"""
+    async def scenario():
+        with pytest.raises(Exception, match="not found"):
+            await afs.read("/missing.txt")
+    asyncio.run(scenario())
+
+def test_sessions_share_pool(afs, local_state, perms_manager):
+    """Test per-session facades act as their own user over one tree and pool"""
+    perms_manager.set_user("bob", "password123")
+    bob = afs.for_session(local_state.session("bob"))
+    async def scenario():
+        await afs.write("/admin.txt", "a")
+        with pytest.raises(PermissionError):
+            await bob.read("/admin.txt")
+        return await afs.ls("/")
+    assert asyncio.run(scenario()) == ["admin.txt"]
+    assert bob._executor is afs._executor
+
+def test_worker_contention_shows_in_lock_report(afs, monkeypatch):
+    """Test moves waiting on a directory another thread holds are reported as contended"""
+    monkeypatch.setattr(locks, "_lock_stats", True)
+    locks.reset_lock_stats()
+    async def scenario():
+        await afs.mkdir("/hot")
+        await afs.write("/hot/a.txt", "x")
+        hot = afs.local.root.children["hot"]
+        with hot.lock.write("hold"):
+            move = asyncio.ensure_future(afs.move("/hot/a.txt", "/hot/b.txt"))
+            await asyncio.sleep(0.05)
+        await move
+    try:
+        asyncio.run(scenario())
+        sites = {entry["path"]: entry["sites"] for entry in locks.lock_report()}["/hot"]
+        assert sites["async.move"]["contended"] == 1 and sites["async.move"]["wait_ms"] >= 40
+    finally:
+        locks.reset_lock_stats()
@@ -1,3 +1,5 @@
+import threading
+import time
 import pytest
 
 def test_create_directory(dir_ops, root_node):
@@ -95,4 +97,55 @@ def test_move_directory(dir_ops, file_ops):
     assert dir_ops.get_node("/target/source").is_directory
     assert file_ops.read_file("/target/source/test.txt") == "content"
     with pytest.raises(Exception):
-        dir_ops.get_node("/source") 
\ No newline at end of file
+        dir_ops.get_node("/source")
+
+def test_ls_hides_unreadable_children(local_state, perms_manager, dir_ops, file_ops):
+    """Test ls only lists children the current user can read"""
+    perms_manager.set_user("bob", "password123")
+    dir_ops.mkdir("public")
+    file_ops.touch("secret.txt")
+    perms_manager.set_permissions("public", "bob", read=True, write=False)
+    perms_manager.node_perms.set_permissions(local_state.root, "bob", read=True, write=False)
+
+    local_state.user = "bob"
+    assert dir_ops.ls() == ["public/"]
+
+def test_iter_ls_streams_readable_entries_in_insertion_order(local_state, perms_manager, dir_ops, file_ops):
+    """Test iter_ls filters chunk by chunk and keeps creation order"""
+    perms_manager.set_user("bob", "password123")
+    perms_manager.node_perms.set_permissions(local_state.root, "bob", read=True, write=False)
+    for name in ("z.txt", "hidden.txt", "b.txt", "a.txt"):
+        file_ops.touch(name)
+        if name != "hidden.txt":
+            perms_manager.set_permissions(name, "bob", read=True, write=False)
+
+    local_state.user = "bob"
+    entries = dir_ops.iter_ls(chunk_size=2)
+    assert next(entries)[0] == "z.txt"
+    assert [name for name, _ in entries] == ["b.txt", "a.txt"]
+
+def _blocked_while_locked(node, operation):
+    """Run operation in a thread while node's write lock is held; True if it waited"""
+    done = threading.Event()
+
+    def run():
+        operation()
+        done.set()
+
+    with node.lock.write("test"):
+        t = threading.Thread(target=run)
+        t.start()
+        time.sleep(0.05)
+        waited = not done.is_set()
+    t.join(timeout=2)
+    assert done.is_set()
+    return waited
+
+def test_mutators_take_the_changed_directory_lock(dir_ops, file_ops, root_node):
+    """Test create_directory and move into a subdirectory wait for the directory they change"""
+    assert _blocked_while_locked(root_node, lambda: dir_ops.create_directory("/made"))
+    assert "made" in root_node.children
+
+    file_ops.touch("note.txt")
+    assert _blocked_while_locked(root_node.children["made"], lambda: file_ops.move("note.txt", "made/"))
+    assert "note.txt" in root_node.children["made"].children
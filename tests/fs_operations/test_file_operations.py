@@ -77,4 +77,41 @@ def test_move_file(file_ops, dir_ops):
     # Verify file moved
     assert file_ops.read_file("/newdir/test.txt") == "Hello World"
     with pytest.raises(Exception):
-        file_ops.read_file("/test.txt") 
\ No newline at end of file
+        file_ops.read_file("/test.txt")
+
+def test_write_many(file_ops, dir_ops):
+    """Test batched writes across directories, creating missing files"""
+    dir_ops.create_directory("/batch")
+    file_ops.touch("existing.txt")
+
+    applied = file_ops.write_many([
+        ("existing.txt", "one"),
+        ("/batch/a.txt", "two"),
+        ("/batch/b.txt", "three"),
+    ])
+
+    assert applied == 3
+    assert file_ops.read_file("/existing.txt") == "one"
+    assert file_ops.read_file("/batch/a.txt") == "two"
+    assert file_ops.get_node("/batch/b.txt").owner == "admin"
+
+def test_apply_batch_rejects_directory_target(file_ops, dir_ops):
+    """Test a batch group is validated before any entry is applied"""
+    dir_ops.create_directory("/batch")
+    dir_ops.create_directory("/batch/sub")
+
+    with pytest.raises(Exception):
+        file_ops.apply_batch([("touch", "/batch/new.txt"), ("write", "/batch/sub", "x")])
+    assert "new.txt" not in file_ops.get_node("/batch").children
+
+def test_apply_batch_is_all_or_nothing_across_directories(file_ops, dir_ops):
+    """Test a failing directory group leaves the groups before it unapplied"""
+    dir_ops.create_directory("/first")
+    dir_ops.create_directory("/second")
+    dir_ops.create_directory("/second/sub")
+
+    with pytest.raises(Exception):
+        file_ops.apply_batch([("write", "/first/a.txt", "x"), ("write", "/second/sub", "y")])
+    assert file_ops.get_node("/first").children == {}
+    with pytest.raises(ValueError):
+        file_ops.apply_batch([("write", "/first/a.txt")])
@@ -0,0 +1,46 @@
+import os
+import pytest
+from src.fs_operations.file_operations import FileOperations
+from src.fs_operations.host_import import HostImporter
+
+@pytest.fixture
+def host_tree(tmp_path):
+    (tmp_path / "src" / "pkg").mkdir(parents=True)
+    (tmp_path / "src" / "pkg" / "mod.py").write_text("print('hi')\n")
+    (tmp_path / "README.md").write_text("# readme")
+    (tmp_path / "empty").mkdir()
+    (tmp_path / "blob.bin").write_bytes(b"\xff\x00ok")
+    os.symlink(tmp_path / "README.md", tmp_path / "link.md")
+    return tmp_path
+
+def test_import_tree(local_state, perms_manager, host_tree):
+    """Test a host tree is copied with its contents and reported in the stats"""
+    stats = HostImporter(local_state, perms_manager, workers=2).import_tree(str(host_tree), "/fixtures")
+    assert (stats.files, stats.directories) == (3, 4)
+    assert stats.bytes == len("print('hi')\n") + len("# readme") + 4
+    ops = FileOperations(local_state, perms_manager)
+    assert ops.read_file("/fixtures/src/pkg/mod.py") == "print('hi')\n"
+    assert ops.read_file("/fixtures/blob.bin") == "�\x00ok"
+    fixtures = local_state.root.children["fixtures"]
+    assert fixtures.children["empty"].is_directory
+    assert "link.md" not in fixtures.children
+    assert fixtures.owner == "admin" and fixtures.parent is local_state.root
+
+def test_import_requires_new_destination(local_state, perms_manager, host_tree):
+    """Test importing over an existing node or from a missing host directory fails"""
+    importer = HostImporter(local_state, perms_manager)
+    importer.import_tree(str(host_tree), "/fixtures")
+    with pytest.raises(Exception, match="already exists"):
+        importer.import_tree(str(host_tree), "/fixtures")
+    with pytest.raises(Exception, match="not a directory"):
+        importer.import_tree(str(host_tree / "missing"), "/other")
+
+def test_import_checks_write_permission(local_state, perms_manager, host_tree, monkeypatch):
+    """Test users without write access to the parent cannot import, and the host tree is not walked"""
+    perms_manager.set_user("bob", "password123")
+    local_state.user = "bob"
+    importer = HostImporter(local_state, perms_manager)
+    monkeypatch.setattr(importer, "_scan", lambda *args: pytest.fail("host tree was walked"))
+    with pytest.raises(PermissionError):
+        importer.import_tree(str(host_tree), "/fixtures")
+    assert "fixtures" not in local_state.root.children
@@ -0,0 +1,75 @@
+import io
+import tarfile
+import pytest
+from src.fs_operations.directory_operations import DirectoryOperations
+from src.fs_operations.file_operations import FileOperations
+from src.fs_operations.tar_archive import TarArchiver
+
+@pytest.fixture
+def archiver(local_state, perms_manager):
+    return TarArchiver(local_state, perms_manager)
+
+@pytest.fixture
+def ops(local_state, perms_manager):
+    dirs = DirectoryOperations(local_state, perms_manager)
+    files = FileOperations(local_state, perms_manager)
+    dirs.create_directory("/docs/guides")
+    files.create_file("/docs/readme.md", "hello")
+    files.create_file("/docs/guides/intro.txt", "welcome ✓")
+    return files
+
+def test_export_tar(archiver, ops):
+    """Test a subtree is archived under its own name with file bodies"""
+    stream = io.BytesIO()
+    assert archiver.export_tar("/docs", stream) == 4
+    stream.seek(0)
+    with tarfile.open(fileobj=stream) as tar:
+        assert tar.getnames() == ["docs", "docs/guides", "docs/guides/intro.txt", "docs/readme.md"]
+        assert tar.extractfile("docs/guides/intro.txt").read().decode() == "welcome ✓"
+        assert tar.getmember("docs/guides").isdir()
+
+def test_round_trip(archiver, ops, local_state, perms_manager):
+    """Test an exported subtree imports back with the same contents"""
+    stream = io.BytesIO()
+    archiver.export_tar("/docs", stream, compress=True)
+    DirectoryOperations(local_state, perms_manager).create_directory("/restore")
+    stream.seek(0)
+    stats = archiver.import_tar(stream, "/restore")
+    assert (stats.files, stats.directories) == (2, 2)
+    assert ops.read_file("/restore/docs/guides/intro.txt") == "welcome ✓"
+    assert ops.read_file("/restore/docs/readme.md") == "hello"
+    restored = local_state.root.children["restore"].children["docs"]
+    assert restored.modified_at.replace(microsecond=0) == \
+        local_state.root.children["docs"].modified_at.replace(microsecond=0)
+
+def test_import_conflicts_change_nothing(archiver, ops, local_state):
+    """Test an archive whose top-level entry already exists is rejected"""
+    stream = io.BytesIO()
+    archiver.export_tar("/docs", stream)
+    stream.seek(0)
+    with pytest.raises(Exception, match="already exists"):
+        archiver.import_tar(stream, "/")
+    assert local_state.root.children["docs"].children["readme.md"].content == "hello"
+
+def test_import_rejects_unsafe_names(archiver, ops):
+    """Test members escaping the destination are refused"""
+    stream = io.BytesIO()
+    with tarfile.open(fileobj=stream, mode="w") as tar:
+        info = tarfile.TarInfo("../evil.txt")
+        tar.addfile(info, io.BytesIO(b""))
+    stream.seek(0)
+    with pytest.raises(Exception, match="not allowed"):
+        archiver.import_tar(stream, "/docs")
+
+def test_export_skips_unreadable(archiver, ops, local_state, perms_manager):
+    """Test entries the user cannot read are left out of the archive"""
+    perms_manager.set_user("bob", "password123")
+    docs = local_state.root.children["docs"]
+    perms_manager.node_perms.set_permissions(docs, "bob", read=True, write=False)
+    perms_manager.node_perms.set_permissions(docs.children["readme.md"], "bob", read=True, write=False)
+    local_state.user = "bob"
+    stream = io.BytesIO()
+    archiver.export_tar("/docs", stream)
+    stream.seek(0)
+    with tarfile.open(fileobj=stream) as tar:
+        assert tar.getnames() == ["docs", "docs/readme.md"]
@@ -0,0 +1,90 @@
+import threading
+import time
+import pytest
+from src.fs_operations.file_operations import FileOperations
+from src.fs_operations.transactions import Transaction, TransactionConflict, run_transaction
+
+@pytest.fixture
+def ops(local_state, perms_manager):
+    return FileOperations(local_state, perms_manager)
+
+def test_commit_applies_all_operations(local_state, perms_manager, ops):
+    """Test mkdir, writes and permissions land together with one commit hook call"""
+    perms_manager.set_user("bob", "password123")
+    commits = []
+    tx = Transaction(local_state, perms_manager, on_commit=lambda: commits.append(True))
+    tx.mkdir("/project/src", parents=True)
+    tx.write("/project/src/main.py", "print('hi')")
+    tx.touch("/project/README.md")
+    tx.set_permissions("/project", "bob", read=True, write=False, inherit=True)
+    assert tx.read("/project/src/main.py") == "print('hi')"
+    assert "project" not in local_state.root.children
+
+    tx.commit()
+    assert commits == [True]
+    assert ops.read_file("/project/src/main.py") == "print('hi')"
+    assert ops.read_file("/project/README.md") == ""
+    assert "bob" in ops.get_node("/project").inheritable_permissions
+
+def test_failed_plan_applies_nothing(local_state, perms_manager, ops):
+    """Test an invalid operation aborts the whole transaction"""
+    tx = Transaction(local_state, perms_manager)
+    tx.mkdir("/project")
+    tx.write("/project/a.txt", "a")
+    tx.write("/missing/b.txt", "b")
+    with pytest.raises(Exception):
+        tx.commit()
+    assert "project" not in local_state.root.children
+
+def test_conflicting_write_is_detected(local_state, perms_manager, ops):
+    """Test a concurrent change to a read node fails validation"""
+    ops.write_many([("counter.txt", "1")])
+    tx = Transaction(local_state, perms_manager)
+    value = int(tx.read("counter.txt"))
+    tx.write("counter.txt", str(value + 1))
+
+    ops.write("counter.txt", "5")
+    with pytest.raises(TransactionConflict):
+        tx.commit()
+    assert ops.read("counter.txt") == "5"
+
+def test_run_transaction_retries_on_conflict(local_state, perms_manager, ops):
+    """Test run_transaction re-runs the body after a conflict"""
+    ops.write_many([("counter.txt", "1")])
+    attempts = []
+
+    def increment(tx):
+        value = int(tx.read("counter.txt"))
+        if not attempts:
+            ops.write("counter.txt", "10")  # Concurrent writer wins the first round
+        attempts.append(value)
+        tx.write("counter.txt", str(value + 1))
+
+    run_transaction(local_state, perms_manager, increment)
+    assert attempts == [1, 10]
+    assert ops.read("counter.txt") == "11"
+
+def test_path_apis_wait_for_commit(local_state, perms_manager, ops):
+    """Test write_file/delete_file cannot slip in between validation and apply"""
+    ops.create_file("/a.txt", "one")
+    tx = Transaction(local_state, perms_manager)
+    tx.write("/a.txt", "two")
+    tx.touch("/b.txt")
+    validate = tx._validate
+    workers = []
+
+    def validate_then_race():
+        validate()
+        for target in (lambda: ops.write_file("/a.txt", "three"), lambda: ops.delete_file("/b.txt")):
+            worker = threading.Thread(target=target)
+            worker.start()
+            workers.append(worker)
+        time.sleep(0.1)
+        assert all(worker.is_alive() for worker in workers)  # Blocked by the commit's locks
+
+    tx._validate = validate_then_race
+    tx.commit()
+    for worker in workers:
+        worker.join(2)
+    assert ops.read_file("/a.txt") == "three"
+    assert "b.txt" not in local_state.root.children
@@ -0,0 +1,89 @@
+import io
+import pytest
+from src.permissions import bulk
+from src.utils.models import FileSystemNode, LocalState
+from src.permissions.permissions_manager import PermissionManager
+
+RECORDS = [
+    {"kind": "user", "name": "alice", "password": "pw1"},
+    {"kind": "user", "name": "bob", "password": "pw2"},
+    {"kind": "group", "name": "devs", "read": True, "write": True},
+    {"kind": "member", "user": "alice", "group": "devs"},
+    {"kind": "acl", "path": "/docs", "user": "bob", "read": True, "write": False, "inherit": True},
+    {"kind": "acl", "path": "/docs/a.txt", "user": "alice", "read": True, "write": True},
+]
+
+@pytest.fixture
+def tree(perms_manager):
+    docs = FileSystemNode("docs", owner="admin", is_directory=True)
+    perms_manager.root.add_child(docs)
+    docs.add_child(FileSystemNode("a.txt", owner="admin"))
+    return perms_manager
+
+def test_import_applies_all_kinds(tree):
+    """Test importing users, groups, memberships and ACLs"""
+    counts = bulk.import_records(tree, RECORDS)
+    assert counts == {"user": 2, "group": 1, "member": 1, "acl": 2}
+    assert tree.users["bob"] == "pw2"
+    assert "alice" in tree.groups["devs"].members
+    docs = tree.root.children["docs"]
+    assert docs.inheritable_permissions["bob"].read
+    assert docs.children["a.txt"].permissions["alice"].write
+    tree.local.user = "bob"
+    assert tree.node_perms.check_permission(docs.children["a.txt"], "read")
+
+def test_import_is_all_or_nothing(tree):
+    """Test an invalid record leaves the state untouched"""
+    records = RECORDS + [{"kind": "acl", "path": "/missing", "user": "bob", "read": True}]
+    with pytest.raises(ValueError):
+        bulk.import_records(tree, records)
+    assert "alice" not in tree.users
+    assert "devs" not in tree.groups
+
+def test_import_rejects_unknown_references(tree):
+    """Test memberships must name known users and groups"""
+    with pytest.raises(ValueError):
+        bulk.import_records(tree, [{"kind": "member", "user": "ghost", "group": "admins"}])
+    with pytest.raises(ValueError):
+        bulk.import_records(tree, [{"kind": "member", "user": "admin", "group": "nope"}])
+    with pytest.raises(PermissionError):
+        bulk.import_records(tree, [{"kind": "user", "name": "admin", "password": "x"}])
+
+def test_import_protects_admin_user_not_admin_group_name(tree):
+    """Test a group may be called admin, while the admins group keeps its permissions"""
+    bulk.import_records(tree, [{"kind": "group", "name": "admin", "read": True}])
+    assert "admin" in tree.groups
+    admins = tree.groups["admins"]
+    with pytest.raises(PermissionError, match="admins group"):
+        bulk.import_records(tree, [{"kind": "group", "name": "admins",
+                                    "read": admins.read, "write": not admins.write}])
+
+def test_import_requires_admin(tree):
+    """Test non-admin users cannot import"""
+    tree.local.user = "bob"
+    with pytest.raises(PermissionError):
+        bulk.import_records(tree, RECORDS)
+
+@pytest.mark.parametrize("file_format", ["csv", "jsonl"])
+def test_round_trip(tree, file_format):
+    """Test exported records all reappear after importing them into a fresh state"""
+    bulk.import_records(tree, RECORDS)
+    stream = io.StringIO()
+    bulk.write_records(stream, bulk.export_records(tree), file_format)
+    exported = list(bulk.export_records(tree))
+
+    local = LocalState(user="admin")
+    docs = FileSystemNode("docs", owner="admin", is_directory=True)
+    local.root.add_child(docs)
+    docs.add_child(FileSystemNode("a.txt", owner="admin"))
+    fresh = PermissionManager(local.root, local)
+    stream.seek(0)
+    bulk.import_records(fresh, bulk.read_records(stream, file_format))
+    after = list(bulk.export_records(fresh))
+    assert all(record in after for record in exported)
+
+def test_file_format_for():
+    assert bulk.file_format_for("users.csv") == "csv"
+    assert bulk.file_format_for("users.jsonl") == "jsonl"
+    assert bulk.file_format_for("-") == "jsonl"
+    assert bulk.file_format_for("users.csv", "jsonl") == "jsonl"
@@ -1,4 +1,5 @@
 import pytest
+from src.utils.models import PERM_READ, PERM_WRITE
 
 def test_create_group(group_ops):
     """Test creating a new group"""
@@ -91,4 +92,37 @@ def test_list_groups(group_ops, user_ops):
     
     # Verify admins group
     assert "admins" in groups
-    assert "admin" in groups["admins"]["members"] 
\ No newline at end of file
+    assert "admin" in groups["admins"]["members"]
+
+def test_group_index_tracks_membership(group_ops, user_ops):
+    """Test the user->groups index and masks follow membership changes"""
+    user_ops.set_user("testuser", "password123")
+    group_ops.create_group("readers", read=True, write=False)
+    group_ops.create_group("writers", read=False, write=True)
+
+    group_ops.add_user_to_group("testuser", "readers")
+    assert group_ops.index.groups_for("testuser") == {"readers"}
+    assert group_ops.index.mask("testuser") == PERM_READ
+
+    group_ops.add_user_to_group("testuser", "writers")
+    assert group_ops.index.mask("testuser") == PERM_READ | PERM_WRITE
+
+    group_ops.remove_user_from_group("testuser", "readers")
+    assert group_ops.index.mask("testuser") == PERM_WRITE
+
+    group_ops.delete_group("writers")
+    assert group_ops.index.groups_for("testuser") == set()
+    assert group_ops.index.mask("testuser") == 0
+
+def test_remove_user_from_all_groups(group_ops, user_ops):
+    """Test removing a user from every group via the index"""
+    user_ops.set_user("testuser", "password123")
+    group_ops.create_group("g1")
+    group_ops.create_group("g2")
+    group_ops.add_user_to_group("testuser", "g1")
+    group_ops.add_user_to_group("testuser", "g2")
+
+    group_ops.remove_user_from_all_groups("testuser")
+    assert "testuser" not in group_ops.groups["g1"].members
+    assert "testuser" not in group_ops.groups["g2"].members
+    assert group_ops.index.mask("testuser") == 0
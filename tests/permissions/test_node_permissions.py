@@ -0,0 +1,250 @@
+import pickle
+import gc
+import weakref
+import pytest
+from src.utils.models import EMPTY_ACL, FileSystemNode
+
+@pytest.fixture
+def shared_file(root_node):
+    node = FileSystemNode("shared.txt", owner="admin")
+    root_node.add_child(node)
+    return node
+
+def test_cached_denial_invalidated_by_set_permissions(perms_manager, local_state, shared_file):
+    """Test a cached denial is dropped when the node's ACL changes"""
+    perms_manager.set_user("bob", "password123")
+    local_state.user = "bob"
+    with pytest.raises(PermissionError):
+        perms_manager.check_permission(shared_file, "read")
+
+    local_state.user = "admin"
+    perms_manager.node_perms.set_permissions(shared_file, "bob", read=True)
+    local_state.user = "bob"
+    assert perms_manager.check_permission(shared_file, "read")
+
+def test_cached_decision_invalidated_by_group_changes(perms_manager, local_state, shared_file):
+    """Test group membership changes invalidate cached decisions"""
+    perms_manager.set_user("bob", "password123")
+    perms_manager.create_group("editors", read=True, write=True)
+    perms_manager.add_user_to_group("bob", "editors")
+    local_state.user = "bob"
+    assert perms_manager.check_permission(shared_file, "write")
+
+    local_state.user = "admin"
+    perms_manager.remove_user_from_group("bob", "editors")
+    local_state.user = "bob"
+    with pytest.raises(PermissionError):
+        perms_manager.check_permission(shared_file, "write")
+
+def test_cached_decisions_do_not_keep_removed_nodes_alive(perms_manager, local_state, root_node):
+    """Test decisions and resolved ACLs are keyed weakly on the node"""
+    perms_manager.set_user("bob", "password123")
+    directory = FileSystemNode("tmp", owner="bob", is_directory=True)
+    directory.add_child(FileSystemNode("a.txt", owner="admin"))
+    root_node.add_child(directory)
+    local_state.user = "bob"
+    assert perms_manager.check_permission(directory, "read")
+    assert perms_manager.filter_readable(directory.children.values()) == []
+
+    removed = weakref.ref(root_node.children.pop("tmp"))
+    del directory
+    gc.collect()
+    assert removed() is None
+
+def test_owner_has_full_access(perms_manager, local_state, root_node):
+    """Test node owners are allowed without ACL entries"""
+    perms_manager.set_user("bob", "password123")
+    node = FileSystemNode("mine.txt", owner="bob")
+    root_node.add_child(node)
+    local_state.user = "bob"
+    assert perms_manager.check_permission(node, "write")
+
+def test_list_permissions_does_not_mutate_acl(perms_manager, shared_file):
+    """Test group rollups are merged into a fresh view, not the stored ACL"""
+    perms_manager.set_user("bob", "password123")
+    perms_manager.create_group("editors", read=True, write=True)
+    perms_manager.add_user_to_group("bob", "editors")
+    perms_manager.node_perms.set_permissions(shared_file, "bob", read=False, write=False)
+
+    effective = perms_manager.node_perms.list_permissions(shared_file)
+    assert effective["bob"].read and effective["bob"].write
+    assert not shared_file.permissions["bob"].read
+    assert not shared_file.permissions["bob"].write
+
+def test_list_permissions_many(perms_manager, root_node, shared_file):
+    """Test listing effective permissions for every entry of a directory"""
+    perms_manager.set_user("bob", "password123")
+    perms_manager.node_perms.set_permissions(shared_file, "bob", read=True, write=False)
+
+    listing = perms_manager.list_permissions_many()
+    assert listing["shared.txt"]["bob"].read
+    assert not listing["shared.txt"]["bob"].write
+    assert "admin" in listing["shared.txt"]
+
+def test_delete_user_removes_indexed_acl_entries(perms_manager, root_node, shared_file):
+    """Test deleting a user clears their ACL entries via the reverse index"""
+    perms_manager.set_user("bob", "password123")
+    subdir = FileSystemNode("sub", owner="admin", is_directory=True)
+    root_node.add_child(subdir)
+    nested = FileSystemNode("nested.txt", owner="admin")
+    subdir.add_child(nested)
+    perms_manager.node_perms.set_permissions(shared_file, "bob", read=True)
+    perms_manager.node_perms.set_permissions(nested, "bob", read=True, write=True)
+
+    assert set(perms_manager.list_user_permissions("bob")) == {"/shared.txt", "/sub/nested.txt"}
+
+    perms_manager.delete_user("bob")
+    assert "bob" not in shared_file.permissions
+    assert "bob" not in nested.permissions
+
+def test_list_user_permissions_skips_detached_nodes(perms_manager, root_node, shared_file):
+    """Test nodes removed from the tree are dropped from access listings"""
+    perms_manager.set_user("bob", "password123")
+    perms_manager.node_perms.set_permissions(shared_file, "bob", read=True)
+    root_node.remove_child("shared.txt")
+
+    assert perms_manager.list_user_permissions("bob") == {}
+
+def test_removed_subtrees_leave_the_acl_index(perms_manager, local_state, dir_ops, file_ops):
+    """Test deleting nodes drops their index entries, and the index is rebuilt rather than pickled"""
+    perms_manager.set_user("bob", "password123")
+    dir_ops.create_directory("/doomed")
+    file_ops.create_file("/doomed/a.txt")
+    file_ops.create_file("/kept.txt")
+    for path in ("/doomed", "/doomed/a.txt", "/kept.txt"):
+        perms_manager.node_perms.set_permissions(file_ops.get_node(path), "bob", read=True)
+
+    dir_ops.delete_directory("/doomed", recursive=True)
+    assert local_state.acl_index.nodes_for("bob") == {file_ops.get_node("/kept.txt")}
+    file_ops.delete_file("/kept.txt")
+    assert local_state.acl_index.nodes_for("bob") == set()
+
+    perms_manager.node_perms.set_permissions(local_state.root, "bob", read=True)
+    assert "acl_index" not in local_state.__getstate__()
+    restored = pickle.loads(pickle.dumps(local_state))
+    assert restored.acl_index.nodes_for("bob") == {restored.root}
+
+def test_inherited_directory_permissions(perms_manager, local_state, root_node):
+    """Test inheritable directory ACLs apply to the whole subtree"""
+    perms_manager.set_user("bob", "password123")
+    project = FileSystemNode("project", owner="admin", is_directory=True)
+    root_node.add_child(project)
+    src = FileSystemNode("src", owner="admin", is_directory=True)
+    project.add_child(src)
+    main = FileSystemNode("main.py", owner="admin")
+    src.add_child(main)
+
+    perms_manager.node_perms.set_permissions(project, "bob", read=True, write=False, inherit=True)
+    local_state.user = "bob"
+    assert perms_manager.check_permission(project, "read")
+    assert perms_manager.check_permission(main, "read")
+    with pytest.raises(PermissionError):
+        perms_manager.check_permission(main, "write")
+    assert main.permissions == {}
+
+    # Nearer entries override farther ones
+    local_state.user = "admin"
+    perms_manager.node_perms.set_permissions(src, "bob", read=True, write=True, inherit=True)
+    local_state.user = "bob"
+    assert perms_manager.check_permission(main, "write")
+
+def test_inherited_permissions_follow_moves(perms_manager, local_state, root_node):
+    """Test moving a node out of a shared subtree drops inherited access"""
+    perms_manager.set_user("bob", "password123")
+    shared = FileSystemNode("shared", owner="admin", is_directory=True)
+    private = FileSystemNode("private", owner="admin", is_directory=True)
+    root_node.add_child(shared)
+    root_node.add_child(private)
+    doc = FileSystemNode("doc.txt", owner="admin")
+    shared.add_child(doc)
+    perms_manager.node_perms.set_permissions(shared, "bob", read=True, inherit=True)
+
+    local_state.user = "bob"
+    assert perms_manager.check_permission(doc, "read")
+
+    local_state.user = "admin"
+    shared.remove_child("doc.txt")
+    private.add_child(doc)
+    local_state.invalidate_permissions()
+    local_state.user = "bob"
+    with pytest.raises(PermissionError):
+        perms_manager.check_permission(doc, "read")
+
+def test_permissions_are_interned(perms_manager, root_node, shared_file):
+    """Test equal permission values share one immutable instance"""
+    import dataclasses
+    import pickle
+    perms_manager.set_user("bob", "password123")
+    other = FileSystemNode("other.txt", owner="admin")
+    root_node.add_child(other)
+    perms_manager.node_perms.set_permissions(shared_file, "bob", read=True, write=False)
+    perms_manager.node_perms.set_permissions(other, "bob", read=True, write=False)
+    assert shared_file.permissions["bob"] is other.permissions["bob"]
+
+    # Copy-on-write: changing one node leaves the other untouched
+    perms_manager.node_perms.set_permissions(other, "bob", write=True)
+    assert not shared_file.permissions["bob"].write
+    assert other.permissions["bob"].write
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        shared_file.permissions["bob"].read = False
+
+    loaded = pickle.loads(pickle.dumps(root_node))
+    assert loaded.children["shared.txt"].permissions["bob"] is shared_file.permissions["bob"]
+
+def test_group_rollup_is_cached_until_groups_change(perms_manager, shared_file):
+    """Test effective permissions reuse one rollup until a group change invalidates it"""
+    perms_manager.set_user("bob", "password123")
+    perms_manager.create_group("editors", read=True, write=True)
+    node_perms = perms_manager.node_perms
+    assert "bob" not in node_perms.list_permissions(shared_file)
+    rollup = node_perms._group_rollup()
+    assert node_perms._group_rollup() is rollup
+
+    perms_manager.add_user_to_group("bob", "editors")
+    assert node_perms._group_rollup() is not rollup
+    assert node_perms.list_permissions(shared_file)["bob"].write
+
+def test_inheritable_acl_is_created_on_first_use(perms_manager, root_node, shared_file):
+    """Test nodes share one empty inheritable ACL until a directory gets an entry"""
+    perms_manager.set_user("bob", "password123")
+    directory = FileSystemNode("docs", owner="admin", is_directory=True)
+    root_node.add_child(directory)
+    assert shared_file.inheritable_permissions is EMPTY_ACL
+    assert directory.inheritable_permissions is EMPTY_ACL
+
+    perms_manager.node_perms.set_permissions(directory, "bob", read=True, inherit=True)
+    assert directory.inheritable_permissions["bob"].read
+    assert shared_file.inheritable_permissions is EMPTY_ACL and not EMPTY_ACL
+
+    restored = pickle.loads(pickle.dumps(root_node))
+    assert restored.children["shared.txt"].inheritable_permissions is EMPTY_ACL
+    assert restored.children["docs"].inheritable_permissions["bob"].read
+
+    perms_manager.delete_user("bob")
+    assert directory.inheritable_permissions is EMPTY_ACL
+
+def test_filter_readable(perms_manager, local_state, root_node):
+    """Test bulk filtering by owner, direct, inherited and group grants"""
+    perms_manager.set_user("bob", "password123")
+    shared = FileSystemNode("shared", owner="admin", is_directory=True)
+    root_node.add_child(shared)
+    owned = FileSystemNode("owned.txt", owner="bob")
+    granted = FileSystemNode("granted.txt", owner="admin")
+    inherited = FileSystemNode("inherited.txt", owner="admin")
+    hidden = FileSystemNode("hidden.txt", owner="admin")
+    root_node.add_child(owned)
+    root_node.add_child(granted)
+    root_node.add_child(hidden)
+    shared.add_child(inherited)
+    perms_manager.node_perms.set_permissions(granted, "bob", read=True)
+    perms_manager.node_perms.set_permissions(shared, "bob", read=True, inherit=True)
+
+    local_state.user = "bob"
+    nodes = [owned, granted, inherited, hidden]
+    assert perms_manager.filter_readable(nodes) == [owned, granted, inherited]
+
+    local_state.user = "admin"
+    perms_manager.create_group("everyone", read=True)
+    perms_manager.add_user_to_group("bob", "everyone")
+    local_state.user = "bob"
+    assert perms_manager.filter_readable(nodes) == nodes
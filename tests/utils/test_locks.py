@@ -0,0 +1,147 @@
+import threading
+import time
+import pytest
+from src.utils import locks
+from src.utils.locks import RWLock, InstrumentedRWLock
+from src.utils.models import FileSystemNode
+
+def test_readers_share_the_lock():
+    lock = RWLock()
+    inside = threading.Barrier(3, timeout=2)
+
+    def reader():
+        with lock.read():
+            inside.wait()  # All readers are inside at once
+
+    threads = [threading.Thread(target=reader) for _ in range(2)]
+    for t in threads:
+        t.start()
+    inside.wait()
+    for t in threads:
+        t.join(timeout=2)
+    assert not any(t.is_alive() for t in threads)
+
+def test_writer_excludes_readers():
+    lock = RWLock()
+    events = []
+
+    def reader():
+        with lock.read():
+            events.append("read")
+
+    with lock.write():
+        t = threading.Thread(target=reader)
+        t.start()
+        time.sleep(0.05)
+        events.append("write-done")
+    t.join(timeout=2)
+    assert events == ["write-done", "read"]
+
+def test_waiting_writer_blocks_new_readers():
+    lock = RWLock()
+    events = []
+    lock.acquire_read()
+
+    def writer():
+        with lock.write():
+            events.append("write")
+
+    def late_reader():
+        with lock.read():
+            events.append("read")
+
+    w = threading.Thread(target=writer)
+    w.start()
+    time.sleep(0.05)  # Writer is now queued behind the first reader
+    r = threading.Thread(target=late_reader)
+    r.start()
+    time.sleep(0.05)
+    assert events == []
+    lock.release_read()
+    w.join(timeout=2)
+    r.join(timeout=2)
+    assert events == ["write", "read"]
+
+def test_reentrant_acquisition():
+    lock = RWLock()
+    with lock:
+        with lock.write():
+            with lock.read():
+                pass
+    with lock.read():
+        with lock.read():
+            pass
+    # Fully released: another thread can write
+    def writer():
+        with lock.write():
+            pass
+
+    t = threading.Thread(target=writer)
+    t.start()
+    t.join(timeout=2)
+    assert not t.is_alive()
+
+def test_idle_locks_stay_small():
+    lock = RWLock()
+    assert not hasattr(lock, "__dict__")
+    with lock.read():
+        with lock.read():
+            assert lock._reader_counts
+    assert lock._reader_counts is None and lock._cond is None
+
+    # The condition variable only appears once a thread has had to wait
+    def reader():
+        with lock.read():
+            pass
+
+    with lock.write():
+        t = threading.Thread(target=reader)
+        t.start()
+        time.sleep(0.05)
+    t.join(timeout=2)
+    assert lock._cond is not None
+
+@pytest.fixture
+def lock_stats(monkeypatch):
+    monkeypatch.setattr(locks, "_lock_stats", True)
+    locks.reset_lock_stats()
+    yield
+    locks.reset_lock_stats()
+
+def test_nodes_get_instrumented_locks_when_enabled(lock_stats):
+    node = FileSystemNode("d", is_directory=True)
+    assert isinstance(node.lock, InstrumentedRWLock) and node.lock.node is node
+
+def test_contention_is_recorded_per_site(lock_stats):
+    root = FileSystemNode("/", is_directory=True)
+    hot = FileSystemNode("hot", is_directory=True)
+    cold = FileSystemNode("cold", is_directory=True)
+    root.add_child(hot)
+    root.add_child(cold)
+    hot.add_child(FileSystemNode("f.txt"))
+
+    def reader():
+        with hot.lock.read("ls"):
+            pass
+
+    with hot.lock.write("move"):
+        t = threading.Thread(target=reader)
+        t.start()
+        time.sleep(0.05)
+    t.join(timeout=2)
+    with hot.children["f.txt"].lock.read("read"):
+        pass
+    with cold.lock.read("ls"):
+        pass
+
+    report = locks.lock_report(top=1)
+    assert [entry["path"] for entry in report] == ["/hot"]
+    sites = report[0]["sites"]
+    assert sites["ls"]["contended"] == 1 and sites["ls"]["wait_ms"] >= 40
+    assert sites["move"]["hold_ms"] >= 40 and sites["move"]["contended"] == 0
+    assert sites["read:file"]["acquisitions"] == 1
+    assert report[0]["acquisitions"] == 3
+
+    locks.reset_lock_stats()
+    assert locks.lock_report() == []
+
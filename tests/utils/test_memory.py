@@ -0,0 +1,63 @@
+import sys
+import pytest
+from src.utils.memory import CATEGORIES, memory_usage, node_footprint
+from src.utils.models import FileSystemNode
+
+@pytest.fixture
+def tree(root_node):
+    for d in range(4):
+        directory = FileSystemNode(f"dir{d}", owner="admin", is_directory=True)
+        root_node.add_child(directory)
+        for i in range(50):
+            directory.add_child(FileSystemNode(f"file{i}.txt", owner="bob" if d else "admin", content="x" * 100 * (d + 1)))
+    return root_node
+
+def test_categories_add_up(tree):
+    """Test the total is the sum of the categories and file bodies are charged to content"""
+    usage = memory_usage(tree)
+    assert (usage["files"], usage["directories"], usage["nodes"]) == (200, 5, 205)
+    assert usage["sampled"] == 1.0
+    assert usage["bytes"]["total"] == sum(usage["bytes"][category] for category in CATEGORIES)
+    content = sum(sys.getsizeof("x" * 100 * (d + 1)) for d in range(4)) * 50
+    assert usage["bytes"]["content"] == content
+    footprint = node_footprint(tree.children["dir0"].children["file0.txt"])
+    assert footprint["locks"] > 0 and footprint["acl"] > 0
+
+def test_breakdown_by_directory_and_owner(tree):
+    """Test subtrees are charged to the immediate subdirectory and nodes to their owner"""
+    usage = memory_usage(tree, top=2)
+    assert list(usage["by_directory"]) == ["/dir3", "/dir2"]
+    whole = memory_usage(tree)
+    assert sum(whole["by_directory"].values()) + sum(node_footprint(tree).values()) == whole["bytes"]["total"]
+    assert whole["by_owner"]["bob"] > whole["by_owner"]["admin"]
+    dir1 = memory_usage(tree.children["dir1"])
+    assert sum(dir1["by_owner"].values()) == dir1["bytes"]["total"] == whole["by_directory"]["/dir1"]
+
+def test_sampling_estimates_the_total(tree):
+    """Test a sampled walk still counts every node and scales its byte estimate"""
+    exact = memory_usage(tree)["bytes"]["total"]
+    sampled = memory_usage(tree, sample=0.5)
+    assert sampled["nodes"] == 205
+    assert 0.3 < sampled["sampled"] < 0.7
+    assert abs(sampled["bytes"]["total"] - exact) < exact * 0.25
+    with pytest.raises(ValueError):
+        memory_usage(tree, sample=0)
+
+def test_readable_filter_skips_subtrees(tree):
+    """Test children rejected by the filter are left out with everything below them"""
+    usage = memory_usage(tree, readable=lambda nodes: [node for node in nodes if node.name != "dir3"])
+    assert (usage["files"], usage["directories"]) == (150, 4)
+    assert "/dir3" not in usage["by_directory"]
+
+def test_history_is_its_own_category(local_state):
+    """Test copies kept for a pinned snapshot are charged to history until it is released"""
+    node = FileSystemNode("a.txt", owner="admin", content="old" * 1000)
+    local_state.root.add_child(node)
+    assert node_footprint(node)["history"] == 0
+    with local_state.snapshots.pin():
+        with local_state.snapshots.mutation(node):
+            node.content = "new" * 1000
+        history = memory_usage(local_state.root)["bytes"]["history"]
+        assert history > sys.getsizeof("old" * 1000)
+        assert node_footprint(node)["content"] == sys.getsizeof("new" * 1000)
+    assert node_footprint(node)["history"] == 0
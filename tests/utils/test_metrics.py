@@ -0,0 +1,78 @@
+import tracemalloc
+import pytest
+from src.utils import metrics
+from src.utils.metrics import Histogram
+from src.fs_operations.file_operations import FileOperations
+from src.fs_operations.node_operations import NodeOperations
+
+@pytest.fixture
+def recording():
+    metrics.reset()
+    metrics.enable()
+    yield
+    metrics.disable()
+    metrics.reset()
+
+def test_histogram_buckets():
+    """Test values land in buckets whose bounds are within 1/8 of them"""
+    for value in [0, 1, 7, 8, 15, 16, 17, 1000, 123456, 10**9]:
+        upper = Histogram.upper_bound(Histogram.index(value))
+        assert value <= upper <= value + value / Histogram.SUB_BUCKETS
+    histogram = Histogram()
+    for value in range(1, 101):
+        histogram.record(value * 1000)
+    assert 50000 <= histogram.percentile(0.5) <= 50000 * 1.125
+    assert 99000 <= histogram.percentile(0.99) <= 99000 * 1.125
+
+def test_counts_errors_and_latency(local_state, perms_manager, recording):
+    """Test public methods are counted, including calls that raise"""
+    ops = FileOperations(local_state, perms_manager)
+    ops.touch("a.txt")
+    ops.write("a.txt", "hello")
+    ops.read("a.txt")
+    with pytest.raises(ValueError):
+        ops.read("missing.txt")
+    stats = metrics.snapshot()
+    assert stats["FileOperations.read"]["count"] == 2
+    assert stats["FileOperations.read"]["errors"] == 1
+    assert stats["FileOperations.touch"]["count"] == 1
+    assert stats["PermissionManager.check_permission"]["count"] >= 2
+    read = stats["FileOperations.read"]
+    assert 0 < read["p50_us"] <= read["p99_us"] <= read["max_us"]
+    assert sum(count for _, count in read["histogram"]) == 2
+
+    metrics.reset()
+    assert metrics.snapshot() == {}
+
+def test_delegating_override_is_counted_once(local_state, perms_manager, recording):
+    """Test a move through FileOperations is recorded under it only, and for_session is untimed"""
+    ops = FileOperations(local_state, perms_manager)
+    ops.touch("a.txt")
+    ops.move("a.txt", "b.txt")
+    ops.for_session(local_state)
+    stats = metrics.snapshot()
+    assert stats["FileOperations.move"]["count"] == 1
+    assert "NodeOperations.move" not in stats
+    assert not any(name.endswith(".for_session") for name in stats)
+
+def test_disabled_methods_are_plain_functions(recording):
+    """Test disabling removes the wrappers entirely, and generators are never wrapped"""
+    assert hasattr(FileOperations.__dict__["read"], "__wrapped__")
+    assert not hasattr(NodeOperations.__dict__["iter_ls"], "__wrapped__")
+    metrics.disable()
+    assert not hasattr(FileOperations.__dict__["read"], "__wrapped__")
+
+def test_allocation_tracking(local_state, perms_manager):
+    """Test tracemalloc mode records the memory growth of each call"""
+    metrics.reset()
+    metrics.enable(track_allocations=True)
+    try:
+        ops = FileOperations(local_state, perms_manager)
+        ops.touch("a.txt")
+        stats = metrics.snapshot()["FileOperations.touch"]
+        # A new node with its lock and dicts takes over a kilobyte
+        assert stats["count"] == 1 and stats["alloc_bytes"] > 1000
+    finally:
+        metrics.disable()
+        metrics.reset()
+    assert not tracemalloc.is_tracing()
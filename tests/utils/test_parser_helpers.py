@@ -45,6 +45,21 @@ def test_filesys_parser():
     assert args.command == 'find'
     assert args.pattern == '*.txt'
 
+    args = parser.parse_args(['batch'])
+    assert args.command == 'batch'
+    assert not args.atomic
+
+    args = parser.parse_args(['batch', '--atomic'])
+    assert args.atomic
+
+    args = parser.parse_args(['--format', 'jsonl', 'ls'])
+    assert args.format == 'jsonl'
+    assert parser.parse_args(['ls']).format is None
+
+    args = parser.parse_args(['shell', '--checkpoint', '5'])
+    assert args.command == 'shell'
+    assert args.checkpoint == 5.0
+
 def test_permissions_parser():
     parser = create_permissions_parser()
     
@@ -100,6 +115,10 @@ def test_permissions_parser():
     assert args.username == 'testuser'
     assert args.read == 'true'
     assert args.write == 'true'
+    assert not args.inherit
+
+    args = parser.parse_args(['set-perms', 'projects', 'testuser', 'true', 'false', '--inherit'])
+    assert args.inherit
     
     args = parser.parse_args(['list-perms', 'testfile'])
     assert args.command == 'list-perms'
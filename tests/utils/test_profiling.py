@@ -0,0 +1,40 @@
+import pstats
+import tracemalloc
+from src.utils import profiling
+from src.utils.profiling import profiled
+
+def test_profile_dumps_pstats(tmp_path, capsys):
+    path = tmp_path / "ls.pstats"
+    with profiled("fs ls", profile=str(path)):
+        sorted(range(1000))
+    stats = pstats.Stats(str(path))
+    assert any("sorted" in function for _, _, function in stats.stats)
+    assert "[fs ls]" in capsys.readouterr().err
+
+def test_trace_alloc_reports_top_sites(capsys):
+    """Test the report names the allocating line and tracemalloc is stopped afterwards"""
+    with profiled("fs write", trace_alloc=3):
+        data = [str(i) * 10 for i in range(10000)]  # noqa: F841
+    err = capsys.readouterr().err
+    assert "[fs write] memory grew" in err
+    assert "test_profiling.py" in err.splitlines()[1]
+    assert len(err.splitlines()) <= 4
+    assert not tracemalloc.is_tracing()
+
+def test_environment_profiles_every_command(tmp_path, monkeypatch, capsys):
+    monkeypatch.setenv(profiling.PROFILE_ENV, str(tmp_path / "profiles"))
+    for _ in range(2):
+        with profiled("fs ls"):
+            pass
+    with profiled("fs shell", use_environment=False):
+        pass
+    assert len(list((tmp_path / "profiles").glob("fs-ls-*.pstats"))) == 2
+    assert not list((tmp_path / "profiles").glob("fs-shell-*"))
+
+def test_profiles_do_not_nest(tmp_path, capsys):
+    """Test a command run inside a profiled one is covered by the outer profile only"""
+    with profiled("fs shell", profile=str(tmp_path / "outer.pstats")):
+        with profiled("fs ls", profile=str(tmp_path / "inner.pstats")):
+            pass
+    assert (tmp_path / "outer.pstats").exists()
+    assert not (tmp_path / "inner.pstats").exists()
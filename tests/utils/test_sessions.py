@@ -0,0 +1,70 @@
+import pytest
+import threading
+from src.fs_operations.file_operations import FileOperations
+from src.fs_operations.directory_operations import DirectoryOperations
+
+def test_sessions_share_tree_with_independent_cwd(local_state, perms_manager):
+    """Test two sessions see one tree while keeping their own user and cwd"""
+    perms_manager.set_user("bob", "password123")
+    dir_ops = DirectoryOperations(local_state, perms_manager)
+    dir_ops.mkdir("/a")
+    dir_ops.mkdir("/b")
+    perms_manager.node_perms.set_permissions(local_state.root.children["b"], "bob", read=True, write=False)
+
+    alice = local_state.session()
+    bob = local_state.session("bob")
+    alice_ops = dir_ops.for_session(alice)
+    bob_ops = dir_ops.for_session(bob)
+    alice_ops.cd("/a")
+    bob_ops.cd("/b")
+
+    assert alice.cwd.name == "a" and bob.cwd.name == "b"
+    assert local_state.cwd is local_state.root
+    assert alice.root is bob.root is local_state.root
+    assert bob_ops.pwd() == "/b"
+
+    FileOperations(local_state, perms_manager).for_session(alice).write_many([("note.txt", "hi")])
+    assert "note.txt" in local_state.root.children["a"].children
+
+def test_session_permissions_are_per_user(local_state, perms_manager):
+    """Test permission checks use the session user, not the shared state's"""
+    perms_manager.set_user("bob", "password123")
+    file_ops = FileOperations(local_state, perms_manager)
+    file_ops.write_many([("/secret.txt", "x")])
+
+    bob_ops = file_ops.for_session(local_state.session("bob"))
+    with pytest.raises(PermissionError):
+        bob_ops.read("secret.txt")
+    assert local_state.user == "admin"
+    assert file_ops.read("secret.txt") == "x"
+
+def test_session_group_mask_cached_until_invalidated(local_state, perms_manager):
+    """Test the cached group mask follows group membership changes"""
+    perms_manager.set_user("bob", "password123")
+    bob = local_state.session("bob")
+    index = perms_manager.group_index
+    assert bob.group_mask(index) == 0
+    perms_manager.add_user_to_group("bob", "admins")
+    assert bob.group_mask(index) == 3
+
+def test_concurrent_sessions(local_state, perms_manager):
+    """Test sessions in different threads do not stomp on each other's cwd"""
+    dir_ops = DirectoryOperations(local_state, perms_manager)
+    for i in range(8):
+        dir_ops.mkdir(f"/d{i}")
+    errors = []
+
+    def worker(i):
+        ops = dir_ops.for_session(local_state.session())
+        for _ in range(200):
+            ops.cd(f"/d{i}")
+            if ops.pwd() != f"/d{i}":
+                errors.append(i)
+            ops.cd("/")
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
@@ -0,0 +1,87 @@
+import io
+import pickle
+import pytest
+from src.fs_operations.file_operations import FileOperations
+from src.fs_operations.directory_operations import DirectoryOperations
+from src.utils.state_manager import StateManager
+
+@pytest.fixture
+def ops(local_state, perms_manager):
+    return FileOperations(local_state, perms_manager)
+
+def test_snapshot_sees_pinned_version(local_state, ops):
+    """Test writers do not disturb a pinned snapshot"""
+    ops.touch("a.txt")
+    ops.write("a.txt", "before")
+    root = local_state.root
+
+    with local_state.snapshots.pin() as snapshot:
+        ops.write("a.txt", "after")
+        ops.touch("b.txt")
+        assert snapshot.content(root.children["a.txt"]) == "before"
+        assert set(snapshot.children(root)) == {"a.txt"}
+        assert set(root.children) == {"a.txt", "b.txt"}
+
+    assert ops.read("a.txt") == "after"
+
+def test_history_reclaimed_after_release(local_state, ops):
+    """Test old versions are dropped once no snapshot can see them"""
+    ops.touch("a.txt")
+    node = local_state.root.children["a.txt"]
+    snapshot = local_state.snapshots.pin()
+    ops.write("a.txt", "new")
+    assert node.history
+    snapshot.release()
+    assert node.history is None
+    assert local_state.root.history is None
+
+def test_walk_and_find_use_snapshot(local_state, ops, perms_manager):
+    """Test walking a snapshot while the tree changes"""
+    dirs = DirectoryOperations(local_state, perms_manager)
+    dirs.mkdir("docs")
+    ops.write_many([("/docs/one.txt", "1"), ("/docs/two.txt", "2")])
+
+    with local_state.snapshots.pin() as snapshot:
+        dirs.delete_directory("/docs", recursive=True)
+        paths = [path for path, _ in snapshot.walk(local_state.root)]
+    assert paths == ["/", "/docs", "/docs/one.txt", "/docs/two.txt"]
+    assert ops._find_recursive(local_state.root, "*.txt") == []
+
+def test_save_state_from_snapshot(local_state, ops, tmp_path, monkeypatch):
+    """Test saving state through a snapshot produces an equivalent tree"""
+    monkeypatch.setattr(StateManager, "STATE_FILE", str(tmp_path / "state.pkl"))
+    ops.write_many([("a.txt", "alpha")])
+    StateManager.save_state(local_state.root, local_state.snapshots)
+
+    with open(StateManager.STATE_FILE, "rb") as f:
+        saved = pickle.load(f)
+    assert saved.children["a.txt"].content == "alpha"
+    assert saved.children["a.txt"].parent is saved
+
+def test_dump_writes_the_pinned_version(local_state, ops, perms_manager):
+    """Test a dump taken under a pin ignores later writes, creations and moves"""
+    dirs = DirectoryOperations(local_state, perms_manager)
+    dirs.mkdir("docs")
+    ops.touch("a.txt")
+    ops.write("a.txt", "before")
+
+    with local_state.snapshots.pin() as snapshot:
+        ops.write("a.txt", "after")
+        ops.touch("b.txt")
+        ops.move("a.txt", "docs/")
+        perms_manager.set_user("bob", "password123")
+        perms_manager.node_perms.set_permissions(local_state.root, "bob", read=True)
+        saved = pickle.loads(_dump(snapshot, local_state))
+
+    assert set(saved.root.children) == {"docs", "a.txt"}
+    assert saved.root.children["a.txt"].content == "before"
+    assert saved.root.children["a.txt"].parent is saved.root
+    assert saved.root.children["docs"].children == {}
+    assert saved.cwd is saved.root
+    # ACLs are not versioned: the dump sees the current entries
+    assert "bob" in saved.root.permissions
+
+def _dump(snapshot, obj) -> bytes:
+    buffer = io.BytesIO()
+    snapshot.dump(obj, buffer)
+    return buffer.getvalue()
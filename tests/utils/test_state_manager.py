@@ -0,0 +1,47 @@
+import os
+import subprocess
+import sys
+from src.utils.models import FileSystemNode, LocalState
+from src.utils.state_manager import LazyState, load_local_state, save_local_state, meta_path
+
+def test_save_and_load_round_trip(tmp_path):
+    """Test a saved state loads back with its cwd, and a missing file gives a fresh state"""
+    path = str(tmp_path / "state.pkl")
+    local = LocalState()
+    docs = FileSystemNode("docs", owner="admin", is_directory=True)
+    local.root.add_child(docs)
+    local.cwd = docs
+    save_local_state(local, path)
+
+    loaded = load_local_state(path)
+    assert loaded.cwd.name == "docs"
+    assert loaded.cwd.parent is loaded.root
+    assert load_local_state(str(tmp_path / "missing.pkl")).cwd is not None
+
+def test_lazy_state_meta_without_unpickling(tmp_path):
+    """Test the sidecar answers user and cwd until the state file changes"""
+    path = str(tmp_path / "state.pkl")
+    local = LocalState(user="admin")
+    docs = FileSystemNode("docs", owner="admin", is_directory=True)
+    local.root.add_child(docs)
+    local.cwd = docs
+    save_local_state(local, path)
+
+    lazy = LazyState(path)
+    assert lazy.meta()["cwd"] == "/docs"
+    assert not lazy.loaded
+
+    # A state file written by something else invalidates the sidecar
+    with open(path, "ab") as f:
+        f.write(b"\0")
+    assert LazyState(path).meta() is None
+    os.remove(meta_path(path))
+    assert LazyState(path).meta() is None
+
+def test_cli_import_is_lazy():
+    """Test importing the CLIs does not pull in the models or operation modules"""
+    code = ("import sys, src.cli.filesys, src.cli.permissions;"
+            "print(sorted(m for m in sys.modules if m.startswith(('src.fs_operations', 'src.permissions', 'src.utils.models'))))")
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                            cwd=os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+    assert result.stdout.strip() == "[]"